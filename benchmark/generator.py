@@ -0,0 +1,95 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""Deterministic synthetic group generator shared by the benchmarks."""
+import datetime as dt
+import random
+from pysplit import Group
+from pysplit.utils import Currency, TimeStamp
+
+
+def generate_records(n_purchases, n_members=50, fan_out=(1, 5), currencies=None,
+                     start=dt.datetime(2022, 1, 1), days=365, seed=0):
+    """Yield the JSON conform dictionaries of synthetic purchases.
+    The same arguments always yield the same records.
+
+    Keyword arguments:
+    n_purchases -- number of purchases
+    n_members -- number of members (default 50)
+    fan_out -- minimum and maximum number of recipients per purchase (default (1, 5))
+    currencies -- dictionary of currency -> weight (default 80% Euro, 20% USD)
+    start -- first purchase date (default 01.01.2022)
+    days -- date range in days (default 365)
+    seed -- random seed (default 0)
+    """
+    rng = random.Random(seed)
+    currencies = currencies or {Currency.Euro: 0.8, Currency.USD: 0.2}
+    codes, weights = [x.name for x in currencies], list(currencies.values())
+    members = member_names(n_members)
+    low, high = min(fan_out[0], n_members), min(fan_out[1], n_members)
+
+    for i in range(n_purchases):
+        date = start + dt.timedelta(seconds=rng.randrange(days * 86400))
+        yield {
+            'purchaser': rng.choice(members),
+            'recipients': rng.sample(members, rng.randint(low, high)),
+            'amount': round(rng.uniform(1.0, 100.0), 2),
+            'currency': rng.choices(codes, weights)[0],
+            'date': str(TimeStamp(date)),
+            'title': 'purchase_{:}'.format(i % 1000),
+            'stamp': str(TimeStamp(start + dt.timedelta(seconds=i)))
+        }
+
+
+def build_group(records, n_members=50, start=dt.datetime(2022, 1, 1)):
+    """Build and return a group of synthetic purchase records through the public Group API.
+
+    Keyword arguments:
+    records -- iterable of purchase dictionaries of generate_records
+    n_members -- number of members (default 50)
+    start -- group and member time stamp (default 01.01.2022)
+    """
+    group = Group('benchmark', currency=Currency.Euro)
+    group.set_time(start)
+    group.exchange_rates[Currency.USD] = 1.19
+
+    for name in member_names(n_members):
+        group.add_member(name).set_time(start)
+
+    for x in records:
+        group.add_purchase(x['title'], x['purchaser'], x['recipients'], x['amount'],
+                           Currency[x['currency']], x['date'], stamp=x['stamp'])
+
+    return group
+
+
+def generate_group(n_purchases, n_members=50, fan_out=(1, 5), currencies=None,
+                   start=dt.datetime(2022, 1, 1), days=365, seed=0):
+    """Build and return a synthetic group through the public Group API.
+    The keyword arguments are passed to generate_records.
+    """
+    return build_group(generate_records(
+        n_purchases, n_members, fan_out, currencies, start, days, seed), n_members, start)
+
+
+def member_names(n_members):
+    """Return the names of the synthetic members."""
+    return ['member_{:}'.format(i) for i in range(n_members)]
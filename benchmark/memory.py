@@ -0,0 +1,74 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""Memory benchmark reporting the bytes per purchase of a synthetic group.
+
+Run it from the repository root with
+
+    python -m benchmark.memory [--purchases 100000]
+
+The group is built with the generator of the benchmark suite through the
+public Group API only, so the same script can be run on older revisions of
+the package to compare the results.
+"""
+import argparse
+import gc
+import tracemalloc
+from .generator import generate_group
+
+
+def measure(func):
+    """Call func and return its result and the retained memory in bytes."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return result, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Report the memory per purchase of a synthetic group.')
+    parser.add_argument('--purchases', type=int, default=100000,
+                        help='Number of purchases.')
+    parser.add_argument('--members', type=int, default=50,
+                        help='Number of members.')
+    parser.add_argument('--recipients', type=int, default=3,
+                        help='Number of recipients per purchase.')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Random seed.')
+    args = parser.parse_args()
+
+    group, group_size = measure(lambda: generate_group(
+        args.purchases, args.members, (args.recipients, args.recipients), seed=args.seed))
+    views, views_size = measure(lambda: list(group._purchases))
+
+    print('purchases:             {:}'.format(args.purchases))
+    print('group bytes/purchase:  {:.1f}'.format(group_size / args.purchases))
+    print('object bytes/purchase: {:.1f}'.format(views_size / args.purchases))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""Benchmark suite reporting the throughput and peak memory of the group operations.
+
+Run it from the repository root with
+
+    python -m benchmark [--sizes 1000 10000] [--output results.json]
+                        [--baseline baseline.json] [--threshold 20]
+                        [--memory-threshold 20]
+
+The results are written as JSON. If a baseline file of a previous run is
+given, the run fails when an operation is slower or its peak memory is
+higher than in the baseline by more than the threshold percentage.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pysplit import load_group
+from .generator import build_group, generate_records
+
+
+def operations(size, n_members, fan_out, path):
+    """Return a list of (name, function) tuples of the benchmarked operations.
+    The functions are called in order and may be called repeatedly.
+
+    Keyword arguments:
+    size -- number of purchases
+    n_members -- number of members
+    fan_out -- minimum and maximum number of recipients per purchase
+    path -- temporary group file path
+    """
+    records = list(generate_records(size, n_members, fan_out))
+    group = build_group(records, n_members)
+    members = list(group._members.values())
+
+    return [
+        ('add_purchase', lambda: build_group(records, n_members)),
+        ('member_balance', lambda: [x.balance for x in members]),
+        ('balances', lambda: group.balances()),
+        ('turnover', lambda: group.turnover),
+        ('save', lambda: group.save(path)),
+        ('load_group', lambda: load_group(path)),
+        ('load_group_lazy', lambda: load_group(path, lazy=True)),
+    ]
+
+
+def run(sizes, n_members=50, fan_out=(1, 5), repeat=3, memory=True):
+    """Run the benchmarks and return the list of result dictionaries.
+
+    Keyword arguments:
+    sizes -- list of group sizes (number of purchases)
+    n_members -- number of members (default 50)
+    fan_out -- minimum and maximum number of recipients per purchase (default (1, 5))
+    repeat -- number of timed runs, the fastest one is reported (default 3)
+    memory -- measure the peak memory in an additional traced run (default True)
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'group.json')
+        for size in sizes:
+            for name, func in operations(size, n_members, fan_out, path):
+                seconds = float('inf')
+                for _ in range(repeat):
+                    gc.collect()
+                    start = time.perf_counter()
+                    func()
+                    seconds = min(seconds, time.perf_counter() - start)
+
+                peak = None
+                if memory:
+                    gc.collect()
+                    tracemalloc.start()
+                    func()
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+
+                results.append({
+                    'operation': name,
+                    'size': size,
+                    'seconds': seconds,
+                    'purchases_per_second': size / seconds if seconds else None,
+                    'peak_bytes': peak
+                })
+
+    return results
+
+
+def compare(results, baseline, threshold, memory_threshold=None):
+    """Return the list of regression messages of results against a baseline.
+    The peak memory is compared if both runs measured it.
+
+    Keyword arguments:
+    results -- list of result dictionaries
+    baseline -- list of result dictionaries of a previous run
+    threshold -- allowed slowdown in percent
+    memory_threshold -- allowed peak memory increase in percent (default None for threshold)
+    """
+    memory_threshold = threshold if memory_threshold is None else memory_threshold
+    reference = {(x['operation'], x['size']): x for x in baseline}
+    regressions = []
+    for x in results:
+        tmp = reference.get((x['operation'], x['size']))
+        if tmp is None:
+            continue
+
+        seconds = tmp['seconds']
+        if seconds and x['seconds'] > seconds * (1.0 + threshold / 100.0):
+            regressions.append('{:} ({:}): {:.4f}s > {:.4f}s (+{:.1f}%)'.format(
+                x['operation'], x['size'], x['seconds'], seconds,
+                100.0 * (x['seconds'] / seconds - 1.0)))
+
+        peak = tmp.get('peak_bytes')
+        if peak and x.get('peak_bytes') is not None and \
+                x['peak_bytes'] > peak * (1.0 + memory_threshold / 100.0):
+            regressions.append('{:} ({:}): peak {:.2f} MiB > {:.2f} MiB (+{:.1f}%)'.format(
+                x['operation'], x['size'], x['peak_bytes'] / 2**20, peak / 2**20,
+                100.0 * (x['peak_bytes'] / peak - 1.0)))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Report the throughput and peak memory of the group operations.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000],
+                        help='Numbers of purchases.')
+    parser.add_argument('--members', type=int, default=50,
+                        help='Number of members.')
+    parser.add_argument('--fan-out', type=int, nargs=2, default=[1, 5],
+                        help='Minimum and maximum number of recipients per purchase.')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of timed runs per operation.')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Skip the peak memory measurement.')
+    parser.add_argument('--output', help='Write the results to a JSON file.')
+    parser.add_argument('--baseline', help='JSON results of a previous run.')
+    parser.add_argument('--threshold', type=float, default=20.0,
+                        help='Allowed slowdown against the baseline in percent.')
+    parser.add_argument('--memory-threshold', type=float, default=None,
+                        help='Allowed peak memory increase against the baseline in percent '
+                             '(default the threshold).')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.members, tuple(args.fan_out),
+                  args.repeat, not args.no_memory)
+
+    print('{:<16} {:>8} {:>12} {:>16} {:>12}'.format(
+        'operation', 'size', 'seconds', 'purchases/s', 'peak MiB'))
+    for x in results:
+        print('{:<16} {:>8} {:>12.4f} {:>16.0f} {:>12}'.format(
+            x['operation'], x['size'], x['seconds'], x['purchases_per_second'] or 0.0,
+            '-' if x['peak_bytes'] is None else '{:.1f}'.format(x['peak_bytes'] / 2**20)))
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump({
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'results': results
+            }, fp, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as fp:
+            baseline = json.load(fp)['results']
+
+        regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+        for x in regressions:
+            print('Regression: {:}'.format(x))
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
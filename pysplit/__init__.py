@@ -19,4 +19,10 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-from .group import Group, load_group
\ No newline at end of file
+from .group import Group, load_group
+from .mapped import MappedGroup
+from .profiling import disable_profiling, enable_profiling, profiling_enabled
+from .sharded import ShardedGroup
+from .sqlite_group import SQLiteGroup
+from .stream import iter_group, stream_group
+from .workspace import Workspace
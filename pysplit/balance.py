@@ -24,7 +24,8 @@ from .transfer import Transfer
 
 class Balance(Transfer):
     """Balance class derived from transfer class.
-    This derived class does not link balance in members."""
+    This derived class is not stored in the group."""
+    __slots__ = ()
 
     def __init__(self, group, purchaser, recipient, amount, currency, date):
         """Balance class initialization.
@@ -44,11 +45,3 @@ class Balance(Transfer):
         recipients = list(self.recipients.keys())
         self.group.add_transfer(self.title, self.purchaser.name, recipients,
                                 self.amount, currency=self.currency, date=self.date)
-
-    def _link(self):
-        """Link the balance object in the members objects."""
-        pass
-
-    def _unlink(self):
-        """Remove the balance object from the members objects.."""
-        pass
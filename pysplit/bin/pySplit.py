@@ -20,7 +20,12 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 import argparse
+import asyncio
+import json
+import sys
 from pysplit import *
+from pysplit.csv_import import fields, import_csv
+from pysplit.server import GroupServer
 from pysplit.version import __version__
 from pysplit.utils import Currency, InvalidMemberError
 
@@ -40,7 +45,128 @@ def user_input(description, default=None, options=None, func=str):
     return func(inp_data)
 
 
+def parse_pairs(pairs, keys):
+    """Parse a list of 'key=value' strings and return a dictionary."""
+    tmp = {}
+    for x in pairs:
+        key, sep, value = x.partition('=')
+        if not sep or key not in keys:
+            raise(ValueError('Invalid pair {:} (expected one of {:}=...)!'.format(
+                x, ', '.join(keys))))
+        tmp[key] = value
+
+    return tmp
+
+
+def import_main(argv):
+    # define the argument parser
+    parser = argparse.ArgumentParser(
+        prog='pySplit import',
+        description='Import purchases from a CSV file (e.g. a bank or card statement).')
+    parser.add_argument('csv_path', help='The path to a CSV file.')
+    parser.add_argument('-g', '--group', dest='group', required=True,
+                        help='The path to the group file.')
+    parser.add_argument('--map', dest='mapping', nargs='+', required=True,
+                        metavar='FIELD=COLUMN',
+                        help='CSV column of a purchase field ({:}).'.format(', '.join(fields)))
+    parser.add_argument('--default', dest='defaults', nargs='+', default=[],
+                        metavar='FIELD=VALUE', help='Value of an unmapped purchase field.')
+    parser.add_argument('--delimiter', default=',', help='CSV column delimiter.')
+    parser.add_argument('--decimal', default='.', help='Decimal separator of the amounts.')
+    parser.add_argument('--date-format', default=None,
+                        help='strptime format of the dates (default %%d.%%m.%%Y[ %%H:%%M:%%S]).')
+    parser.add_argument('--separator', default=';', help='Separator of the recipient names.')
+    parser.add_argument('--chunk-size', type=int, default=10000,
+                        help='Number of rows added to the group at once.')
+    parser.add_argument('--rejected', default=None,
+                        help='Path of the rejected rows (default <csv_path>.rejected.csv).')
+    args = parser.parse_args(argv)
+
+    group = load_group(args.group, lazy=True)
+    n_imported, n_rejected = import_csv(
+        group, args.csv_path, parse_pairs(args.mapping, fields),
+        defaults=parse_pairs(args.defaults, fields), chunk_size=args.chunk_size,
+        rejected_path=args.rejected, delimiter=args.delimiter, decimal=args.decimal,
+        date_format=args.date_format, separator=args.separator)
+    group.save(args.group, indent=4, journal=True)
+
+    print('Imported {:} rows into {:}.'.format(n_imported, args.group))
+    if n_rejected:
+        print('Rejected {:} rows, see {:}.'.format(
+            n_rejected, args.rejected or '{:}.rejected.csv'.format(args.csv_path)))
+
+
+def batch_main(argv):
+    # define the argument parser
+    parser = argparse.ArgumentParser(
+        prog='pySplit batch',
+        description='Evaluate all group files of a directory in parallel.')
+    parser.add_argument('directory', help='The directory of the group files.')
+    parser.add_argument('--pattern', default='**/*.json',
+                        help='Glob pattern of the group files (default **/*.json).')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='Number of worker processes (default number of CPUs).')
+    parser.add_argument('--mode', default='greedy', choices=['greedy', 'minimal'],
+                        help='Balance mode of the settlements.')
+    parser.add_argument('--force', action='store_true',
+                        help='Evaluate unchanged groups again.')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Path of the JSON report.')
+    args = parser.parse_args(argv)
+
+    report = Workspace(args.directory, pattern=args.pattern).evaluate(
+        max_workers=args.workers, force=args.force, mode=args.mode)
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(report, fp, indent=4)
+
+    for name, x in report['groups'].items():
+        print('{:}: {:} members, {:} purchases, turnover {:.2f}{:}, {:} settlements'.format(
+            name, x['members'], x['purchases'], x['turnover'], Currency[x['currency']],
+            len(x['settlements'])))
+    for name, x in report['errors'].items():
+        print('{:}: {:}'.format(name, x))
+    print('Evaluated {:} groups, skipped {:} unchanged groups, {:} errors.'.format(
+        report['evaluated'], report['skipped'], len(report['errors'])))
+
+
+def serve_main(argv):
+    # define the argument parser
+    parser = argparse.ArgumentParser(
+        prog='pySplit serve',
+        description='Serve the group files of a directory over a local HTTP/JSON interface.')
+    parser.add_argument('directory', help='The directory of the group files.')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface address.')
+    parser.add_argument('--port', type=int, default=8080, help='TCP port.')
+    parser.add_argument('--memory-limit', type=float, default=256.0,
+                        help='Estimated memory of the groups kept in memory in MiB.')
+    parser.add_argument('--save-delay', type=float, default=1.0,
+                        help='Seconds between the first change of a group and its save.')
+    args = parser.parse_args(argv)
+
+    server = GroupServer(args.directory, memory_limit=int(args.memory_limit * 2 ** 20),
+                         save_delay=args.save_delay)
+    print('Serving {:} on http://{:}:{:}/groups/<name>'.format(
+        args.directory, args.host, args.port))
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+# sub commands of the pySplit application
+commands = {
+    'batch': batch_main,
+    'import': import_main,
+    'serve': serve_main,
+}
+
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in commands:
+        return commands[sys.argv[1]](sys.argv[2:])
+
     # define the argument parser
     parser = argparse.ArgumentParser(
         description='pySplit - A simple python package for money pool split development.')
@@ -52,14 +178,19 @@ def main():
                         action='store_true', help='Add purchase(s) to the group.')
     parser.add_argument('-t', '--transfer', dest='transfer', required=False,
                         action='store_true', help='Add transfer(s) to the group.')
+    parser.add_argument('--profile', dest='profile', required=False,
+                        action='store_true', help='Print the operation timings of the group.')
     parser.add_argument('-v', '--version', action='version',
                         version='%(prog)s (version {:})'.format(__version__))
     parser.add_argument('path', nargs='?', help='The path to a group file.')
     args = parser.parse_args()
 
+    if args.profile:
+        enable_profiling()
+
     # load or create a group
     if args.path:
-        group = load_group(args.path)
+        group = load_group(args.path, lazy=True)
     else:
         inp_title = user_input('Group title', default='Untitled')
         inp_description = user_input('Group description', default='')
@@ -180,7 +311,13 @@ def main():
         file_path = user_input('File name',
                                default='{:}.json'.format(tmp))
 
-    group.save(file_path, indent=4)
+    group.save(file_path, indent=4, journal=bool(args.path))
+
+    # print the operation timings
+    if args.profile:
+        print('{:<28} {:>10} {:>12}'.format('Operation', 'Calls', 'Seconds'))
+        for k, v in group.stats().items():
+            print('{:<28} {:>10} {:>12.6f}'.format(k, v['calls'], v['seconds']))
 
 
 if __name__ == '__main__':
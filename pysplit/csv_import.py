@@ -0,0 +1,172 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import csv
+import datetime as dt
+import os
+from .utils import Currency, InvalidRecordError, TimeStamp
+
+fields = ('title', 'purchaser', 'recipients', 'amount', 'currency', 'date')
+
+
+def _currency(x):
+    """Return the currency of an enum name or symbol."""
+    try:
+        return Currency[x]
+    except KeyError:
+        return Currency(x)
+
+
+def iter_csv(path, mapping, defaults=None, members=(), currency=Currency.Euro,
+             delimiter=',', decimal='.', date_format=None, separator=';'):
+    """Read a CSV file lazily and yield (line, row, record, error) tuples.
+    Either the purchase record or the error message of a row is None.
+
+    Keyword arguments:
+    path -- CSV file path
+    mapping -- dictionary of purchase field -> CSV column name
+    defaults -- dictionary of purchase field -> value for unmapped fields (default None)
+    members -- recipients of rows with an empty recipient list (default ())
+    currency -- currency of rows without currency (default Euro)
+    delimiter -- CSV column delimiter (default ',')
+    decimal -- decimal separator of the amounts (default '.')
+    date_format -- strptime format of the dates (default None for the TimeStamp formats)
+    separator -- separator of the recipient names (default ';')
+    """
+    defaults = dict(defaults or {})
+    defaults.setdefault('recipients', '')
+    defaults.setdefault('currency', currency.name)
+    thousands = '.' if decimal == ',' else ','
+    members = list(members)
+    missing = [x for x in fields if x not in mapping and x not in defaults]
+    if missing:
+        raise(ValueError('No column or default for {:}!'.format(', '.join(missing))))
+
+    with open(path, 'r', newline='') as fp:
+        reader = csv.DictReader(fp, delimiter=delimiter)
+        unknown = set(mapping.values()) - set(reader.fieldnames or ())
+        if unknown:
+            raise(ValueError('Unknown CSV columns {:}!'.format(', '.join(sorted(unknown)))))
+
+        for row in reader:
+            line = reader.line_num
+            try:
+                # fields beyond the header are collected under the key None
+                if row.get(None):
+                    raise(ValueError('{:} more fields than columns'.format(len(row[None]))))
+
+                values = {x: row[mapping[x]] if x in mapping else defaults[x] for x in fields}
+                short = sorted(mapping[x] for x, v in values.items() if v is None)
+                if short:
+                    raise(ValueError('missing columns {:}'.format(', '.join(short))))
+
+                amount = values['amount'].strip().replace(thousands, '').replace(decimal, '.')
+                date = values['date'].strip()
+                if date_format is not None:
+                    date = TimeStamp(dt.datetime.strptime(date, date_format))
+                else:
+                    date = TimeStamp.from_ticks(TimeStamp.parse(date))
+
+                record = {
+                    'title': values['title'].strip(),
+                    'purchaser': values['purchaser'].strip(),
+                    'recipients': [x.strip() for x in values['recipients'].split(separator)
+                                   if x.strip()] or members,
+                    'amount': float(amount),
+                    'currency': _currency(values['currency'].strip()),
+                    'date': date
+                }
+            except (KeyError, TypeError, ValueError) as e:
+                yield line, row, None, '{:}: {:}'.format(type(e).__name__, e)
+            else:
+                yield line, row, record, None
+
+
+def import_csv(group, path, mapping, defaults=None, chunk_size=10000, rejected_path=None,
+               **kwargs):
+    """Import the rows of a CSV file as purchases of a group in chunks and return
+    the numbers of imported and rejected rows. Only one chunk of records is kept
+    in memory. Rejected rows are written with their line number and error to a
+    sidecar CSV file.
+
+    Keyword arguments:
+    group -- group object
+    path -- CSV file path
+    mapping -- dictionary of purchase field -> CSV column name
+    defaults -- dictionary of purchase field -> value for unmapped fields (default None)
+    chunk_size -- number of records added at once (default 10000)
+    rejected_path -- sidecar file path (default '<path>.rejected.csv')
+    kwargs -- keyword arguments of iter_csv
+    """
+    rejected_path = rejected_path or '{:}.rejected.csv'.format(path)
+    kwargs.setdefault('members', list(group._member_names))
+    kwargs.setdefault('currency', group.currency)
+
+    if os.path.exists(rejected_path):
+        os.remove(rejected_path)
+
+    n_imported, n_rejected = 0, 0
+    fp, writer = None, None
+
+    def reject(line, row, error):
+        # the sidecar file is only created for the first rejected row
+        nonlocal fp, writer, n_rejected
+        if writer is None:
+            fp = open(rejected_path, 'w', newline='')
+            writer = csv.DictWriter(fp, fieldnames=['line', 'error'] + [
+                                    x for x in row.keys() if x is not None],
+                                    delimiter=kwargs.get('delimiter', ','),
+                                    extrasaction='ignore')
+            writer.writeheader()
+        writer.writerow(dict(row, line=line, error=error))
+        n_rejected += 1
+
+    def flush(chunk):
+        nonlocal n_imported
+        while chunk:
+            try:
+                group.add_purchases_bulk([x[2] for x in chunk])
+            except InvalidRecordError as e:
+                errors = dict(e.args[1])
+                for i in sorted(errors):
+                    reject(chunk[i][0], chunk[i][1], errors[i])
+                chunk = [x for i, x in enumerate(chunk) if i not in errors]
+            else:
+                n_imported += len(chunk)
+                chunk = []
+
+    try:
+        chunk = []
+        for line, row, record, error in iter_csv(path, mapping, defaults, **kwargs):
+            if error is not None:
+                reject(line, row, error)
+                continue
+
+            chunk.append((line, row, record))
+            if len(chunk) >= chunk_size:
+                flush(chunk)
+                chunk = []
+        flush(chunk)
+    finally:
+        if fp is not None:
+            fp.close()
+
+    return n_imported, n_rejected
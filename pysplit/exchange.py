@@ -0,0 +1,74 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from bisect import bisect_left, bisect_right
+
+
+class RateSeries():
+    """Date-sorted exchange rate series of a currency.
+    A rate is valid from its date until the date of the next rate.
+    """
+    __slots__ = ('dates', 'rates')
+
+    def __init__(self):
+        self.dates = []
+        self.rates = []
+
+    def __len__(self):
+        return len(self.dates)
+
+    def index(self, date):
+        """Return the index of the rate valid at date or -1 before the first rate.
+
+        Keyword arguments:
+        date -- integer microseconds since the epoch
+        """
+        return bisect_right(self.dates, date) - 1
+
+    def items(self):
+        """Return an iterator of (date, rate) tuples."""
+        return zip(self.dates, self.rates)
+
+    def rate_of(self, start):
+        """Return the rate of a period by its start date.
+
+        Keyword arguments:
+        start -- period start date, integer microseconds since the epoch
+        """
+        return self.rates[bisect_left(self.dates, start)]
+
+
+def ledger_key(series, code, date):
+    """Return the ledger key of an amount, the currency code or the tuple of the
+    currency code and the start date of its rate period. Amounts of one key
+    share one exchange rate and are converted once per ledger read.
+
+    Keyword arguments:
+    series -- dictionary of currency code -> RateSeries
+    code -- currency code
+    date -- integer microseconds since the epoch
+    """
+    x = series.get(code)
+    if x is None:
+        return code
+
+    i = x.index(date)
+    return code if i < 0 else (code, x.dates[i])
@@ -20,13 +20,26 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 import json
+import os
+import time
+from bisect import bisect_left, bisect_right
+from contextlib import nullcontext
 from .utils import Base, DuplicateMemberError, MissingExchangeRateError, TimeStamp
-from .utils import InvalidMemberError, InvalidMemberNameError
-from .utils import Currency
+from .utils import InvalidMemberError, InvalidMemberNameError, InconsistentLedgerError
+from .utils import at_least_1d, Currency, DIGITS, split, to_major
 from .member import Member
 from .purchase import Purchase
+from .purchase_table import PurchaseTable
 from .transfer import Transfer
 from .balance import Balance
+from .exchange import RateSeries, ledger_key
+from .journal import Journal
+from .locking import GroupLock
+from .mapped import write_binary
+from .settlement import settle, settle_minimal
+from .row_index import RowIndex
+from .time_index import TimeIndex
+from .vectorized import NumpyEngine
 
 
 class Group(Base):
@@ -50,6 +63,12 @@ class Group(Base):
             for c, c_r in self.exchange_rates.items():
                 print(' * 1{:} -> {:}{:}'.format(self.currency, c_r, c))
 
+        for c, series in self._serialize_rate_series().items():
+            print(rule)
+            print('Exchange rates {:}:'.format(c))
+            for date, c_r in series:
+                print(' * {:}: 1{:} -> {:}{:}'.format(date, self.currency, c_r, Currency[c]))
+
         print(rule)
         print('Members:')
         for m in self._members:
@@ -57,13 +76,13 @@ class Group(Base):
 
         print(rule)
         print('Purchases:')
-        for p in self._purchases:
-            print(' * {:}'.format(p))
+        for x in self._purchases.to_dicts():
+            print(' * {:}'.format(Purchase.describe(x)))
 
         print(rule)
         print('Transfers:')
-        for t in self._transfers:
-            print(' * {:}'.format(t))
+        for x in self._transfers.to_dicts():
+            print(' * {:}'.format(Transfer.describe(x)))
 
         print(rule)
         print('Pending balances:')
@@ -72,13 +91,23 @@ class Group(Base):
 
         print(mainrule)
 
-    def __init__(self, name, description='', currency=Currency.Euro):
+    engines = {'python': None, 'numpy': NumpyEngine}
+    journal_limit = 1000
+
+    # True while the operations of all groups are profiled, a group profiled on
+    # its own sets the attribute on the instance (see pysplit.enable_profiling)
+    _profiled = False
+
+    def __init__(self, name, description='', currency=Currency.Euro, engine='python',
+                 thread_safe=False):
         """Group class initialization.
 
         Keyword arguments:
         name -- group name
         description -- group description (default '')
         currency -- group currency enum object (default Euro)
+        engine -- balance engine name, 'python' or 'numpy' (default 'python')
+        thread_safe -- lock mutations and validate reads for shared use by threads (default False)
         """
         super().__init__()
         self.name = name
@@ -86,9 +115,38 @@ class Group(Base):
         self.currency = currency
 
         self.exchange_rates = {}
+
+        # date-dependent exchange rates: currency code -> RateSeries, the
+        # ledger books amounts of a series currency per rate period
+        self._rate_series = {}
         self._members = {}
-        self._purchases = []
-        self._transfers = []
+        self._member_ids = {}
+        self._member_names = []
+        self._purchases = PurchaseTable(self, Purchase, linked=True)
+        self._transfers = PurchaseTable(self, Transfer, linked=True)
+
+        # running member ledger: member index -> {currency code: net amount}
+        # amounts are kept in their original currency so that a change of
+        # the exchange rates is reflected on the next read without rebooking
+        self._ledger = []
+
+        # journal of the file the group was loaded from or saved to and the
+        # state of the group at that time
+        self._journal = None
+        self._saved = None
+
+        # date index and secondary indexes of the rows, created by the first
+        # point-in-time query or row query
+        self._time_index = None
+        self._row_index = None
+
+        # operation -> [calls, seconds], recorded while profiling is enabled
+        self._stats = {}
+
+        self.engine = engine
+
+        # striped writer locks of the thread-safe mode (see GroupLock)
+        self.thread_safe = thread_safe
 
     def __str__(self):
         tmp = '{:}'.format(self.name)
@@ -96,19 +154,286 @@ class Group(Base):
             tmp += '({:})'.format(self.description)
         return tmp
 
-    def _serialize(self):
-        """Convert the object to a JSON conform dictionary and return it."""
+    def _header(self):
+        """Return the JSON conform dictionary of the group fields."""
         return {
             'name': self.name,
             'description': self.description,
             'currency': self.currency.name,
-            'members': [m.to_dict() for m in self._members.values()],
-            'purchases': [p.to_dict() for p in self._purchases],
-            'transfers': [t.to_dict() for t in self._transfers],
-            'exchange_rates': {
-                k.name: v for k, v in self.exchange_rates.items()}
+            'stamp': str(self.stamp)
         }
 
+    def _journal_entries(self):
+        """Return the list of journal entries since the last save or None
+        if the changes can not be expressed as journal entries."""
+        if self._saved is None or self._saved['dirty']:
+            return None
+
+        entries = []
+        header = self._header()
+        if header != self._saved['header']:
+            entries.append(dict(header, op='group'))
+
+        exchange_rates = {k.name: v for k, v in self.exchange_rates.items()}
+        for k in self._saved['exchange_rates'].keys() - exchange_rates.keys():
+            entries.append({'op': 'exchange_rate', 'currency': k, 'rate': None})
+        for k, v in exchange_rates.items():
+            if self._saved['exchange_rates'].get(k) != v:
+                entries.append({'op': 'exchange_rate', 'currency': k, 'rate': v})
+
+        rate_series = self._serialize_rate_series()
+        for k in self._saved['rate_series'].keys() | rate_series.keys():
+            saved, current = dict(self._saved['rate_series'].get(k, ())), dict(rate_series.get(k, ()))
+            for date in saved.keys() - current.keys():
+                entries.append({'op': 'exchange_rate', 'currency': k, 'rate': None, 'date': date})
+            for date, v in current.items():
+                if saved.get(date) != v:
+                    entries.append({'op': 'exchange_rate', 'currency': k, 'rate': v, 'date': date})
+
+        for name, member in self._members.items():
+            if name not in self._saved['members']:
+                entries.append(dict(member.to_dict(), op='member'))
+            elif str(member.stamp) != self._saved['members'][name]:
+                return None
+
+        n_purchases, n_transfers = self._saved['rows']
+        # the records carry the ids after removed rows, but not a removed
+        # last row, which only a snapshot keeps
+        for table, n_saved in ((self._purchases, n_purchases), (self._transfers, n_transfers)):
+            if len(table) > n_saved and len(table) - 1 in table._removed:
+                return None
+
+        for x in self._purchases.to_dicts(n_purchases):
+            entries.append(dict(x, op='purchase'))
+        for x in self._transfers.to_dicts(n_transfers):
+            entries.append(dict(x, op='transfer'))
+
+        return entries
+
+    def _mark_saved(self):
+        """Remember the current state as the saved state of the journal."""
+        self._saved = {
+            'header': self._header(),
+            'exchange_rates': {k.name: v for k, v in self.exchange_rates.items()},
+            'rate_series': self._serialize_rate_series(),
+            'members': {name: str(x.stamp) for name, x in self._members.items()},
+            'rows': (len(self._purchases), len(self._transfers)),
+            'dirty': False
+        }
+
+    def _open_journal(self, path):
+        """Replay the journal of a snapshot file and attach it to the group.
+
+        Keyword arguments:
+        path -- snapshot file path
+        """
+        journal = Journal(path)
+        for entry in journal.read():
+            load_entry(self, entry)
+
+        self._journal = journal
+        self._mark_saved()
+
+    def _serialize(self):
+        """Convert the object to a JSON conform dictionary and return it.
+        The exchange rate series are only included if the group has any, the
+        record id counts only if a table ends with removed records."""
+        tmp = {
+            'name': self.name,
+            'description': self.description,
+            'currency': self.currency.name
+        }
+
+        # the series precede the records, so that a streaming reader books
+        # the records in their rate periods right away
+        rate_series = self._serialize_rate_series()
+        if rate_series:
+            tmp['exchange_rate_series'] = rate_series
+
+        tmp.update({
+            'members': [m.to_dict() for m in self._members.values()],
+            'purchases': list(self._purchases.to_dicts()),
+            'transfers': list(self._transfers.to_dicts())
+        })
+
+        # removed last records are not serialized, their ids stay reserved
+        record_ids = {k: len(table) for k, table in
+                      (('purchases', self._purchases), ('transfers', self._transfers))
+                      if len(table) - 1 in table._removed}
+        if record_ids:
+            tmp['record_ids'] = record_ids
+
+        tmp['exchange_rates'] = {
+            k.name: v for k, v in self.exchange_rates.items()}
+        return tmp
+
+    def _serialize_rate_series(self):
+        """Return a dictionary of currency name -> list of [date string, rate]."""
+        return {PurchaseTable.currencies[code].name: [[str(TimeStamp.from_ticks(date)), rate]
+                                                      for date, rate in series.items()]
+                for code, series in sorted(self._rate_series.items())}
+
+    def _book(self, table, row, sign=1):
+        """Book a table row in the member ledger.
+
+        Keyword arguments:
+        table -- a PurchaseTable object
+        row -- row index
+        sign -- 1 to book or -1 to cancel a booking (default 1)
+        """
+        with self._rows():
+            for index in (self._time_index, self._row_index):
+                if index is not None:
+                    if sign > 0:
+                        index.insert(table, row)
+                    else:
+                        index.remove(table, row)
+
+        self._book_values(table._purchasers[row], table.get_recipients(row),
+                          sign * table._amounts[row],
+                          ledger_key(self._rate_series, table._currencies[row], table._dates[row]))
+
+    def _book_rows(self, table, rows):
+        """Book a batch of new table rows in the member ledger.
+        The changes are summed per member and currency first and the row
+        indexes are rebuilt on the next query.
+
+        Keyword arguments:
+        table -- a PurchaseTable object
+        rows -- range of row indices
+        """
+        self._time_index = None
+        self._row_index = None
+
+        changes = {}
+        for row in rows:
+            currency = ledger_key(self._rate_series, table._currencies[row], table._dates[row])
+            amount = table._amounts[row]
+            x = (table._purchasers[row], currency)
+            changes[x] = changes.get(x, 0) + amount
+
+            recipients = table.get_recipients(row)
+            if recipients:
+                for member, share in zip(recipients, split(amount, len(recipients))):
+                    x = (member, currency)
+                    changes[x] = changes.get(x, 0) - share
+
+        for (member, currency), amount in changes.items():
+            entry = self._ledger[member]
+            entry[currency] = entry.get(currency, 0) + amount
+
+    def _book_values(self, purchaser, recipients, amount, currency):
+        """Book resolved purchase values in the member ledger.
+
+        Keyword arguments:
+        purchaser -- purchaser member index
+        recipients -- recipient member indices
+        amount -- signed purchase amount in minor units
+        currency -- ledger key, the currency index or (currency index, rate period start)
+        """
+        entry = self._ledger[purchaser]
+        entry[currency] = entry.get(currency, 0) + amount
+
+        if recipients:
+            for x, share in zip(recipients, split(amount, len(recipients))):
+                entry = self._ledger[x]
+                entry[currency] = entry.get(currency, 0) - share
+
+    def _convert(self, amount, key):
+        """Convert a ledger amount to minor units of the group currency.
+
+        Keyword arguments:
+        amount -- amount in minor units
+        key -- ledger key, the currency index or (currency index, rate period start)
+        """
+        if key.__class__ is int:
+            return self.exchange(amount, PurchaseTable.currencies[key])
+
+        code, start = key
+        if PurchaseTable.currencies[code] == self.currency:
+            return amount
+        return amount / self._rate_series[code].rate_of(start)
+
+    def _record(self, operation, seconds):
+        """Add a call and its wall time to the profiling statistics.
+
+        Keyword arguments:
+        operation -- operation name
+        seconds -- wall time of the call
+        """
+        entry = self._stats.get(operation)
+        if entry is None:
+            entry = self._stats[operation] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def _rebook_rates(self, code, change):
+        """Change the rate series of a currency and move the ledger bookings of
+        the rows whose rate period changes.
+
+        Keyword arguments:
+        code -- currency index
+        change -- callable that changes the rate series
+        """
+        with self._writing():
+            if self._row_index is None:
+                self._row_index = RowIndex(self)
+
+            tables = self._tables()
+            rows = [(tables[key & 1], key >> 1) for key in self._row_index.currencies.get(code, ())]
+            keys = [ledger_key(self._rate_series, code, table._dates[row]) for table, row in rows]
+            change()
+
+            moved = set()
+            for (table, row), old in zip(rows, keys):
+                new = ledger_key(self._rate_series, code, table._dates[row])
+                if new != old:
+                    purchaser, recipients = table._purchasers[row], table.get_recipients(row)
+                    self._book_values(purchaser, recipients, -table._amounts[row], old)
+                    self._book_values(purchaser, recipients, table._amounts[row], new)
+                    moved.add(old)
+
+            # the emptied keys may name a removed rate period
+            for entry in self._ledger:
+                for key in moved.intersection(entry):
+                    if not entry[key]:
+                        del entry[key]
+
+            # the checkpoints of the time index hold the old ledger keys
+            self._time_index = None
+
+    def _reading(self, func):
+        """Return func() computed on a consistent state of the ledger and the rows."""
+        return func() if self._lock is None else self._lock.read(func)
+
+    def _rows(self):
+        """Return the context guarding the shared row columns and row indexes."""
+        return nullcontext() if self._lock is None else self._lock.rows
+
+    def _writing(self, members=None):
+        """Return the context of a mutation of the ledger entries of members.
+
+        Keyword arguments:
+        members -- iterable of member indices (default None for all members)
+        """
+        return nullcontext() if self._lock is None else self._lock.write(members)
+
+    def _tables(self):
+        """Return the purchase and transfer tables."""
+        return (self._purchases, self._transfers)
+
+    def _touch(self, table, row):
+        """Mark the journal dirty if a saved table row is changed.
+
+        Keyword arguments:
+        table -- a PurchaseTable object
+        row -- row index
+        """
+        if self._saved is not None:
+            n_saved = self._saved['rows'][0 if table is self._purchases else 1]
+            if row < n_saved:
+                self._saved['dirty'] = True
+
     def add_member(self, name):
         """Add a member to the group.
 
@@ -118,14 +443,18 @@ class Group(Base):
         if not name or name.isspace():
             raise(InvalidMemberNameError('Empty member name provided!'))
 
-        if name in self._members:
-            raise(DuplicateMemberError(name, self._members.keys()))
+        with self._writing():
+            if name in self._members:
+                raise(DuplicateMemberError(name, self._members.keys()))
 
-        tmp = Member(name)
-        self._members[name] = tmp
+            tmp = Member(self, name)
+            self._members[name] = tmp
+            self._member_ids[name] = len(self._member_names)
+            self._member_names.append(name)
+            self._ledger.append({})
         return tmp
 
-    def add_purchase(self, title, purchaser, recipients, amount, currency, date):
+    def add_purchase(self, title, purchaser, recipients, amount, currency, date, stamp=None):
         """Add a purchase to the group.
 
         Keyword arguments:
@@ -134,14 +463,25 @@ class Group(Base):
         recipients -- list of recipient names
         amount -- purchase amount
         currency -- purchase currency
-        date -- a TimeStamp object
+        date -- a TimeStamp object or a datetime string
+        stamp -- a TimeStamp object or a datetime string (default now())
         """
-        tmp = Purchase(self, title, purchaser,
-                       recipients, amount, currency, date)
-        self._purchases.append(tmp)
-        return tmp
+        row = self._purchases.append(title, purchaser,
+                                     recipients, amount, currency, date, stamp=stamp)
+        return self._purchases[row]
+
+    def add_purchases_bulk(self, records):
+        """Add purchases from an iterable of records in one batch and return their record ids.
+        All invalid records are reported in one InvalidRecordError and no purchase is added.
 
-    def add_transfer(self, title, purchaser, recipient, amount, currency, date):
+        Keyword arguments:
+        records -- iterable of dictionaries with the keys title, purchaser,
+            recipients, amount, currency (enum object or name), date and an
+            optional stamp (default now())
+        """
+        return self._purchases.append_records(records)
+
+    def add_transfer(self, title, purchaser, recipient, amount, currency, date, stamp=None):
         """Add a transfer to the group.
 
         Keyword arguments:
@@ -150,55 +490,139 @@ class Group(Base):
         recipients -- recipient name or list of recipient names
         amount -- transfer amount
         currency -- transfer currency
-        date -- a TimeStamp object
+        date -- a TimeStamp object or a datetime string
+        stamp -- a TimeStamp object or a datetime string (default now())
         """
-        tmp = Transfer(self, title, purchaser,
-                       recipient, amount, currency, date)
-        self._transfers.append(tmp)
-        return tmp
+        row = self._transfers.append(title, purchaser, at_least_1d(recipient),
+                                     amount, currency, date, stamp=stamp)
+        return self._transfers[row]
+
+    def add_transfers_bulk(self, records):
+        """Add transfers from an iterable of records in one batch and return their record ids.
+        All invalid records are reported in one InvalidRecordError and no transfer is added.
+
+        Keyword arguments:
+        records -- iterable of dictionaries with the keys title, purchaser,
+            recipient (or recipients), amount, currency (enum object or name),
+            date and an optional stamp (default now())
+        """
+        return self._transfers.append_records(
+            dict(x, recipients=at_least_1d(x['recipient'])) if 'recipient' in x else x
+            for x in records)
+
+    def balances(self, top_k=None, mode='greedy', time_budget=1.0, as_of=None):
+        """Generate the balance transfers and return a list of them.
+
+        Keyword arguments:
+        top_k -- number of largest balance transfers to return (default None for all)
+        mode -- 'greedy' or 'minimal' for the fewest number of transfers (default 'greedy')
+        time_budget -- maximum solver time in seconds for the minimal mode (default 1.0)
+        as_of -- only include rows dated up to this TimeStamp or datetime string (default None)
+        """
+        if mode == 'greedy':
+            transfers = settle(self.member_balances(as_of=as_of), top_k=top_k, digits=DIGITS)
+        elif mode == 'minimal':
+            transfers = settle_minimal(self.member_balances(as_of=as_of), top_k=top_k,
+                                       time_budget=time_budget, digits=DIGITS)
+        else:
+            raise(ValueError('Unknown balance mode {:} (greedy, minimal)!'.format(mode)))
+
+        date = TimeStamp() if as_of is None else TimeStamp.from_ticks(TimeStamp.to_ticks(as_of))
+        return [Balance(self, sender, receiver, amount, self.currency, date)
+                for sender, receiver, amount in transfers]
+
+    def check_ledger(self, tolerance=1e-6):
+        """Compare the ledger balances against a full recomputation.
+        Raise an InconsistentLedgerError listing the deviating members.
+
+        Keyword arguments:
+        tolerance -- absolute tolerance in groups currency (default 1e-6)
+        """
+        expected, balances = self._reading(
+            lambda: (self.compute_member_balances(), self.member_balances()))
+        deviations = {}
+        for name, actual in balances.items():
+            if abs(expected[name] - actual) > tolerance:
+                deviations[name] = (actual, expected[name])
+
+        if deviations:
+            raise(InconsistentLedgerError(deviations))
 
-    def balances(self):
-        """Generate the balance transfers and return a list of them."""
-        balances = []
+    def compact(self, indent=4):
+        """Fold the journal into a new snapshot of the file the group was loaded from or saved to.
 
-        ranked = sorted(self._members.values(), key=(lambda x: x.balance))
-        balance_add = {x.name: 0 for x in ranked}
+        Keyword arguments:
+        indent -- JSON indentation (default 4)
+        """
+        if self._journal is None:
+            raise(ValueError('The group has no journal to compact!'))
 
-        for sender in ranked:
-            for receiver in reversed(ranked):
-                if sender == receiver:
-                    continue
+        self.save(self._journal.path, indent=indent)
 
-                sender_balance = sender.balance + balance_add[sender.name]
-                receiver_balance = receiver.balance + \
-                    balance_add[receiver.name]
+    def compute_member_balances(self):
+        """Recompute all member balances from the purchases and transfers.
+        Return a dictionary of member name -> balance in groups currency."""
+        balances = [0.0 for _ in self._member_names]
+        for table in (self._purchases, self._transfers):
+            for row in table.rows():
+                amount = table._amounts[row]
+                currency = PurchaseTable.currencies[table._currencies[row]]
+                date = table._dates[row]
+                balances[table._purchasers[row]] += self.exchange(amount, currency, date)
 
-                if receiver_balance > 0:
-                    balance = min(abs(sender_balance), receiver_balance)
-                    balance_add[sender.name] += balance
-                    balance_add[receiver.name] -= balance
+                recipients = table.get_recipients(row)
+                if recipients:
+                    for x, share in zip(recipients, split(amount, len(recipients))):
+                        balances[x] -= self.exchange(share, currency, date)
 
-                    balances.append(
-                        Balance(self, sender.name, receiver.name,
-                            balance, self.currency, TimeStamp())
-                    )
+        return {name: to_major(round(x)) for name, x in zip(self._member_names, balances)}
+
+    @property
+    def engine(self):
+        return self._engine_name
 
-        return balances
+    @engine.setter
+    def engine(self, x):
+        if x not in Group.engines:
+            raise(ValueError('Unknown engine {:} ({:})!'.format(
+                x, ', '.join(Group.engines))))
 
-    def exchange(self, amount, from_c):
+        engine = Group.engines[x]
+        self._engine = engine(self) if engine else None
+        self._engine_name = x
+
+    def exchange(self, amount, from_c, date=None):
         """Convert an amount in currency from_c to currency to_c.
 
         Keyword arguments:
         amount -- amount
         from_c -- from currency object
+        date -- TimeStamp, datetime string or microseconds of the rate to use (default None)
         """
         if from_c == self.currency:
             return amount
-        else:
-            if from_c not in self.exchange_rates:
-                raise(MissingExchangeRateError(from_c))
 
-            return amount / self.exchange_rates[from_c]
+        return amount / self.get_exchange_rate(from_c, date)
+
+    def get_exchange_rate(self, currency, date=None):
+        """Return the exchange rate of a currency valid at a date. Dates before
+        the first rate of a series and date None use the static exchange rate.
+
+        Keyword arguments:
+        currency -- currency object
+        date -- TimeStamp, datetime string or microseconds (default None)
+        """
+        if date is not None:
+            series = self._rate_series.get(PurchaseTable.currencies.index(currency))
+            if series is not None:
+                i = series.index(TimeStamp.to_ticks(date))
+                if i >= 0:
+                    return series.rates[i]
+
+        if currency not in self.exchange_rates:
+            raise(MissingExchangeRateError(currency))
+
+        return self.exchange_rates[currency]
 
     def get_member_by_name(self, name):
         """Find and return a member object by name.
@@ -211,26 +635,322 @@ class Group(Base):
         except KeyError:
             raise(InvalidMemberError(name, self._members.keys()))
 
+    def member_balance(self, name, as_of=None):
+        """Return the ledger balance of a member in groups currency.
+
+        Keyword arguments:
+        name -- member name
+        as_of -- only include rows dated up to this TimeStamp or datetime string (default None)
+        """
+        if as_of is not None:
+            self.get_member_by_name(name)
+            return self.member_balances(as_of=as_of)[name]
+
+        try:
+            member = self._member_ids[name]
+        except KeyError:
+            raise(InvalidMemberError(name, self._members.keys()))
+
+        return self._reading(lambda: self._ledger_balance(member))
+
+    def _ledger_balance(self, member):
+        """Return the ledger balance of a member index in groups currency."""
+        return to_major(round(sum(self._convert(v, c) for c, v in self._ledger[member].items())))
+
+    def member_balances(self, as_of=None):
+        """Return a dictionary of member name -> balance in groups currency.
+
+        Keyword arguments:
+        as_of -- only include rows dated up to this TimeStamp or datetime string (default None)
+        """
+        if as_of is not None:
+            # the time index is created and read under the lock of all members
+            with self._writing():
+                if self._time_index is None:
+                    self._time_index = TimeIndex(self)
+
+                balances = dict.fromkeys(self._members, 0.0)
+                for (member, c), v in self._time_index.ledger(as_of).items():
+                    balances[self._member_names[member]] += self._convert(v, c)
+                return {name: to_major(round(x)) for name, x in balances.items()}
+
+        if self._engine is not None:
+            # the engine wraps the columns without copy, which must not be resized meanwhile
+            with self._writing():
+                return self._engine.member_balances()
+
+        return self._reading(lambda: {name: self._ledger_balance(member)
+                                      for member, name in enumerate(self._member_names)})
+
     @property
     def number_of_members(self):
         """Return the number of members."""
         return len(self._members)
 
-    def save(self, path, indent=4):
-        with open(path, 'w') as fp:
-            json.dump(self.to_dict(), fp, indent=indent)
+    def query(self, purchaser=None, recipient=None, date_from=None, date_to=None,
+              currency=None, kind='purchase'):
+        """Return a lazy iterator of the purchases or transfers matching all given filters.
+        The rows are read from the smallest matching index (purchaser, recipient,
+        currency or date range) and checked against the other filters. The group
+        must not be changed while the iterator is consumed, a thread-safe group
+        returns an iterator of the matching rows at the time of the call.
+
+        Keyword arguments:
+        purchaser -- purchaser name (default None)
+        recipient -- recipient name (default None)
+        date_from -- first date as TimeStamp object or datetime string (default None)
+        date_to -- last date as TimeStamp object or datetime string, inclusive (default None)
+        currency -- currency enum object (default None)
+        kind -- 'purchase', 'transfer' or None for both (default 'purchase')
+        """
+        if kind not in ('purchase', 'transfer', None):
+            raise(ValueError('Unknown query kind {:} (purchase, transfer)!'.format(kind)))
+
+        kinds = {'purchase': (0,), 'transfer': (1,), None: (0, 1)}[kind]
+
+        if purchaser is not None:
+            purchaser = self._member_ids[self.get_member_by_name(purchaser).name]
+        if recipient is not None:
+            recipient = self._member_ids[self.get_member_by_name(recipient).name]
+        if currency is not None:
+            currency = PurchaseTable.currencies.index(currency)
+        date_from = None if date_from is None else TimeStamp.to_ticks(date_from)
+        date_to = None if date_to is None else TimeStamp.to_ticks(date_to)
+
+        def select():
+            if self._row_index is None:
+                self._row_index = RowIndex(self)
+            index = self._row_index
+
+            # candidate sources as (number of keys, iterable of keys)
+            sources = []
+            if purchaser is not None:
+                keys = index.purchasers.get(purchaser, {})
+                sources.append((len(keys), keys))
+            if recipient is not None:
+                keys = index.recipients.get(recipient, {})
+                sources.append((len(keys), keys))
+            if currency is not None:
+                keys = index.currencies.get(currency, {})
+                sources.append((len(keys), keys))
+            if date_from is not None or date_to is not None:
+                if self._time_index is None:
+                    self._time_index = TimeIndex(self)
+                dates, keys = self._time_index._dates, self._time_index._keys
+                lo = 0 if date_from is None else bisect_left(dates, date_from)
+                hi = len(dates) if date_to is None else bisect_right(dates, date_to)
+                sources.append((hi - lo, (keys[i] for i in range(lo, hi))))
+            if not sources:
+                sources.append((0, (2 * row + i for i in kinds
+                                    for row in self._tables()[i].rows())))
+
+            return self._query(min(sources, key=lambda x: x[0])[1], purchaser, recipient,
+                               date_from, date_to, currency, kinds)
+
+        if self._lock is None:
+            return select()
+
+        # a shared group is queried on a snapshot of the matching rows, the
+        # row indexes are created and read under the lock of all members
+        with self._writing():
+            return iter(list(select()))
+
+    def _query(self, keys, purchaser, recipient, date_from, date_to, currency, kinds):
+        """Yield the views of the row keys matching all given filters."""
+        tables = self._tables()
+        for key in keys:
+            if key & 1 not in kinds:
+                continue
+
+            table, row = tables[key & 1], key >> 1
+            if purchaser is not None and table._purchasers[row] != purchaser:
+                continue
+            if currency is not None and table._currencies[row] != currency:
+                continue
+            if date_from is not None and table._dates[row] < date_from:
+                continue
+            if date_to is not None and table._dates[row] > date_to:
+                continue
+            if recipient is not None and recipient not in table.get_recipients(row):
+                continue
+
+            yield table.view._from_row(table, row)
+
+    def remove_exchange_rate(self, currency, date=None):
+        """Remove the static exchange rate or a rate of the date-dependent series of a currency.
+
+        Keyword arguments:
+        currency -- currency object
+        date -- TimeStamp, datetime string or microseconds of the rate (default None)
+        """
+        if date is None:
+            if currency not in self.exchange_rates:
+                raise(MissingExchangeRateError(currency))
+            del self.exchange_rates[currency]
+            return
+
+        code = PurchaseTable.currencies.index(currency)
+        series = self._rate_series.get(code)
+        date = TimeStamp.to_ticks(date)
+        i = -1 if series is None else bisect_left(series.dates, date)
+        if i < 0 or i == len(series) or series.dates[i] != date:
+            raise(MissingExchangeRateError(currency))
+
+        def change():
+            del series.dates[i], series.rates[i]
+            if not len(series):
+                del self._rate_series[code]
+
+        self._rebook_rates(code, change)
+
+    def remove_purchase(self, record_id):
+        """Remove a purchase by its record id and cancel its balance booking.
+
+        Keyword arguments:
+        record_id -- purchase record id (see Purchase.record_id)
+        """
+        self._purchases.remove(record_id)
+
+    def remove_transfer(self, record_id):
+        """Remove a transfer by its record id and cancel its balance booking.
+
+        Keyword arguments:
+        record_id -- transfer record id (see Transfer.record_id)
+        """
+        self._transfers.remove(record_id)
+
+    def save(self, path, indent=4, journal=False):
+        """Save the group to a JSON file.
+        In journal mode only the changes since the group was loaded or saved are
+        appended to the journal of the file. A new snapshot is written instead
+        if the changes can not be journaled or the journal would exceed
+        journal_limit entries.
+
+        Keyword arguments:
+        path -- JSON file path
+        indent -- JSON indentation (default 4)
+        journal -- append the changes to the journal (default False)
+        """
+        # the group is serialized under the lock of all members
+        with self._writing():
+            if journal and self._journal is not None and \
+                    self._journal.path == path and os.path.exists(path):
+                entries = self._journal_entries()
+                if entries is not None and \
+                        len(self._journal) + len(entries) <= self.journal_limit:
+                    if entries:
+                        self._journal.append(entries)
+                    self._mark_saved()
+                    return
+
+            tmp_path = '{:}.tmp'.format(path)
+            with open(tmp_path, 'w') as fp:
+                json.dump(self.to_dict(), fp, indent=indent)
+            os.replace(tmp_path, path)
+
+            self._journal = Journal(path)
+            self._journal.reset()
+            self._mark_saved()
+
+    def save_binary(self, path):
+        """Save the group to a binary snapshot file that can be opened with MappedGroup.
+
+        Keyword arguments:
+        path -- binary file path
+        """
+        with self._writing():
+            write_binary(self, path)
+
+    def set_exchange_rate(self, currency, rate, date=None):
+        """Set the static exchange rate or add a rate to the date-dependent series of a currency.
+        A rate of the series is valid from its date until the date of the next rate,
+        rows dated before the first rate use the static exchange rate.
+
+        Keyword arguments:
+        currency -- currency object
+        rate -- amount of the currency per unit of the group currency
+        date -- TimeStamp, datetime string or microseconds the rate is valid from (default None)
+        """
+        rate = float(rate)
+        if date is None:
+            self.exchange_rates[currency] = rate
+            return
+
+        code = PurchaseTable.currencies.index(currency)
+        series = self._rate_series.get(code)
+        date = TimeStamp.to_ticks(date)
+        if series is not None:
+            i = bisect_left(series.dates, date)
+            if i < len(series) and series.dates[i] == date:
+                # the ledger keys of the rate period stay the same
+                series.rates[i] = rate
+                return
+
+        def change():
+            x = self._rate_series.setdefault(code, RateSeries())
+            i = bisect_left(x.dates, date)
+            x.dates.insert(i, date)
+            x.rates.insert(i, rate)
+
+        self._rebook_rates(code, change)
+
+    def stats(self):
+        """Return a dictionary of operation -> {'calls': n, 'seconds': t} recorded
+        for this group while profiling is enabled (see pysplit.enable_profiling).
+        The times of nested operations are included in the calling operation.
+        """
+        return {k: {'calls': v[0], 'seconds': v[1]} for k, v in sorted(self._stats.items())}
+
+    @property
+    def thread_safe(self):
+        """Return True if mutations are locked and reads are validated for shared use by threads."""
+        return self._lock is not None
+
+    @thread_safe.setter
+    def thread_safe(self, x):
+        self._lock = GroupLock() if x else None
 
     @ property
     def turnover(self):
-        return sum(x.amount for x in self._purchases)
+        return self._reading(lambda: to_major(round(sum(
+            self._convert(v, key) for key, v in self._purchases.totals(self._rate_series).items()))))
+
+    def update_purchase(self, record_id, **kwargs):
+        """Update the fields of a purchase by its record id and return the purchase.
+
+        Keyword arguments:
+        record_id -- purchase record id (see Purchase.record_id)
+        kwargs -- title, purchaser, recipients, amount, currency, date or stamp
+        """
+        self._purchases.update(record_id, **kwargs)
+        return self._purchases[record_id]
+
+    def update_transfer(self, record_id, **kwargs):
+        """Update the fields of a transfer by its record id and return the transfer.
+
+        Keyword arguments:
+        record_id -- transfer record id (see Transfer.record_id)
+        kwargs -- title, purchaser, recipient, amount, currency, date or stamp
+        """
+        if 'recipient' in kwargs:
+            kwargs['recipients'] = at_least_1d(kwargs.pop('recipient'))
+
+        self._transfers.update(record_id, **kwargs)
+        return self._transfers[record_id]
 
 
-def load_group(path):
+def load_group(path, lazy=False):
     """Load a group object from a specified JSON file and return dict object.
+    In lazy mode the purchase and transfer records are booked in one pass and
+    their columns are created on the first access of a row.
 
     Keyword arguments:
     path -- JSON file path
+    lazy -- keep the raw purchase and transfer records (default False)
     """
+    # the load is recorded in the loaded group while all groups are profiled
+    start = time.perf_counter() if Group._profiled else None
+
     with open(path, 'r') as fp:
         data = json.load(fp)
 
@@ -246,22 +966,115 @@ def load_group(path):
     for k, v in data['exchange_rates'].items():
         group.exchange_rates[Currency[k]] = v
 
+    for k, rates in data.get('exchange_rate_series', {}).items():
+        for date, v in rates:
+            group.set_exchange_rate(Currency[k], v, date)
+
     for member in data['members']:
-        tmp = group.add_member(member['name'])
-        tmp.set_time(member['stamp'])
-
-    for purchase in data['purchases']:
-        tmp = group.add_purchase(purchase['title'],
-            purchase['purchaser'], purchase['recipients'],
-            purchase['amount'], currency=Currency[purchase['currency']],
-            date=TimeStamp(purchase['date']))
-        tmp.set_time(purchase['stamp'])
-
-    for transfer in data['transfers']:
-        tmp = group.add_transfer(transfer['title'],
-            transfer['purchaser'], transfer['recipients'][0],
-            transfer['amount'], currency=Currency[transfer['currency']],
-            date=TimeStamp(transfer['date']))
-        tmp.set_time(transfer['stamp'])
+        load_member(group, member)
+
+    if lazy:
+        group._purchases.extend(data['purchases'], lazy=True)
+        group._transfers.extend(data['transfers'], lazy=True)
+    else:
+        for purchase in data['purchases']:
+            load_purchase(group, purchase)
 
+        for transfer in data['transfers']:
+            load_transfer(group, transfer)
+
+    load_record_ids(group, data.get('record_ids', {}))
+    group._open_journal(path)
+    if start is not None:
+        group._record('load_group', time.perf_counter() - start)
     return group
+
+
+def load_entry(group, data):
+    """Apply a journal entry to a group.
+
+    Keyword arguments:
+    group -- group object
+    data -- journal entry dictionary
+    """
+    PurchaseTable.check_record(data)
+    if data['op'] == 'group':
+        group.name = data['name']
+        group.description = data['description']
+        group.currency = Currency[data['currency']]
+        group.set_time(data['stamp'])
+    elif data['op'] == 'exchange_rate' and data.get('date') is not None:
+        if data['rate'] is None:
+            group.remove_exchange_rate(Currency[data['currency']], data['date'])
+        else:
+            group.set_exchange_rate(Currency[data['currency']], data['rate'], data['date'])
+    elif data['op'] == 'exchange_rate':
+        if data['rate'] is None:
+            group.exchange_rates.pop(Currency[data['currency']], None)
+        else:
+            group.exchange_rates[Currency[data['currency']]] = data['rate']
+    elif data['op'] == 'member':
+        load_member(group, data)
+    elif data['op'] == 'purchase':
+        load_purchase(group, data)
+    elif data['op'] == 'transfer':
+        load_transfer(group, data)
+    else:
+        raise(ValueError('Unknown journal entry {:}!'.format(data['op'])))
+
+
+def load_member(group, data):
+    """Add a member from its JSON conform dictionary to a group and return it.
+
+    Keyword arguments:
+    group -- group object
+    data -- member dictionary
+    """
+    PurchaseTable.check_record(data)
+    tmp = group.add_member(data['name'])
+    tmp.set_time(data['stamp'])
+    return tmp
+
+
+def load_purchase(group, data):
+    """Add a purchase from its JSON conform dictionary to a group and return it.
+
+    Keyword arguments:
+    group -- group object
+    data -- purchase dictionary
+    """
+    PurchaseTable.check_record(data)
+    if 'id' in data:
+        group._purchases.reserve(data['id'])
+    return group.add_purchase(data['title'],
+        data['purchaser'], data['recipients'],
+        data['amount'], currency=Currency[data['currency']],
+        date=data['date'], stamp=data['stamp'])
+
+
+def load_transfer(group, data):
+    """Add a transfer from its JSON conform dictionary to a group and return it.
+
+    Keyword arguments:
+    group -- group object
+    data -- transfer dictionary
+    """
+    PurchaseTable.check_record(data)
+    if 'id' in data:
+        group._transfers.reserve(data['id'])
+    return group.add_transfer(data['title'],
+        data['purchaser'], data['recipients'][0],
+        data['amount'], currency=Currency[data['currency']],
+        date=data['date'], stamp=data['stamp'])
+
+
+def load_record_ids(group, data):
+    """Reserve the ids of the removed last records of a group.
+
+    Keyword arguments:
+    group -- group object
+    data -- dictionary of table name -> next record id
+    """
+    for k, table in (('purchases', group._purchases), ('transfers', group._transfers)):
+        if k in data:
+            table.reserve(data[k])
@@ -0,0 +1,141 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import hashlib
+import json
+import os
+
+
+def file_signature(path):
+    """Return the modification times and sizes of a group file and its journal.
+    The signature changes with every save, so it identifies the saved state of a
+    group without reading the files.
+
+    Keyword arguments:
+    path -- group file path
+    """
+    signature = []
+    for x in (path, Journal(path).journal_path):
+        try:
+            tmp = os.stat(x)
+            signature += [tmp.st_mtime_ns, tmp.st_size]
+        except FileNotFoundError:
+            signature += [None, None]
+
+    return signature
+
+
+class Journal():
+    """Append-only journal of group mutations next to a group snapshot file.
+    The journal is stored in JSON lines format, its first line references the
+    snapshot by its SHA-1 digest so that a journal left behind by an older
+    snapshot is ignored.
+
+    Keyword arguments:
+    path -- snapshot file path
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = '{:}.journal'.format(path)
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def _digest(self):
+        """Return the SHA-1 digest of the snapshot file."""
+        digest = hashlib.sha1()
+        with open(self.path, 'rb') as fp:
+            for chunk in iter(lambda: fp.read(65536), b''):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def _repair(self):
+        """Truncate an incomplete last line of an interrupted append and return
+        the size of the journal in bytes."""
+        with open(self.journal_path, 'r+b') as fp:
+            size = end = fp.seek(0, os.SEEK_END)
+            while end > 0:
+                start = max(0, end - 65536)
+                fp.seek(start)
+                chunk = fp.read(end - start)
+                i = chunk.rfind(b'\n')
+                if i >= 0:
+                    end = start + i + 1
+                    break
+                end = start
+
+            if end < size:
+                fp.truncate(end)
+                fp.flush()
+                os.fsync(fp.fileno())
+
+        return end
+
+    def append(self, entries):
+        """Append a list of entries to the journal.
+        An incomplete last line of an interrupted append is removed first, so
+        that the entries start on a new line.
+
+        Keyword arguments:
+        entries -- list of JSON conform dictionaries
+        """
+        lines = []
+        if not os.path.exists(self.journal_path) or not self._repair():
+            lines.append(json.dumps({'snapshot': self._digest()}))
+        lines += [json.dumps(x) for x in entries]
+
+        with open(self.journal_path, 'a') as fp:
+            fp.write(''.join(x + '\n' for x in lines))
+            fp.flush()
+            os.fsync(fp.fileno())
+
+        self.length += len(entries)
+
+    def read(self):
+        """Return the list of journal entries that belong to the snapshot.
+        An incomplete last line of an interrupted or running append is ignored,
+        the journal file is not changed."""
+        self.length = 0
+        if not os.path.exists(self.journal_path):
+            return []
+
+        with open(self.journal_path, 'rb') as fp:
+            data = fp.read()
+
+        # every complete append ends with a newline
+        lines = data[:data.rfind(b'\n') + 1].decode().splitlines()
+        if not lines or json.loads(lines[0]).get('snapshot') != self._digest():
+            return []
+
+        entries = [json.loads(line) for line in lines[1:]]
+
+        self.length = len(entries)
+        return entries
+
+    def reset(self):
+        """Remove the journal after a new snapshot has been written."""
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+        self.length = 0
@@ -0,0 +1,123 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import threading
+import time
+from contextlib import contextmanager
+
+
+class GroupLock():
+    """Striped writer locks and optimistic snapshot reads of a group.
+    A writer locks the stripes of the members it books (member index % number
+    of stripes), so writers of disjoint members run concurrently. Structural
+    changes lock all stripes. The shared row columns and row indexes are
+    guarded by the short rows lock.
+    Readers take no lock. A read is repeated until no writer was active
+    during the read, which the writer count and the version counter detect.
+    An exception of a conflicting attempt is discarded as well, after
+    max_retries conflicting attempts the read locks all stripes.
+
+    Keyword arguments:
+    stripes -- number of member lock stripes (default 64)
+    max_retries -- optimistic attempts of a read (default 16)
+    """
+
+    def __init__(self, stripes=64, max_retries=16):
+        self.max_retries = max_retries
+        self.rows = threading.Lock()
+        self._stripes = [threading.Lock() for _ in range(stripes)]
+        self._counter = threading.Lock()
+        self._owner = None
+        self.version = 0
+        self.writers = 0
+
+    def _enter(self):
+        with self._counter:
+            self.writers += 1
+            self.version += 1
+
+    def _exit(self):
+        with self._counter:
+            self.writers -= 1
+            self.version += 1
+
+    def read(self, func):
+        """Return the result of func() computed on a consistent state.
+
+        Keyword arguments:
+        func -- callable reading the group
+        """
+        if self._owner == threading.get_ident():
+            return func()
+
+        for _ in range(self.max_retries):
+            version = self.version
+            if self.writers:
+                # let the active writers finish
+                time.sleep(0)
+                continue
+
+            try:
+                result = func()
+            except Exception:
+                # any error of a read that overlapped a writer, e.g. of a
+                # column, dictionary or rate series changed during the read
+                if self.version == version and not self.writers:
+                    raise
+                continue
+
+            if self.version == version and not self.writers:
+                return result
+
+        with self.write():
+            return func()
+
+    @contextmanager
+    def write(self, members=None):
+        """Lock the stripes of the members of a mutation.
+
+        Keyword arguments:
+        members -- iterable of member indices (default None for all stripes)
+        """
+        if self._owner == threading.get_ident():
+            yield
+            return
+
+        n = len(self._stripes)
+        if members is None:
+            locks = self._stripes
+        else:
+            locks = [self._stripes[i] for i in sorted({x % n for x in members})]
+
+        self._enter()
+        for x in locks:
+            x.acquire()
+        if members is None:
+            self._owner = threading.get_ident()
+
+        try:
+            yield
+        finally:
+            if members is None:
+                self._owner = None
+            for x in reversed(locks):
+                x.release()
+            self._exit()
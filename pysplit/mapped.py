@@ -0,0 +1,306 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import mmap
+import struct
+import sys
+from array import array
+from .exchange import RateSeries, ledger_key
+from .purchase_table import PurchaseTable
+from .settlement import settle, settle_minimal
+from .utils import DIGITS, MissingExchangeRateError, TimeStamp, split, to_major, to_minor
+
+# little-endian layout of the binary group snapshot
+MAGIC = b'PYSPLIT\x00'
+VERSION = 2
+HEADER = struct.Struct('<8sHbxQIQIqQQQQQQQQQQQQ')
+MEMBER = struct.Struct('<QIq')
+RECORD = struct.Struct('<QIqdbqqQI')
+RATE = struct.Struct('<bqd')
+RATE_V1 = struct.Struct('<bd')
+
+# date of the static exchange rates in the rate records
+STATIC_DATE = -2 ** 63
+
+
+def _uint32(buffer):
+    """Return an unsigned 32 bit integer sequence of a little-endian buffer."""
+    if sys.byteorder == 'little':
+        return buffer.cast('I')
+
+    tmp = array('I', bytes(buffer))
+    tmp.byteswap()
+    return tmp
+
+
+def write_binary(group, path):
+    """Write a binary snapshot of a group.
+    The file consists of a header, fixed-width records of the members, purchases,
+    transfers and exchange rates, the recipient member indices of the records
+    and a string table. Static exchange rates are stored with the date STATIC_DATE.
+    Amounts are stored in major units and restored exactly to minor units on read.
+
+    Keyword arguments:
+    group -- group object
+    path -- binary file path
+    """
+    strings = bytearray()
+    refs = {}
+
+    def ref(x):
+        if x not in refs:
+            tmp = x.encode('utf-8')
+            refs[x] = (len(strings), len(tmp))
+            strings.extend(tmp)
+        return refs[x]
+
+    members = b''.join(MEMBER.pack(*ref(name), group._members[name].stamp.ticks)
+                       for name in group._member_names)
+
+    recipients = array('I')
+    sections = []
+    for table in (group._purchases, group._transfers):
+        base = len(recipients)
+        sections.append(b''.join(RECORD.pack(
+            *ref(table._titles[i]), table._purchasers[i], to_major(table._amounts[i]),
+            table._currencies[i], table._dates[i], table._stamps[i],
+            base + table._starts[i], table._counts[i])
+            for i in range(len(table))))
+        recipients.fromlist(table._recipients.tolist())
+    if sys.byteorder != 'little':
+        recipients.byteswap()
+
+    rates = [RATE.pack(PurchaseTable.currencies.index(k), STATIC_DATE, v)
+             for k, v in group.exchange_rates.items()]
+    rates.extend(RATE.pack(code, date, v) for code, series in sorted(group._rate_series.items())
+                 for date, v in series.items())
+    n_rates = len(rates)
+    rates = b''.join(rates)
+
+    name = ref(group.name)
+    description = ref(group.description)
+
+    offsets = [HEADER.size]
+    for x in (members, sections[0], sections[1], recipients.tobytes(), rates):
+        offsets.append(offsets[-1] + len(x))
+
+    header = HEADER.pack(
+        MAGIC, VERSION, PurchaseTable.currencies.index(group.currency),
+        *name, *description, group.stamp.ticks,
+        len(group._member_names), len(group._purchases), len(group._transfers),
+        len(recipients), n_rates,
+        *offsets, len(strings))
+
+    with open(path, 'wb') as fp:
+        for x in (header, members, sections[0], sections[1], recipients, rates, strings):
+            fp.write(x)
+
+
+class MappedGroup():
+    """Read-only group of a memory-mapped binary snapshot.
+    Turnover and balances are computed directly from the mapped records
+    without creating member or purchase objects.
+
+    Keyword arguments:
+    path -- binary file path written by Group.save_binary
+    """
+
+    def __init__(self, path):
+        self._fp = open(path, 'rb')
+        self._mmap = mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+
+        (magic, version, currency, name_off, name_len, description_off, description_len,
+         self._stamp, self._n_members, self._n_purchases, self._n_transfers,
+         self._n_recipients, n_rates, self._members_off, self._purchases_off,
+         self._transfers_off, self._recipients_off, rates_off, self._strings_off,
+         self._strings_len) = HEADER.unpack_from(self._buffer)
+
+        if magic != MAGIC or version not in (1, VERSION):
+            self.close()
+            raise(ValueError('Unsupported binary group file {:}!'.format(path)))
+
+        self.name = self._string(name_off, name_len)
+        self.description = self._string(description_off, description_len)
+        self.currency = PurchaseTable.currencies[currency]
+
+        # version 1 files hold static exchange rates only
+        self.exchange_rates = {}
+        self._rate_series = {}
+        if version == 1:
+            rates = ((k, STATIC_DATE, v) for k, v in RATE_V1.iter_unpack(
+                self._buffer[rates_off:rates_off + n_rates * RATE_V1.size]))
+        else:
+            rates = RATE.iter_unpack(self._buffer[rates_off:rates_off + n_rates * RATE.size])
+        for k, date, v in rates:
+            if date == STATIC_DATE:
+                self.exchange_rates[PurchaseTable.currencies[k]] = v
+            else:
+                series = self._rate_series.setdefault(k, RateSeries())
+                series.dates.append(date)
+                series.rates.append(v)
+
+        self._member_names = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __str__(self):
+        tmp = '{:}'.format(self.name)
+        if self.description:
+            tmp += '({:})'.format(self.description)
+        return tmp
+
+    def _convert(self, amount, key):
+        """Convert a ledger amount to minor units of the group currency.
+
+        Keyword arguments:
+        amount -- amount in minor units
+        key -- ledger key, the currency index or (currency index, rate period start)
+        """
+        if key.__class__ is int:
+            return self.exchange(amount, PurchaseTable.currencies[key])
+
+        code, start = key
+        if PurchaseTable.currencies[code] == self.currency:
+            return amount
+        return amount / self._rate_series[code].rate_of(start)
+
+    def _ledger(self):
+        """Return the member ledger of all records (member index -> {ledger key: net minor units})."""
+        ledger = [{} for _ in range(self._n_members)]
+        recipients = _uint32(self._buffer[
+            self._recipients_off:self._recipients_off + 4 * self._n_recipients])
+
+        for offset, n_records in ((self._purchases_off, self._n_purchases),
+                                  (self._transfers_off, self._n_transfers)):
+            for _, _, payer, amount, currency, date, _, start, count in RECORD.iter_unpack(
+                    self._buffer[offset:offset + n_records * RECORD.size]):
+                if self._rate_series:
+                    currency = ledger_key(self._rate_series, currency, date)
+
+                amount = to_minor(amount)
+                entry = ledger[payer]
+                entry[currency] = entry.get(currency, 0) + amount
+
+                if count:
+                    for x, share in zip(recipients[start:start + count], split(amount, count)):
+                        entry = ledger[x]
+                        entry[currency] = entry.get(currency, 0) - share
+
+        if isinstance(recipients, memoryview):
+            recipients.release()
+
+        return ledger
+
+    def _string(self, offset, length):
+        """Decode and return a string of the string table."""
+        offset += self._strings_off
+        return str(self._buffer[offset:offset + length], 'utf-8')
+
+    def balances(self, top_k=None, mode='greedy', time_budget=1.0):
+        """Generate the balance transfers and return a list of (sender, receiver, amount) tuples.
+
+        Keyword arguments:
+        top_k -- number of largest balance transfers to return (default None for all)
+        mode -- 'greedy' or 'minimal' for the fewest number of transfers (default 'greedy')
+        time_budget -- maximum solver time in seconds for the minimal mode (default 1.0)
+        """
+        if mode == 'greedy':
+            return settle(self.member_balances(), top_k=top_k, digits=DIGITS)
+        elif mode == 'minimal':
+            return settle_minimal(self.member_balances(), top_k=top_k,
+                                  time_budget=time_budget, digits=DIGITS)
+        else:
+            raise(ValueError('Unknown balance mode {:} (greedy, minimal)!'.format(mode)))
+
+    def close(self):
+        """Release the mapped buffer and close the file."""
+        self._buffer.release()
+        self._mmap.close()
+        self._fp.close()
+
+    def exchange(self, amount, from_c, date=None):
+        """Convert an amount in currency from_c to the group currency.
+
+        Keyword arguments:
+        amount -- amount
+        from_c -- from currency object
+        date -- TimeStamp, datetime string or microseconds of the rate to use (default None)
+        """
+        if from_c == self.currency:
+            return amount
+
+        if date is not None:
+            series = self._rate_series.get(PurchaseTable.currencies.index(from_c))
+            if series is not None:
+                i = series.index(TimeStamp.to_ticks(date))
+                if i >= 0:
+                    return amount / series.rates[i]
+
+        if from_c not in self.exchange_rates:
+            raise(MissingExchangeRateError(from_c))
+
+        return amount / self.exchange_rates[from_c]
+
+    def member_balance(self, name):
+        """Return the balance of a member in groups currency.
+
+        Keyword arguments:
+        name -- member name
+        """
+        return self.member_balances()[name]
+
+    def member_balances(self):
+        """Return a dictionary of member name -> balance in groups currency."""
+        return {name: to_major(round(sum(self._convert(v, c) for c, v in entry.items())))
+                for name, entry in zip(self.members, self._ledger())}
+
+    @property
+    def members(self):
+        """Return the list of member names."""
+        if self._member_names is None:
+            self._member_names = [
+                self._string(offset, length) for offset, length, _ in MEMBER.iter_unpack(
+                    self._buffer[self._members_off:self._members_off +
+                                 self._n_members * MEMBER.size])]
+
+        return self._member_names
+
+    @property
+    def number_of_members(self):
+        """Return the number of members."""
+        return self._n_members
+
+    @property
+    def turnover(self):
+        totals = {}
+        for _, _, _, amount, currency, date, _, _, _ in RECORD.iter_unpack(
+                self._buffer[self._purchases_off:self._purchases_off +
+                             self._n_purchases * RECORD.size]):
+            if self._rate_series:
+                currency = ledger_key(self._rate_series, currency, date)
+            totals[currency] = totals.get(currency, 0) + to_minor(amount)
+
+        return to_major(round(sum(self._convert(v, c) for c, v in totals.items())))
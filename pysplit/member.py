@@ -24,18 +24,19 @@ from .utils import Base
 
 class Member(Base):
     """Member class derived from pysplit base class."""
+    __slots__ = ('group', 'name')
 
-    def __init__(self, name):
+    def __init__(self, group, name):
         """Member class initialization.
 
         Keyword arguments:
+        group -- group object
         name -- member name
         """
         super().__init__()
+        self.group = group
         self.name = name
 
-        self._participations = []
-
     def __str__(self):
         return self.name
 
@@ -45,31 +46,15 @@ class Member(Base):
             'name': self.name
         }
 
-    def add_participation(self, participation):
-        """Add a participation reference to the member.
-
-        Keyword arguments:
-        participation -- a participation object reference
-        """
-        self._participations.append(participation)
-
     @property
     def balance(self):
-        """Calculate the member balance and return the value in groups currency."""
-        balance = 0.0
-        for participation in self._participations:
-            if participation.is_purchaser(self.name):
-                balance += participation.amount
-
-            if participation.is_recipient(self.name):
-                balance -= participation.get_amount_per_member()
-
-        return balance
+        """Return the member balance in groups currency from the group ledger."""
+        return self.group.member_balance(self.name)
 
-    def remove_participation(self, participation):
-        """Remove a participation reference from the member.
+    def balance_at(self, date):
+        """Return the member balance in groups currency of all rows dated up to date.
 
         Keyword arguments:
-        transfer -- a participation object reference
+        date -- a TimeStamp object or a datetime string
         """
-        self._participations.remove(participation)
+        return self.group.member_balance(self.name, as_of=date)
@@ -0,0 +1,132 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import functools
+import time
+import weakref
+from .group import Group
+from .member import Member
+from .purchase import Purchase
+
+# instrumented operations: (owner, attribute, operation name, group of the first argument)
+# methods and properties are replaced on their class only while a group is
+# profiled, so the disabled state has no overhead
+targets = [
+    (Group, 'add_member', 'add_member', None),
+    (Group, 'add_purchase', 'add_purchase', None),
+    (Group, 'add_transfer', 'add_transfer', None),
+    (Group, 'balances', 'balances', None),
+    (Group, 'compute_member_balances', 'compute_member_balances', None),
+    (Group, 'exchange', 'exchange', None),
+    (Group, 'get_member_by_name', 'member_lookup', None),
+    (Group, 'member_balance', 'member_balance', None),
+    (Group, 'member_balances', 'member_balances', None),
+    (Group, 'save', 'save', None),
+    (Group, '_serialize', 'serialize', None),
+    (Group, 'turnover', 'turnover', None),
+    (Member, 'balance', 'Member.balance', lambda x: x.group),
+    (Purchase, 'amount', 'Purchase.amount', lambda x: x._table.group),
+]
+
+_originals = []
+
+# groups profiled on their own
+_groups = weakref.WeakSet()
+
+
+def _timed(func, operation, group_of):
+    """Return a wrapper of a method that records its calls in profiled groups."""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        group = self if group_of is None else group_of(self)
+        if not group._profiled:
+            return func(self, *args, **kwargs)
+
+        start = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            group._record(operation, time.perf_counter() - start)
+
+    return wrapper
+
+
+def enable_profiling(group=None):
+    """Instrument the group operations to record call counts and cumulative wall
+    times. The statistics are collected per group and returned by Group.stats().
+    The times of nested operations are included in the calling operation.
+    Without a group all groups are profiled, including their load_group and
+    stream_group calls, otherwise only the operations of the given group.
+
+    Keyword arguments:
+    group -- group object to profile (default None for all groups)
+    """
+    if group is None:
+        Group._profiled = True
+    else:
+        group._profiled = True
+        _groups.add(group)
+
+    if _originals:
+        return
+
+    for owner, attribute, operation, group_of in targets:
+        original = owner.__dict__[attribute]
+        if isinstance(original, property):
+            wrapped = property(_timed(original.fget, operation, group_of),
+                               original.fset, original.fdel, original.__doc__)
+        else:
+            wrapped = _timed(original, operation, group_of)
+
+        _originals.append((owner, attribute, original))
+        setattr(owner, attribute, wrapped)
+
+
+def disable_profiling(group=None):
+    """Stop profiling and restore the uninstrumented group operations once no
+    group is profiled. Collected statistics are kept.
+
+    Keyword arguments:
+    group -- group object profiled on its own (default None for all groups)
+    """
+    groups = list(_groups) if group is None else [group]
+    if group is None:
+        Group._profiled = False
+
+    for x in groups:
+        x.__dict__.pop('_profiled', None)
+        _groups.discard(x)
+
+    if Group._profiled or _groups:
+        return
+
+    while _originals:
+        owner, attribute, original = _originals.pop()
+        setattr(owner, attribute, original)
+
+
+def profiling_enabled(group=None):
+    """Return True if all groups or the given group are profiled.
+
+    Keyword arguments:
+    group -- group object (default None for all groups)
+    """
+    return bool(_originals) and (Group._profiled if group is None else group._profiled)
@@ -19,15 +19,18 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
-from .utils import at_least_1d, Base
+from .utils import at_least_1d, Base, Currency, TimeStamp, split, to_major
+from .purchase_table import PurchaseTable
 
 
 class Purchase(Base):
     """Purchase class derived from base class.
-    This derived class links in member purchases."""
+    This derived class is a view of a row in a purchase table."""
+    __slots__ = ('_table', '_row')
 
     def __init__(self, group, title, purchaser, recipients, amount, currency, date):
         """Purchase class initialization.
+        The purchase is stored in a detached table that is not booked in the group.
 
         Keyword arguments:
         group -- group object
@@ -38,31 +41,33 @@ class Purchase(Base):
         currency -- purchase currency
         date -- a TimeStamp object
         """
-        super().__init__()
-        self.group = group
-        self.title = title
-        self.purchaser = purchaser
-        self.recipients = recipients
-        self.amount = amount
-        self.currency = currency
-        self.date = date
+        # the base class stamp is stored in the table row
+        self._table = PurchaseTable(group, type(self))
+        self._row = self._table.append(title, purchaser, recipients,
+                                       amount, currency, date)
 
-        self._link()
+    def __eq__(self, other):
+        return isinstance(other, Purchase) and \
+            self._table is other._table and self._row == other._row
 
-    def __del__(self):
-        self._unlink()
+    def __hash__(self):
+        return hash((id(self._table), self._row))
 
     def __str__(self):
-        return '{:} ({:}) {:}: {:.2f}{:} -> {:}'.format(
-            self.title, self.date, self.purchaser.name,
-            self._amount, self.currency, ', '.join(self.recipients.keys())
-        )
+        return self.describe(self._serialize())
 
-    def _link(self):
-        """Link the purchase object in the members objects."""
-        members = set(list(self.recipients.values()) + [self.purchaser])
-        for member in members:
-            member.add_participation(self)
+    @classmethod
+    def _from_row(cls, table, row):
+        """Create a view of a table row.
+
+        Keyword arguments:
+        table -- a PurchaseTable object
+        row -- row index
+        """
+        tmp = cls.__new__(cls)
+        tmp._table = table
+        tmp._row = row
+        return tmp
 
     def _serialize(self):
         """Convert the object to a JSON conform dictionary and return it."""
@@ -75,23 +80,61 @@ class Purchase(Base):
             'title': self.title
         }
 
-    def _unlink(self):
-        """Remove the purchase object from the members objects.."""
-        members = set(list(self.recipients.values()) + [self.purchaser])
-        for member in members:
-            member.remove_participation(self)
+    @property
+    def _amount(self):
+        return to_major(self._table._amounts[self._row])
 
     @property
     def amount(self):
-        return self.group.exchange(self._amount, self.currency)
+        return self.group.exchange(self._amount, self.currency, self._table._dates[self._row])
 
     @amount.setter
     def amount(self, x):
-        self._amount = float(x)
+        self._table.update(self._row, amount=x)
+
+    @property
+    def currency(self):
+        return PurchaseTable.currencies[self._table._currencies[self._row]]
+
+    @currency.setter
+    def currency(self, x):
+        self._table.update(self._row, currency=x)
+
+    @property
+    def date(self):
+        return TimeStamp.from_ticks(self._table._dates[self._row])
+
+    @date.setter
+    def date(self, x):
+        self._table.update(self._row, date=x)
+
+    @staticmethod
+    def describe(data):
+        """Return the summary line of a JSON conform purchase dictionary.
+
+        Keyword arguments:
+        data -- purchase dictionary
+        """
+        return '{:} ({:}) {:}: {:.2f}{:} -> {:}'.format(
+            data['title'], data['date'], data['purchaser'],
+            data['amount'], Currency[data['currency']], ', '.join(data['recipients'])
+        )
 
     def get_amount_per_member(self):
-        """Calculate the member amount in group currency and return it."""
-        return self.amount / self.number_of_recipients
+        """Return a dictionary of recipient name -> share in group currency.
+        The amount is split in minor units, the remainder is distributed one
+        unit each to the first recipients."""
+        if not self.number_of_recipients:
+            return {}
+
+        amount = self._table._amounts[self._row]
+        currency, date = self.currency, self._table._dates[self._row]
+        return {name: to_major(round(self.group.exchange(share, currency, date)))
+                for name, share in zip(self.recipients, split(amount, self.number_of_recipients))}
+
+    @property
+    def group(self):
+        return self._table.group
 
     def is_purchaser(self, name):
         return self.purchaser.name == name
@@ -102,20 +145,48 @@ class Purchase(Base):
     @property
     def number_of_recipients(self):
         """Return the number of recipients."""
-        return len(self.recipients.keys())
+        return self._table._counts[self._row]
+
+    @property
+    def record_id(self):
+        """Return the stable id of the record in its group, its row index.
+        Removed records keep their ids reserved, also across save and load."""
+        return self._row
 
     @property
     def purchaser(self):
-        return self._purchaser
+        group = self.group
+        return group._members[group._member_names[self._table._purchasers[self._row]]]
 
     @purchaser.setter
     def purchaser(self, x):
-        self._purchaser = self.group.get_member_by_name(x)
+        self._table.update(self._row, purchaser=x)
 
     @property
     def recipients(self):
-        return self._recipients
+        group = self.group
+        names = [group._member_names[x] for x in self._table.get_recipients(self._row)]
+        return {x: group._members[x] for x in names}
 
     @recipients.setter
     def recipients(self, x):
-        self._recipients = {xx: self.group.get_member_by_name(xx) for xx in x}
+        self._table.update(self._row, recipients=x)
+
+    def set_time(self, datetime_or_string):
+        self._table.update(self._row, stamp=datetime_or_string)
+
+    @property
+    def stamp(self):
+        return TimeStamp.from_ticks(self._table._stamps[self._row])
+
+    @stamp.setter
+    def stamp(self, x):
+        self._table.update(self._row, stamp=x)
+
+    @property
+    def title(self):
+        return self._table._titles[self._row]
+
+    @title.setter
+    def title(self, x):
+        self._table.update(self._row, title=x)
@@ -0,0 +1,528 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import itertools
+from array import array
+from .utils import Currency, InvalidRecordError, TimeStamp, to_major, to_minor
+from .exchange import ledger_key
+
+
+class PurchaseTable():
+    """Columnar store of purchase records.
+    Every record is a row of typed columns, amounts are integer minor units
+    and the recipients of a row are a slice (start and count) of one member
+    index array. Purchase objects are
+    created as lightweight views on access. Removed rows keep their index as
+    tombstones with a zero amount and no recipients. The row index is the
+    record id, the serialized records after removed rows carry their id, so
+    the ids are restored on load.
+    A lazy table keeps raw JSON records instead and creates its columns on
+    the first access.
+
+    Keyword arguments:
+    group -- group object
+    view -- view class of the rows (Purchase or a derived class)
+    linked -- book the rows in the group ledger (default False)
+    """
+
+    currencies = tuple(Currency)
+    columns = {'title': '_titles', 'purchaser': '_purchasers', 'amount': '_amounts',
+               'currency': '_currencies', 'date': '_dates', 'stamp': '_stamps'}
+
+    def __init__(self, group, view, linked=False):
+        self.group = group
+        self.view = view
+        self.linked = linked
+
+        self._raw = None
+        self._removed = set()
+        self._init_columns()
+
+    def __getattr__(self, name):
+        # the columns of a lazy table are created on first access
+        if name in PurchaseTable.columns.values() or name in ('_starts', '_counts', '_recipients'):
+            if self.__dict__.get('_raw') is not None:
+                # readers of a shared group must not see the columns being created
+                with self.group._writing():
+                    if self.__dict__.get('_raw') is not None:
+                        self._materialize()
+                return getattr(self, name)
+        raise(AttributeError(name))
+
+    def __getitem__(self, row):
+        self._check(row)
+        return self.view._from_row(self, row)
+
+    def __iter__(self):
+        view = self.view
+        for row in self.rows():
+            yield view._from_row(self, row)
+
+    def __len__(self):
+        if self._raw is not None:
+            return len(self._raw)
+        return len(self._titles)
+
+    def _init_columns(self):
+        """Create empty columns."""
+        self._titles = []
+        self._purchasers = array('q')
+        self._amounts = array('q')
+        self._currencies = array('b')
+        self._dates = array('q')
+        self._stamps = array('q')
+        self._starts = array('q')
+        self._counts = array('q')
+        self._recipients = array('q')
+
+    def _insert(self, title, purchaser, recipients, amount, currency, date, stamp):
+        """Append resolved values to the columns and return the row."""
+        row = len(self._titles)
+        self._purchasers.append(purchaser)
+        self._amounts.append(amount)
+        self._currencies.append(currency)
+        self._dates.append(date)
+        self._stamps.append(stamp)
+        self._starts.append(len(self._recipients))
+        self._counts.append(len(recipients))
+        self._recipients.extend(recipients)
+        self._titles.append(title)
+        return row
+
+    def _materialize(self):
+        """Convert the raw records of a lazy table into columns.
+        The records are already booked in the group ledger."""
+        raw, self._raw = self._raw, None
+        self._init_columns()
+        for x in raw:
+            if x is None:
+                # a removed row of the saved table
+                self._insert('', 0, (), 0, 0, 0, 0)
+                continue
+
+            purchaser, recipients = self._record_ids(x)
+            stamp = x.get('stamp')
+            self._insert(x['title'], purchaser, recipients, to_minor(x['amount']),
+                         PurchaseTable.currencies.index(Currency[x['currency']]),
+                         TimeStamp.to_ticks(x['date']),
+                         TimeStamp().ticks if stamp is None else TimeStamp.to_ticks(stamp))
+
+    @staticmethod
+    def check_record(record):
+        """Raise an InvalidRecordError if a JSON record is not a dictionary.
+
+        Keyword arguments:
+        record -- JSON record
+        """
+        if not isinstance(record, dict):
+            raise(InvalidRecordError('Record {!r} is not a dictionary!'.format(record)))
+
+    def _check(self, row):
+        """Raise an IndexError if a row does not exist or is removed."""
+        if row < 0 or row >= len(self):
+            raise(IndexError('Row {:} out of range!'.format(row)))
+        if row in self._removed:
+            raise(IndexError('Row {:} is removed!'.format(row)))
+
+    def _member_id(self, name):
+        """Return the member index of a name."""
+        try:
+            return self.group._member_ids[name]
+        except KeyError:
+            return self.group._member_ids[self.group.get_member_by_name(name).name]
+
+    def _record_ids(self, record):
+        """Return the purchaser index and the unique recipient indices of a raw record."""
+        if not record['recipients']:
+            raise(InvalidRecordError('Empty recipients provided!'))
+
+        return (self._member_id(record['purchaser']),
+                array('q', (self._member_id(x) for x in dict.fromkeys(record['recipients']))))
+
+    def _recipient_ids(self, recipients):
+        """Return the unique member indices of a non-empty list of recipient names."""
+        if not recipients:
+            raise(InvalidRecordError('Empty recipients provided!'))
+
+        return array('q', (self.group._member_ids[self.group.get_member_by_name(x).name]
+                           for x in dict.fromkeys(recipients)))
+
+    def append(self, title, purchaser, recipients, amount, currency, date, stamp=None):
+        """Append a purchase record and return its row.
+
+        Keyword arguments:
+        title -- purchase title
+        purchaser -- purchaser name
+        recipients -- list of recipient names
+        amount -- purchase amount
+        currency -- purchase currency
+        date -- a TimeStamp object or a datetime string
+        stamp -- a TimeStamp object or a datetime string (default now())
+        """
+        ids = self._member_id(purchaser), self._recipient_ids(recipients)
+
+        # an append locks only the stripes of its members
+        with self.group._writing(itertools.chain((ids[0],), ids[1])):
+            if self._raw is None:
+                with self.group._rows():
+                    row = self._insert(
+                        title, ids[0], ids[1],
+                        to_minor(amount), PurchaseTable.currencies.index(currency),
+                        TimeStamp.to_ticks(date),
+                        TimeStamp().ticks if stamp is None else TimeStamp.to_ticks(stamp))
+
+                if self.linked:
+                    self.group._book(self, row)
+
+                return row
+
+        # a lazy table is extended under the lock of all members
+        return self.extend([{
+            'purchaser': purchaser,
+            'recipients': list(recipients),
+            'amount': float(amount),
+            'currency': currency.name,
+            'date': TimeStamp.from_ticks(TimeStamp.to_ticks(date)),
+            'title': title,
+            'stamp': TimeStamp() if stamp is None else TimeStamp.from_ticks(TimeStamp.to_ticks(stamp))
+        }], lazy=True) - 1
+
+    def append_records(self, records):
+        """Validate and append purchase records in one batch and return the range of new rows.
+        The member names of all records are validated with a single set difference,
+        all invalid records are reported in one InvalidRecordError and nothing is
+        appended in that case. The rows are booked in one pass, a lazy table keeps
+        them as raw records.
+
+        Keyword arguments:
+        records -- iterable of dictionaries with the keys title, purchaser,
+            recipients, amount, currency (enum object or name), date and an
+            optional stamp (default now())
+        """
+        records = records if isinstance(records, list) else list(records)
+        ids = self.group._member_ids
+
+        names = set()
+        for x in records:
+            if isinstance(x, dict):
+                names.add(x.get('purchaser'))
+                names.update(x.get('recipients', ()))
+        unknown = names - ids.keys()
+
+        now = TimeStamp().ticks
+        errors = []
+        columns = ([], [], [], [], [], [], [], [])
+        for i, x in enumerate(records):
+            try:
+                if not isinstance(x, dict):
+                    raise(TypeError('record is not a dictionary'))
+
+                if unknown:
+                    missing = unknown.intersection(x['recipients'])
+                    missing.update(unknown.intersection((x['purchaser'],)))
+                    if missing:
+                        raise(ValueError('unknown members {:}'.format(', '.join(sorted(missing)))))
+
+                recipients = list(dict.fromkeys(x['recipients']))
+                if not recipients:
+                    raise(ValueError('empty recipients'))
+
+                currency = x['currency']
+                currency = Currency[currency] if isinstance(currency, str) else currency
+                stamp = x.get('stamp')
+                values = (x['title'], ids[x['purchaser']], to_minor(x['amount']),
+                          PurchaseTable.currencies.index(currency),
+                          TimeStamp.to_ticks(x['date']),
+                          now if stamp is None else TimeStamp.to_ticks(stamp),
+                          len(recipients))
+            except (KeyError, TypeError, ValueError) as e:
+                errors.append((i, '{:}: {:}'.format(type(e).__name__, e)))
+                continue
+
+            for column, value in zip(columns, values):
+                column.append(value)
+            columns[7].extend(ids[name] for name in recipients)
+
+        if errors:
+            raise(InvalidRecordError('{:} invalid records'.format(len(errors)), errors))
+
+        titles, purchasers, amounts, currencies, dates, stamps, counts, recipients = columns
+        if self._raw is not None:
+            # a lazy table appends to its raw records instead of creating the columns
+            names, offset, tail = self.group._member_names, 0, []
+            for i, n in enumerate(counts):
+                tail.append({
+                    'purchaser': names[purchasers[i]],
+                    'recipients': [names[x] for x in recipients[offset:offset + n]],
+                    'amount': to_major(amounts[i]),
+                    'currency': PurchaseTable.currencies[currencies[i]].name,
+                    'date': TimeStamp.from_ticks(dates[i]),
+                    'title': titles[i],
+                    'stamp': TimeStamp.from_ticks(stamps[i])
+                })
+                offset += n
+
+            with self.group._writing():
+                start = len(self)
+                return range(start, self.extend(tail, lazy=True))
+
+        with self.group._writing():
+            start = len(self._titles)
+            offset = len(self._recipients)
+            starts = []
+            for n in counts:
+                starts.append(offset)
+                offset += n
+
+            self._purchasers.extend(purchasers)
+            self._amounts.extend(amounts)
+            self._currencies.extend(currencies)
+            self._dates.extend(dates)
+            self._stamps.extend(stamps)
+            self._starts.extend(starts)
+            self._counts.extend(counts)
+            self._recipients.extend(recipients)
+            self._titles.extend(titles)
+
+            rows = range(start, len(self._titles))
+            if self.linked:
+                self.group._book_rows(self, rows)
+
+        return rows
+
+    def extend(self, records, lazy=False):
+        """Append JSON conform purchase records and return the new number of rows.
+        Lazy records are validated and booked in one pass, the columns are
+        created on the first access.
+
+        Keyword arguments:
+        records -- iterable of purchase dictionaries
+        lazy -- keep the raw records (default False)
+        """
+        if not lazy or (self._raw is None and len(self._titles)):
+            for x in records:
+                self.check_record(x)
+                if 'id' in x:
+                    self.reserve(x['id'])
+                self.append(x['title'], x['purchaser'], x['recipients'],
+                            x['amount'], Currency[x['currency']], x['date'],
+                            stamp=x.get('stamp'))
+            return len(self)
+
+        with self.group._writing():
+            if self.linked:
+                # the row indexes are rebuilt from the columns on the next query
+                self.group._time_index = None
+                self.group._row_index = None
+
+            if self._raw is None:
+                del (self._titles, self._purchasers, self._amounts, self._currencies,
+                     self._dates, self._stamps, self._starts, self._counts, self._recipients)
+                self._raw = []
+
+            currencies = {x.name: i for i, x in enumerate(PurchaseTable.currencies)}
+            series = self.group._rate_series if self.linked else {}
+            for x in records:
+                self.check_record(x)
+                if 'id' in x:
+                    self.reserve(x['id'])
+                purchaser, recipients = self._record_ids(x)
+                currency = currencies[x['currency']]
+                if currency in series:
+                    # only dates of currencies with a rate series are parsed here
+                    currency = ledger_key(series, currency, TimeStamp.to_ticks(x['date']))
+                if self.linked:
+                    self.group._book_values(purchaser, recipients, to_minor(x['amount']), currency)
+                self._raw.append(x)
+
+            return len(self._raw)
+
+    def get_recipients(self, row):
+        """Return the recipient member indices of a row."""
+        start = self._starts[row]
+        return self._recipients[start:start + self._counts[row]]
+
+    def remove(self, row):
+        """Remove a row and cancel its booking in the group ledger.
+        The row index stays reserved, so the indices of the other rows are stable.
+
+        Keyword arguments:
+        row -- row index
+        """
+        self._check(row)
+
+        with self.group._writing():
+            if self.linked:
+                self.group._touch(self, row)
+                self.group._book(self, row, sign=-1)
+
+            self._amounts[row] = 0
+            self._counts[row] = 0
+            self._removed.add(row)
+
+    def reserve(self, row):
+        """Append removed rows up to a row index, so that the next row gets this index.
+        The record ids of a saved table with removed records are restored this way.
+
+        Keyword arguments:
+        row -- index of the next row
+        """
+        n = len(self)
+        if row < n:
+            raise(InvalidRecordError('Record id {:} is already used!'.format(row), [(row, 'id')]))
+
+        for x in range(n, row):
+            if self._raw is not None:
+                self._raw.append(None)
+            else:
+                self._insert('', 0, (), 0, 0, 0, 0)
+            self._removed.add(x)
+
+    def rows(self, start=0):
+        """Return an iterable of the indices of all rows that are not removed.
+
+        Keyword arguments:
+        start -- first row (default 0)
+        """
+        if not self._removed:
+            return range(start, len(self))
+
+        return (x for x in range(start, len(self)) if x not in self._removed)
+
+    def to_dicts(self, start=0):
+        """Yield the JSON conform dictionaries of the rows.
+        The raw records of a lazy table are normalized without creating the columns.
+
+        Keyword arguments:
+        start -- first row (default 0)
+        """
+        # the first record after removed rows carries its id
+        expected = start
+        if self._raw is None:
+            view = self.view
+            for row in self.rows(start):
+                tmp = view._from_row(self, row).to_dict()
+                if row != expected:
+                    tmp['id'] = row
+                expected = row + 1
+                yield tmp
+            return
+
+        for row, x in enumerate(itertools.islice(self._raw, start, None), start=start):
+            if x is None:
+                continue
+
+            stamp = x.get('stamp')
+            tmp = {
+                'purchaser': x['purchaser'],
+                'recipients': list(dict.fromkeys(x['recipients'])),
+                'amount': to_major(to_minor(x['amount'])),
+                'currency': x['currency'],
+                'date': TimeStamp.normalize(x['date']),
+                'title': x['title'],
+                'stamp': str(TimeStamp()) if stamp is None else TimeStamp.normalize(stamp)
+            }
+            if row != expected:
+                tmp['id'] = row
+            expected = row + 1
+            yield tmp
+
+    def totals(self, series=None):
+        """Return a dictionary of ledger key -> sum of the amounts in minor units.
+        The ledger key is the currency index or, for currencies with a rate
+        series, the tuple of the currency index and the start of the rate period.
+
+        Keyword arguments:
+        series -- dictionary of currency index -> RateSeries (default None)
+        """
+        series = series or {}
+        totals = {}
+        if self._raw is not None:
+            currencies = {x.name: i for i, x in enumerate(PurchaseTable.currencies)}
+            for x in self._raw:
+                if x is None:
+                    continue
+                key = currencies[x['currency']]
+                if key in series:
+                    key = ledger_key(series, key, TimeStamp.to_ticks(x['date']))
+                totals[key] = totals.get(key, 0) + to_minor(x['amount'])
+            return totals
+
+        if not series:
+            for code, amount in zip(self._currencies, self._amounts):
+                totals[code] = totals.get(code, 0) + amount
+            return totals
+
+        for code, date, amount in zip(self._currencies, self._dates, self._amounts):
+            key = ledger_key(series, code, date)
+            totals[key] = totals.get(key, 0) + amount
+
+        return totals
+
+    def update(self, row, **kwargs):
+        """Update the fields of a row and rebook it in the group ledger.
+        More recipients than before are appended to the end of the recipient array.
+
+        Keyword arguments:
+        row -- row index
+        kwargs -- title, purchaser, recipients, amount, currency, date or stamp
+        """
+        self._check(row)
+
+        values = {}
+        for key, x in kwargs.items():
+            if key == 'purchaser':
+                x = self.group._member_ids[self.group.get_member_by_name(x).name]
+            elif key == 'recipients':
+                x = self._recipient_ids(x)
+            elif key == 'amount':
+                x = to_minor(x)
+            elif key == 'currency':
+                x = PurchaseTable.currencies.index(x)
+            elif key in ('date', 'stamp'):
+                x = TimeStamp.to_ticks(x)
+            elif key != 'title':
+                raise(KeyError('Unknown purchase field {:}!'.format(key)))
+            values[key] = x
+
+        with self.group._writing():
+            if self.linked:
+                self.group._touch(self, row)
+
+            # a date change moves the row in the date index of the group
+            rebook = self.linked and not values.keys() <= {'title', 'stamp'}
+            if rebook:
+                self.group._book(self, row, sign=-1)
+
+            for key, x in values.items():
+                if key == 'recipients':
+                    if len(x) <= self._counts[row]:
+                        start = self._starts[row]
+                        self._recipients[start:start + len(x)] = x
+                    else:
+                        self._starts[row] = len(self._recipients)
+                        self._recipients.extend(x)
+                    self._counts[row] = len(x)
+                else:
+                    getattr(self, PurchaseTable.columns[key])[row] = x
+
+            if rebook:
+                self.group._book(self, row)
@@ -0,0 +1,68 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+class RowIndex():
+    """Secondary indexes of the purchase and transfer rows of a group.
+    The rows are indexed by purchaser, recipient and currency. Every index
+    maps a value to an ordered dictionary of row keys (row * 2 + table index),
+    so rows are added and removed in O(1) and iterated in insertion order.
+
+    Keyword arguments:
+    group -- group object
+    """
+
+    def __init__(self, group):
+        self._tables = (group._purchases, group._transfers)
+        self.purchasers = {}
+        self.recipients = {}
+        self.currencies = {}
+
+        for table in self._tables:
+            for row in table.rows():
+                self.insert(table, row)
+
+    def insert(self, table, row):
+        """Add a booked table row to the indexes.
+
+        Keyword arguments:
+        table -- a PurchaseTable object of the group
+        row -- row index
+        """
+        key = 2 * row + self._tables.index(table)
+        self.purchasers.setdefault(table._purchasers[row], {})[key] = None
+        self.currencies.setdefault(table._currencies[row], {})[key] = None
+        for member in table.get_recipients(row):
+            self.recipients.setdefault(member, {})[key] = None
+
+    def remove(self, table, row):
+        """Remove a table row from the indexes before its booking is cancelled.
+
+        Keyword arguments:
+        table -- a PurchaseTable object of the group
+        row -- row index
+        """
+        key = 2 * row + self._tables.index(table)
+        del self.purchasers[table._purchasers[row]][key]
+        del self.currencies[table._currencies[row]][key]
+        for member in table.get_recipients(row):
+            del self.recipients[member][key]
@@ -0,0 +1,341 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import asyncio
+import functools
+import json
+import os
+import re
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+from .group import load_group
+from .utils import Currency, DuplicateMemberError, InvalidMemberError, InvalidMemberNameError
+from .utils import InvalidRecordError, MissingExchangeRateError
+from .workspace import summary
+
+# estimated memory per row of a lazy table (raw JSON record) and of the columns
+RAW_ROW_BYTES = 900
+ROW_BYTES = 150
+MEMBER_BYTES = 1024
+
+MAX_BODY = 2 ** 20
+NAME = re.compile(r'[A-Za-z0-9_-][A-Za-z0-9_.-]*')
+REASONS = {200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+USER_ERRORS = (DuplicateMemberError, InvalidMemberError, InvalidMemberNameError,
+               InvalidRecordError, MissingExchangeRateError, KeyError, TypeError, ValueError)
+
+
+class HTTPError(Exception):
+    """Exception class for a request that is answered with an error status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def estimate_size(group):
+    """Return the estimated memory of a group in bytes.
+
+    Keyword arguments:
+    group -- group object
+    """
+    size = MEMBER_BYTES * group.number_of_members
+    for table in (group._purchases, group._transfers):
+        size += len(table) * (ROW_BYTES if table._raw is None else RAW_ROW_BYTES)
+
+    return size
+
+
+class _Entry():
+    """Hot group of the server with its lock and write-behind state."""
+
+    def __init__(self, path):
+        self.path = path
+        self.group = None
+        self.lock = asyncio.Lock()
+        self.dirty = False
+        self.save_task = None
+        self.size = 0
+
+
+class GroupServer():
+    """Local HTTP/JSON server of the group files of a directory.
+    Groups are loaded on the first request and kept in memory. Requests of
+    one group are serialized by a per-group lock, requests of different
+    groups run concurrently. Mutations mark a group dirty and schedule one
+    journal save after save_delay seconds, so a burst of mutations is written
+    with one Group.save. When the estimated memory of the hot groups exceeds
+    memory_limit, the least recently used idle groups are saved and evicted.
+
+    Endpoints (group files are <root>/<name>.json):
+    GET /groups/<name> -- group summary
+    GET /groups/<name>/balances[?mode=greedy|minimal&as_of=<date>] -- balances and settlements
+    POST /groups/<name>/members -- add a member {"name"}
+    POST /groups/<name>/purchases -- add a purchase {"title", "purchaser",
+        "recipients", "amount", "currency", "date"}
+    POST /groups/<name>/transfers -- add a transfer {"title", "purchaser",
+        "recipient", "amount", "currency", "date"}
+
+    Keyword arguments:
+    root -- directory of the group files
+    memory_limit -- estimated memory of the hot groups in bytes (default 256 MiB)
+    save_delay -- seconds between the first mutation and the save (default 1.0)
+    """
+
+    def __init__(self, root, memory_limit=256 * 2 ** 20, save_delay=1.0):
+        self.root = root
+        self.memory_limit = memory_limit
+        self.save_delay = save_delay
+        self._groups = OrderedDict()
+        self._server = None
+
+    def _entry(self, name):
+        """Return the hot group entry of a name, create it if the group file exists."""
+        entry = self._groups.get(name)
+        if entry is None:
+            path = os.path.join(self.root, '{:}.json'.format(name))
+            if not NAME.fullmatch(name) or not os.path.isfile(path):
+                raise(HTTPError(404, 'Unknown group {:}!'.format(name)))
+            entry = self._groups[name] = _Entry(path)
+
+        self._groups.move_to_end(name)
+        return entry
+
+    async def _evict(self, keep):
+        """Save and evict the least recently used idle groups above the memory limit.
+
+        Keyword arguments:
+        keep -- name of the group that is never evicted
+        """
+        size = sum(x.size for x in self._groups.values())
+        for name, entry in list(self._groups.items()):
+            if size <= self.memory_limit:
+                break
+            if name == keep or entry.lock.locked():
+                continue
+
+            async with entry.lock:
+                if self._groups.get(name) is not entry:
+                    continue
+                await self._save(entry)
+                del self._groups[name]
+                size -= entry.size
+
+    async def _flush(self, entry):
+        """Save a dirty group after the write-behind delay."""
+        await asyncio.sleep(self.save_delay)
+        async with entry.lock:
+            await self._save(entry)
+
+    async def _save(self, entry):
+        """Save a dirty group, the caller holds the group lock."""
+        if entry.save_task is not None and entry.save_task is not asyncio.current_task():
+            entry.save_task.cancel()
+        entry.save_task = None
+
+        if entry.dirty:
+            entry.dirty = False
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, functools.partial(entry.group.save, entry.path, journal=True))
+            except Exception:
+                entry.dirty = True
+                raise
+
+    async def run(self, name, func, mutation=False):
+        """Run func(group) under the lock of a group and return its result.
+
+        Keyword arguments:
+        name -- group name
+        func -- callable of the group object
+        mutation -- schedule the write-behind save (default False)
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            entry = self._entry(name)
+            async with entry.lock:
+                # the group was evicted while waiting for the lock
+                if self._groups.get(name) is not entry:
+                    continue
+
+                if entry.group is None:
+                    try:
+                        entry.group = await loop.run_in_executor(
+                            None, functools.partial(load_group, entry.path, lazy=True))
+                    except Exception:
+                        del self._groups[name]
+                        raise
+
+                result = func(entry.group)
+                if mutation:
+                    entry.dirty = True
+                    if entry.save_task is None:
+                        entry.save_task = loop.create_task(self._flush(entry))
+                entry.size = estimate_size(entry.group)
+            break
+
+        await self._evict(name)
+        return result
+
+    async def dispatch(self, method, target, body=b''):
+        """Answer a request and return the status and the JSON conform payload.
+
+        Keyword arguments:
+        method -- HTTP method
+        target -- request target (path and query)
+        body -- request body (default b'')
+        """
+        url = urlsplit(target)
+        parts = url.path.strip('/').split('/')
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if len(parts) < 2 or parts[0] != 'groups':
+            raise(HTTPError(404, 'Unknown resource {:}!'.format(url.path)))
+
+        name, resource = parts[1], '/'.join(parts[2:])
+        if resource in ('', 'balances'):
+            if method != 'GET':
+                raise(HTTPError(405, 'Method {:} not allowed!'.format(method)))
+
+            mode = query.get('mode', 'greedy')
+            if resource == '':
+                return 200, await self.run(name, lambda x: summary(x, mode=mode))
+
+            as_of = query.get('as_of')
+            return 200, await self.run(name, lambda x: {
+                'balances': x.member_balances(as_of=as_of),
+                'settlements': [[b.purchaser.name, next(iter(b.recipients)), b.amount]
+                                for b in x.balances(mode=mode, as_of=as_of)]})
+
+        if resource not in ('members', 'purchases', 'transfers'):
+            raise(HTTPError(404, 'Unknown resource {:}!'.format(url.path)))
+        if method != 'POST':
+            raise(HTTPError(405, 'Method {:} not allowed!'.format(method)))
+
+        data = json.loads(body or b'{}')
+        if not isinstance(data, dict):
+            raise(ValueError('Expected a JSON object!'))
+
+        if resource == 'members':
+            return 201, await self.run(
+                name, lambda x: {'name': x.add_member(data['name']).name}, mutation=True)
+
+        def add(group):
+            currency = Currency[data['currency']] if 'currency' in data else group.currency
+            if resource == 'purchases':
+                x = group.add_purchase(data['title'], data['purchaser'], data['recipients'],
+                                       data['amount'], currency, data['date'])
+            else:
+                x = group.add_transfer(data['title'], data['purchaser'], data['recipient'],
+                                       data['amount'], currency, data['date'])
+            return {'record_id': x.record_id}
+
+        return 201, await self.run(name, add, mutation=True)
+
+    async def _handle(self, reader, writer):
+        """Serve the HTTP/1.1 requests of a connection."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line.strip():
+                    break
+
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if not header.strip():
+                        break
+                    key, _, value = header.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                parts = line.decode('latin-1').split()
+                version = parts[2] if len(parts) == 3 else None
+                # the connection is closed unless the request body was read
+                close = True
+                try:
+                    if version is None:
+                        raise(HTTPError(400, 'Malformed request line!'))
+
+                    length = int(headers.get('content-length', 0))
+                    if length > MAX_BODY:
+                        raise(HTTPError(413, 'Request body too large!'))
+
+                    body = await reader.readexactly(length)
+                    close = False
+                    status, payload = await self.dispatch(parts[0], parts[1], body)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except USER_ERRORS as e:
+                    status, payload = 400, {'error': '{:}: {:}'.format(type(e).__name__, e)}
+                except asyncio.IncompleteReadError:
+                    raise
+                except Exception as e:
+                    status, payload = 500, {'error': '{:}: {:}'.format(type(e).__name__, e)}
+
+                keep_alive = (not close and version == 'HTTP/1.1' and
+                              headers.get('connection', '').lower() != 'close')
+                data = json.dumps(payload).encode('utf-8')
+                writer.write('HTTP/1.1 {:} {:}\r\nContent-Type: application/json\r\n'
+                             'Content-Length: {:}\r\nConnection: {:}\r\n\r\n'.format(
+                                 status, REASONS[status], len(data),
+                                 'keep-alive' if keep_alive else 'close').encode('latin-1') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def close(self):
+        """Stop accepting connections and save all dirty groups."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+        for entry in list(self._groups.values()):
+            async with entry.lock:
+                if entry.group is not None:
+                    await self._save(entry)
+
+    async def start(self, host='127.0.0.1', port=8080):
+        """Start accepting connections and return the bound port.
+
+        Keyword arguments:
+        host -- interface address (default '127.0.0.1')
+        port -- TCP port, 0 for a free port (default 8080)
+        """
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self, host='127.0.0.1', port=8080):
+        """Serve until cancelled and save all dirty groups on exit.
+
+        Keyword arguments:
+        host -- interface address (default '127.0.0.1')
+        port -- TCP port (default 8080)
+        """
+        await self.start(host, port)
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
@@ -0,0 +1,193 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import heapq
+import time
+
+
+def _units(balances, scale):
+    """Return a dictionary of member name -> integer balance in 1/scale units
+    with the rounding residual put on the largest balance.
+
+    Keyword arguments:
+    balances -- dictionary of member name -> net balance
+    scale -- number of units per balance unit
+    """
+    units = {name: round(x * scale) for name, x in balances.items()}
+    if units:
+        residual = sum(units.values())
+        largest = max(units, key=(lambda x: abs(units[x])))
+        units[largest] -= residual
+
+    return units
+
+
+def settle(balances, top_k=None, tolerance=1e-9, digits=None):
+    """Match debtors with creditors and return a list of (sender, receiver, amount) tuples.
+    The largest debt is always settled against the largest credit, which requires
+    O(n log n) time and yields at most n-1 transfers for n balances.
+
+    Keyword arguments:
+    balances -- dictionary of member name -> net balance
+    top_k -- number of largest settlements to return (default None for all)
+    tolerance -- absolute balance treated as settled (default 1e-9)
+    digits -- settle exactly in integer units of this many decimal digits (default None)
+    """
+    if digits is not None:
+        scale = 10 ** digits
+        return [(sender, receiver, amount / scale) for sender, receiver, amount
+                in settle(_units(balances, scale), top_k=top_k, tolerance=0)]
+
+    debtors = [(x, name) for name, x in balances.items() if x < -tolerance]
+    creditors = [(-x, name) for name, x in balances.items() if x > tolerance]
+    heapq.heapify(debtors)
+    heapq.heapify(creditors)
+
+    transfers = []
+    while debtors and creditors:
+        debt, sender = heapq.heappop(debtors)
+        credit, receiver = heapq.heappop(creditors)
+
+        amount = min(debt, credit, key=abs)
+        transfers.append((sender, receiver, abs(amount)))
+
+        debt -= amount
+        credit -= amount
+        if debt < -tolerance:
+            heapq.heappush(debtors, (debt, sender))
+        if credit < -tolerance:
+            heapq.heappush(creditors, (credit, receiver))
+
+    if top_k is not None:
+        transfers = heapq.nlargest(top_k, transfers, key=(lambda x: x[2]))
+
+    return transfers
+
+
+class _Timeout(Exception):
+    """Internal exception to abort the exact search."""
+    pass
+
+
+def _partition(values, deadline):
+    """Partition zero-sum integer values into the maximum number of zero-sum subsets.
+    Return a list of index lists or raise _Timeout when the deadline is reached.
+
+    Keyword arguments:
+    values -- list of non-zero integers summing to zero
+    deadline -- time.monotonic() value after which the search is aborted
+    """
+    n = len(values)
+
+    # subset sums, bit i of the mask selects values[i]
+    sums = [0]
+    for x in values:
+        sums += [y + x for y in sums]
+        if time.monotonic() > deadline:
+            raise(_Timeout())
+
+    # zero-sum subsets grouped by their lowest member, smallest first
+    candidates = {}
+    for mask in sorted((m for m, y in enumerate(sums) if y == 0 and m),
+                       key=(lambda m: bin(m).count('1'))):
+        candidates.setdefault(mask & -mask, []).append(mask)
+    del sums
+
+    memo = {}
+
+    def search(mask):
+        if not mask:
+            return []
+        if mask in memo:
+            return memo[mask]
+        if time.monotonic() > deadline:
+            raise(_Timeout())
+
+        # every subset has at least two members
+        bound = bin(mask).count('1') // 2
+        best = [mask]
+        for subset in candidates[mask & -mask]:
+            if subset == mask or subset & mask != subset:
+                continue
+
+            tmp = [subset] + search(mask ^ subset)
+            if len(tmp) > len(best):
+                best = tmp
+                if len(best) == bound:
+                    break
+
+        memo[mask] = best
+        return best
+
+    return [[i for i in range(n) if subset >> i & 1]
+            for subset in search((1 << n) - 1)]
+
+
+def settle_minimal(balances, top_k=None, time_budget=1.0, max_exact=20, digits=2):
+    """Return a list of (sender, receiver, amount) tuples with the fewest transfers.
+    The balances are split into the maximum number of zero-sum subsets, each
+    of which is settled with len(subset) - 1 transfers. The partition is exact
+    for up to max_exact open balances and within the time budget, otherwise
+    opposite balances are paired and the rest is settled greedily.
+
+    Keyword arguments:
+    balances -- dictionary of member name -> net balance
+    top_k -- number of largest settlements to return (default None for all)
+    time_budget -- maximum solver time in seconds (default 1.0)
+    max_exact -- maximum number of open balances for the exact search (default 20)
+    digits -- number of decimal digits the balances are rounded to (default 2)
+    """
+    deadline = time.monotonic() + time_budget
+    scale = 10 ** digits
+
+    # integer balances with the rounding residual put on the largest one
+    units = {name: x for name, x in _units(balances, scale).items() if x}
+
+    # opposite balances always form a subset of an optimal partition
+    subsets = []
+    opposites = {}
+    for name, x in units.items():
+        if opposites.get(-x):
+            subsets.append([opposites[-x].pop(), name])
+        else:
+            opposites.setdefault(x, []).append(name)
+    names = [name for tmp in opposites.values() for name in tmp]
+
+    if len(names) <= max_exact:
+        try:
+            subsets += [[names[i] for i in tmp] for tmp in
+                        _partition([units[name] for name in names], deadline)]
+            names = []
+        except _Timeout:
+            pass
+
+    if names:
+        subsets.append(names)
+
+    transfers = []
+    for subset in subsets:
+        transfers += [(sender, receiver, amount / scale) for sender, receiver, amount
+                      in settle({name: units[name] for name in subset}, tolerance=0)]
+
+    if top_k is not None:
+        transfers = heapq.nlargest(top_k, transfers, key=(lambda x: x[2]))
+
+    return transfers
@@ -0,0 +1,417 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from .balance import Balance
+from .group import Group, load_group
+from .journal import file_signature
+from .settlement import settle, settle_minimal
+from .utils import Currency, DIGITS, TimeStamp, to_major
+
+HEAD = 'group.json'
+INDEX = 'shards.json'
+INDEX_VERSION = 1
+PERIODS = {'year': r'\d{4}', 'month': r'\d{4}-\d{2}'}
+
+
+def _encode(key):
+    """Return the JSON conform [currency index, rate period start or None] of a ledger key."""
+    return [key, None] if key.__class__ is int else list(key)
+
+
+def _decode(x):
+    """Return the ledger key of an encoded [currency index, rate period start or None]."""
+    return x[0] if x[1] is None else (x[0], x[1])
+
+
+def _sync(group, head):
+    """Copy the members and exchange rates of the head group to a shard group.
+
+    Keyword arguments:
+    group -- shard group object
+    head -- JSON conform dictionary with the keys members, exchange_rates and
+        exchange_rate_series
+    """
+    for name in head['members']:
+        if name not in group._members:
+            group.add_member(name)
+
+    rates = {Currency[k]: v for k, v in head['exchange_rates'].items()}
+    if group.exchange_rates != rates:
+        group.exchange_rates.clear()
+        group.exchange_rates.update(rates)
+
+    current = group._serialize_rate_series()
+    for k in current.keys() | head['exchange_rate_series'].keys():
+        old, new = dict(current.get(k, ())), dict(head['exchange_rate_series'].get(k, ()))
+        for date in old.keys() - new.keys():
+            group.remove_exchange_rate(Currency[k], date)
+        for date, v in new.items():
+            if old.get(date) != v:
+                group.set_exchange_rate(Currency[k], v, date)
+
+
+def partial(group):
+    """Return the JSON conform per-member partial balances of a shard group.
+    The ledger amounts are kept in minor units per currency and rate period,
+    so the partials of several shards are summed before they are converted.
+
+    Keyword arguments:
+    group -- shard group object
+    """
+    return {
+        'ledger': {name: [_encode(k) + [v] for k, v in group._ledger[member].items() if v]
+                   for member, name in enumerate(group._member_names)},
+        'totals': [_encode(k) + [v]
+                   for k, v in group._purchases.totals(group._rate_series).items() if v],
+        'purchases': len(group._purchases),
+        'transfers': len(group._transfers)
+    }
+
+
+def load_partial(path, head):
+    """Load a shard file and return its partial balances in the rate periods of the head group.
+
+    Keyword arguments:
+    path -- shard file path
+    head -- JSON conform dictionary of the head group (see _sync)
+    """
+    group = load_group(path, lazy=True)
+    _sync(group, head)
+    return partial(group)
+
+
+class ShardedGroup():
+    """Group whose purchases and transfers are split into one file per time period.
+    The directory holds the head group file with the members and exchange
+    rates, one group file per year or month with the rows dated in it and
+    an index of the per-member partial balances of every shard. The balances
+    of the group are the sum of the partials. A partial is recomputed only if
+    its shard file, its journal or the rate series changed, the changed
+    shards are loaded in worker processes.
+
+    Keyword arguments:
+    path -- shard directory created by ShardedGroup.create
+    max_workers -- number of worker processes of a refresh (default None for the
+        number of CPUs, 1 computes in this process)
+    """
+
+    def __init__(self, path, max_workers=None):
+        self.path = path
+        self.max_workers = max_workers
+
+        with open(os.path.join(path, INDEX), 'r') as fp:
+            data = json.load(fp)
+
+        if data.get('version') != INDEX_VERSION:
+            raise(ValueError('Unknown shard index version {:}!'.format(data.get('version'))))
+
+        self.period = data['period']
+        self._entries = data['shards']
+        self._pattern = re.compile(r'^({:})\.json$'.format(PERIODS[self.period]))
+        self.head = load_group(os.path.join(path, HEAD))
+
+        # open shard groups, saved and closed by save()
+        self._open = {}
+
+    @classmethod
+    def create(cls, path, name, description='', currency=Currency.Euro, period='year',
+               max_workers=None):
+        """Create an empty shard directory and return the sharded group.
+
+        Keyword arguments:
+        path -- shard directory
+        name -- group name
+        description -- group description (default '')
+        currency -- group currency enum object (default Euro)
+        period -- shard period, 'year' or 'month' (default 'year')
+        max_workers -- number of worker processes of a refresh (default None)
+        """
+        if period not in PERIODS:
+            raise(ValueError('Unknown shard period {:} ({:})!'.format(
+                period, ', '.join(PERIODS))))
+
+        os.makedirs(path, exist_ok=True)
+        Group(name, description=description, currency=currency).save(os.path.join(path, HEAD))
+        with open(os.path.join(path, INDEX), 'w') as fp:
+            json.dump({'version': INDEX_VERSION, 'period': period, 'shards': {}}, fp)
+
+        return cls(path, max_workers=max_workers)
+
+    @classmethod
+    def from_group(cls, group, path, period='year', max_workers=None):
+        """Split a group into a new shard directory and return the sharded group.
+
+        Keyword arguments:
+        group -- group object
+        path -- shard directory
+        period -- shard period, 'year' or 'month' (default 'year')
+        max_workers -- number of worker processes of a refresh (default None)
+        """
+        tmp = cls.create(path, group.name, description=group.description,
+                         currency=group.currency, period=period, max_workers=max_workers)
+        for name in group._members:
+            tmp.add_member(name)
+
+        for k, v in group.exchange_rates.items():
+            tmp.set_exchange_rate(k, v)
+        for k, rates in group._serialize_rate_series().items():
+            for date, v in rates:
+                tmp.set_exchange_rate(Currency[k], v, date)
+
+        for table, add in ((group._purchases, Group.add_purchases_bulk),
+                           (group._transfers, Group.add_transfers_bulk)):
+            records = {}
+            for x in table.to_dicts():
+                records.setdefault(tmp._key(x['date']), []).append(x)
+            for key, x in records.items():
+                add(tmp._shard(key), x)
+
+        tmp.save()
+        return tmp
+
+    def _head(self):
+        """Return the JSON conform members and exchange rates of the head group."""
+        return {
+            'members': list(self.head._members),
+            'exchange_rates': {k.name: v for k, v in self.head.exchange_rates.items()},
+            'exchange_rate_series': self.head._serialize_rate_series()
+        }
+
+    def _key(self, date):
+        """Return the shard key of a date.
+
+        Keyword arguments:
+        date -- a TimeStamp object, datetime string or microseconds
+        """
+        x = TimeStamp.from_ticks(TimeStamp.to_ticks(date)).time
+        if self.period == 'year':
+            return '{:04d}'.format(x.year)
+        return '{:04d}-{:02d}'.format(x.year, x.month)
+
+    def _shard(self, key):
+        """Return the open shard group of a key, which is loaded or created on demand."""
+        group = self._open.get(key)
+        if group is None:
+            path = self._shard_path(key)
+            if os.path.exists(path):
+                group = load_group(path, lazy=True)
+            else:
+                head = self.head
+                group = Group(head.name, description=head.description, currency=head.currency)
+            _sync(group, self._head())
+            self._open[key] = group
+
+        return group
+
+    def _shard_path(self, key):
+        """Return the file path of a shard key."""
+        return os.path.join(self.path, '{:}.json'.format(key))
+
+    def add_member(self, name):
+        """Add a member to the group.
+
+        Keyword arguments:
+        name -- member name
+        """
+        tmp = self.head.add_member(name)
+        for group in self._open.values():
+            group.add_member(name)
+        return tmp
+
+    def add_purchase(self, title, purchaser, recipients, amount, currency, date, stamp=None):
+        """Add a purchase to the shard of its date.
+
+        Keyword arguments:
+        title -- purchase title
+        purchaser -- purchaser name
+        recipients -- list of recipient names
+        amount -- purchase amount
+        currency -- purchase currency
+        date -- a TimeStamp object or a datetime string
+        stamp -- a TimeStamp object or a datetime string (default now())
+        """
+        return self._shard(self._key(date)).add_purchase(
+            title, purchaser, recipients, amount, currency, date, stamp=stamp)
+
+    def add_transfer(self, title, purchaser, recipient, amount, currency, date, stamp=None):
+        """Add a transfer to the shard of its date.
+
+        Keyword arguments:
+        title -- transfer title
+        purchaser -- purchaser name
+        recipient -- recipient name
+        amount -- transfer amount
+        currency -- transfer currency
+        date -- a TimeStamp object or a datetime string
+        stamp -- a TimeStamp object or a datetime string (default now())
+        """
+        return self._shard(self._key(date)).add_transfer(
+            title, purchaser, recipient, amount, currency, date, stamp=stamp)
+
+    def balances(self, top_k=None, mode='greedy', time_budget=1.0):
+        """Generate the balance transfers of the reduced member balances and return a list of them.
+        The balances refer to the head group, they are booked with add_transfer.
+
+        Keyword arguments:
+        top_k -- number of largest balance transfers to return (default None for all)
+        mode -- 'greedy' or 'minimal' for the fewest number of transfers (default 'greedy')
+        time_budget -- maximum solver time in seconds for the minimal mode (default 1.0)
+        """
+        if mode == 'greedy':
+            transfers = settle(self.member_balances(), top_k=top_k, digits=DIGITS)
+        elif mode == 'minimal':
+            transfers = settle_minimal(self.member_balances(), top_k=top_k,
+                                       time_budget=time_budget, digits=DIGITS)
+        else:
+            raise(ValueError('Unknown balance mode {:} (greedy, minimal)!'.format(mode)))
+
+        date = TimeStamp()
+        return [Balance(self.head, sender, receiver, amount, self.head.currency, date)
+                for sender, receiver, amount in transfers]
+
+    def member_balances(self):
+        """Return a dictionary of member name -> balance in groups currency."""
+        ledger = {name: {} for name in self.head._members}
+        for tmp in self.partials().values():
+            for name, values in tmp['ledger'].items():
+                entry = ledger[name]
+                for x in values:
+                    key = _decode(x)
+                    entry[key] = entry.get(key, 0) + x[2]
+
+        convert = self.head._convert
+        return {name: to_major(round(sum(convert(v, k) for k, v in entry.items())))
+                for name, entry in ledger.items()}
+
+    def partials(self):
+        """Return a dictionary of shard key -> partial balances of all shards (see partial).
+        The open shards are read from memory."""
+        self.refresh()
+        tmp = {key: x['partial'] for key, x in self._entries.items()}
+        tmp.update((key, partial(group)) for key, group in self._open.items())
+        return tmp
+
+    def refresh(self):
+        """Recompute the partials of the changed shard files and return their keys.
+        Open shards are skipped, the partials are written to the index."""
+        head = self._head()
+        series = head['exchange_rate_series']
+
+        entries, changed = {}, []
+        for key in self.shards():
+            if key in self._open:
+                continue
+
+            signature = file_signature(self._shard_path(key))
+            entry = self._entries.get(key)
+            if entry is not None and entry['signature'] == signature and \
+                    entry['exchange_rate_series'] == series:
+                entries[key] = entry
+            else:
+                entries[key] = {'signature': signature, 'exchange_rate_series': series}
+                changed.append(key)
+
+        paths = [self._shard_path(x) for x in changed]
+        if self.max_workers == 1 or len(paths) < 2:
+            partials = [load_partial(x, head) for x in paths]
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                partials = list(pool.map(load_partial, paths, [head] * len(paths)))
+
+        for key, tmp in zip(changed, partials):
+            entries[key]['partial'] = tmp
+
+        if changed or entries.keys() != self._entries.keys() - self._open.keys():
+            self._entries = entries
+            self._save_index()
+
+        return changed
+
+    def _save_index(self):
+        """Write the shard index atomically."""
+        path = os.path.join(self.path, INDEX)
+        tmp_path = '{:}.tmp'.format(path)
+        with open(tmp_path, 'w') as fp:
+            json.dump({'version': INDEX_VERSION, 'period': self.period,
+                       'shards': self._entries}, fp)
+        os.replace(tmp_path, path)
+
+    def remove_exchange_rate(self, currency, date=None):
+        """Remove the static exchange rate or a rate of the date-dependent series of a currency.
+
+        Keyword arguments:
+        currency -- currency object
+        date -- TimeStamp, datetime string or microseconds of the rate (default None)
+        """
+        self.head.remove_exchange_rate(currency, date)
+        for group in self._open.values():
+            group.remove_exchange_rate(currency, date)
+
+    def save(self, indent=4):
+        """Save the head group and the open shards to their journals and close the shards.
+        The partials of the saved shards are written to the index.
+
+        Keyword arguments:
+        indent -- JSON indentation (default 4)
+        """
+        self.head.save(os.path.join(self.path, HEAD), indent=indent, journal=True)
+
+        series = self.head._serialize_rate_series()
+        for key, group in self._open.items():
+            path = self._shard_path(key)
+            group.save(path, indent=indent, journal=True)
+            self._entries[key] = {'signature': file_signature(path),
+                                  'exchange_rate_series': series, 'partial': partial(group)}
+
+        self._open = {}
+        self._save_index()
+
+    def set_exchange_rate(self, currency, rate, date=None):
+        """Set the static exchange rate or add a rate to the date-dependent series of a currency.
+
+        Keyword arguments:
+        currency -- currency object
+        rate -- amount of the currency per unit of the group currency
+        date -- TimeStamp, datetime string or microseconds the rate is valid from (default None)
+        """
+        self.head.set_exchange_rate(currency, rate, date)
+        for group in self._open.values():
+            group.set_exchange_rate(currency, rate, date)
+
+    def shards(self):
+        """Return the sorted keys of the shard files and the open shards."""
+        keys = {x.group(1) for x in map(self._pattern.match, os.listdir(self.path)) if x}
+        return sorted(keys | self._open.keys())
+
+    @property
+    def turnover(self):
+        totals = {}
+        for tmp in self.partials().values():
+            for x in tmp['totals']:
+                key = _decode(x)
+                totals[key] = totals.get(key, 0) + x[2]
+
+        convert = self.head._convert
+        return to_major(round(sum(convert(v, k) for k, v in totals.items())))
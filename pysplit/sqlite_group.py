@@ -0,0 +1,550 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import json
+import sqlite3
+from .journal import Journal
+from .settlement import settle, settle_minimal
+from .stream import iter_group
+from .utils import at_least_1d, Currency, DuplicateMemberError, InvalidMemberError
+from .utils import InvalidMemberNameError, MissingExchangeRateError, TimeStamp
+from .utils import DIGITS, SCALE, to_major, to_minor
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS info (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS members (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    stamp INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS purchases (
+    id INTEGER PRIMARY KEY,
+    kind INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    purchaser INTEGER NOT NULL REFERENCES members(id),
+    amount REAL NOT NULL,
+    currency TEXT NOT NULL,
+    date INTEGER NOT NULL,
+    stamp INTEGER NOT NULL,
+    n_recipients INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS recipients (
+    purchase INTEGER NOT NULL REFERENCES purchases(id),
+    position INTEGER NOT NULL,
+    member INTEGER NOT NULL REFERENCES members(id),
+    PRIMARY KEY (purchase, position)
+);
+CREATE TABLE IF NOT EXISTS exchange_rates (
+    currency TEXT PRIMARY KEY,
+    rate REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS exchange_rate_series (
+    currency TEXT NOT NULL,
+    date INTEGER NOT NULL,
+    rate REAL NOT NULL,
+    PRIMARY KEY (currency, date)
+);
+CREATE INDEX IF NOT EXISTS purchases_purchaser ON purchases(purchaser, currency);
+CREATE INDEX IF NOT EXISTS purchases_date ON purchases(date);
+CREATE INDEX IF NOT EXISTS recipients_member ON recipients(member);
+'''
+
+PURCHASE = 0
+TRANSFER = 1
+
+# integer minor units of a purchase amount and the share of a recipient at
+# r.position, the remainder goes one unit each to the first recipients
+UNITS = 'CAST(ROUND(p.amount * {:}) AS INTEGER)'.format(SCALE)
+SHARE = ('(ABS({0}) / p.n_recipients + (r.position < ABS({0}) % p.n_recipients)) * '
+         '(CASE WHEN p.amount < 0 THEN -1 ELSE 1 END)').format(UNITS)
+
+# start of the rate period of a purchase or NULL for the static exchange rate,
+# like the ledger keys of Group
+PERIOD = ('(SELECT MAX(s.date) FROM exchange_rate_series s '
+          'WHERE s.currency = p.currency AND s.date <= p.date)')
+
+
+def _iter_journaled(path):
+    """Iterate a group JSON file and its journal and yield (key, value) tuples.
+    The journal entries follow the fields of the snapshot (see iter_group), an
+    exchange rate entry is yielded as ('exchange_rate', entry).
+
+    Keyword arguments:
+    path -- JSON file path
+    """
+    yield from iter_group(path)
+
+    keys = {'member': 'members', 'purchase': 'purchases', 'transfer': 'transfers'}
+    for x in Journal(path).read():
+        if x['op'] == 'group':
+            for key in ('name', 'description', 'currency', 'stamp'):
+                yield key, x[key]
+        elif x['op'] == 'exchange_rate':
+            yield 'exchange_rate', x
+        elif x['op'] in keys:
+            yield keys[x['op']], x
+        else:
+            raise(ValueError('Unknown journal entry {:}!'.format(x['op'])))
+
+
+class SQLiteGroup():
+    """Group stored in a SQLite database file.
+    Members, purchases, recipients and exchange rates are kept in indexed
+    tables, balances and the turnover are aggregated by SQL queries in
+    integer minor units per currency and rate period.
+
+    Keyword arguments:
+    path -- database file path
+    name -- group name of a new database (default 'Untitled')
+    description -- group description of a new database (default '')
+    currency -- group currency enum object of a new database (default Euro)
+    """
+
+    def __init__(self, path, name='Untitled', description='', currency=Currency.Euro):
+        self.path = path
+        self._connection = sqlite3.connect(path)
+
+        with self._connection:
+            self._connection.executescript(SCHEMA)
+            self._connection.executemany(
+                'INSERT OR IGNORE INTO info (key, value) VALUES (?, ?)',
+                [('name', name), ('description', description),
+                 ('currency', currency.name), ('stamp', str(TimeStamp().ticks))])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __str__(self):
+        tmp = '{:}'.format(self.name)
+        if self.description:
+            tmp += '({:})'.format(self.description)
+        return tmp
+
+    def _add(self, kind, title, purchaser, recipients, amount, currency, date, stamp=None):
+        """Insert a purchase or transfer with its recipients in one transaction and return its id."""
+        purchaser = self._member_id(purchaser)
+        recipients = [self._member_id(x) for x in dict.fromkeys(recipients)]
+        date = TimeStamp.to_ticks(date)
+        stamp = TimeStamp().ticks if stamp is None else TimeStamp.to_ticks(stamp)
+
+        with self._connection:
+            row = self._connection.execute(
+                'INSERT INTO purchases (kind, title, purchaser, amount, currency, '
+                'date, stamp, n_recipients) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (kind, title, purchaser, to_major(to_minor(amount)), currency.name,
+                 date, stamp, len(recipients))).lastrowid
+            self._connection.executemany(
+                'INSERT INTO recipients (purchase, position, member) VALUES (?, ?, ?)',
+                [(row, i, x) for i, x in enumerate(recipients)])
+
+        return row
+
+    def _converter(self):
+        """Return a function converting an amount in a currency name and rate period
+        (start date or None for the static exchange rate) to the group currency."""
+        currency = self.currency
+        exchange_rates = self.exchange_rates
+        series = {(c, date): rate for c, date, rate in self._connection.execute(
+            'SELECT currency, date, rate FROM exchange_rate_series')}
+
+        def convert(amount, from_c, start=None):
+            from_c = Currency[from_c]
+            if from_c == currency:
+                return amount
+            if start is not None:
+                return amount / series[(from_c.name, start)]
+            if from_c not in exchange_rates:
+                raise(MissingExchangeRateError(from_c))
+
+            return amount / exchange_rates[from_c]
+
+        return convert
+
+    def _get(self, key):
+        return self._connection.execute(
+            'SELECT value FROM info WHERE key = ?', (key,)).fetchone()[0]
+
+    def _member_id(self, name):
+        tmp = self._connection.execute(
+            'SELECT id FROM members WHERE name = ?', (name,)).fetchone()
+        if tmp is None:
+            raise(InvalidMemberError(name, self.members))
+
+        return tmp[0]
+
+    def _records(self, kind):
+        """Return the JSON conform dictionaries of all purchases or transfers."""
+        recipients = {}
+        for purchase, name in self._connection.execute(
+                'SELECT r.purchase, m.name FROM recipients r '
+                'JOIN purchases p ON p.id = r.purchase JOIN members m ON m.id = r.member '
+                'WHERE p.kind = ? ORDER BY r.purchase, r.position', (kind,)):
+            recipients.setdefault(purchase, []).append(name)
+
+        return [{
+            'purchaser': purchaser,
+            'recipients': recipients.get(row, []),
+            'amount': amount,
+            'currency': currency,
+            'date': str(TimeStamp.from_ticks(date)),
+            'title': title,
+            'stamp': str(TimeStamp.from_ticks(stamp))
+        } for row, purchaser, amount, currency, date, title, stamp in self._connection.execute(
+            'SELECT p.id, m.name, p.amount, p.currency, p.date, p.title, p.stamp '
+            'FROM purchases p JOIN members m ON m.id = p.purchaser '
+            'WHERE p.kind = ? ORDER BY p.id', (kind,))]
+
+    def _set(self, key, value):
+        with self._connection:
+            self._connection.execute(
+                'UPDATE info SET value = ? WHERE key = ?', (value, key))
+
+    def add_member(self, name):
+        """Add a member to the group.
+
+        Keyword arguments:
+        name -- member name
+        """
+        if not name or name.isspace():
+            raise(InvalidMemberNameError('Empty member name provided!'))
+
+        try:
+            with self._connection:
+                self._connection.execute(
+                    'INSERT INTO members (name, stamp) VALUES (?, ?)',
+                    (name, TimeStamp().ticks))
+        except sqlite3.IntegrityError:
+            raise(DuplicateMemberError(name, self.members))
+
+    def add_purchase(self, title, purchaser, recipients, amount, currency, date):
+        """Add a purchase to the group and return its id.
+
+        Keyword arguments:
+        title -- purchase title
+        purchaser -- purchaser name
+        recipients -- list of recipient names
+        amount -- purchase amount
+        currency -- purchase currency
+        date -- a TimeStamp object
+        """
+        return self._add(PURCHASE, title, purchaser, recipients, amount, currency, date)
+
+    def add_transfer(self, title, purchaser, recipient, amount, currency, date):
+        """Add a transfer to the group and return its id.
+
+        Keyword arguments:
+        title -- transfer title
+        purchaser -- purchaser name
+        recipients -- recipient name or list of recipient names
+        amount -- transfer amount
+        currency -- transfer currency
+        date -- a TimeStamp object
+        """
+        return self._add(TRANSFER, title, purchaser, at_least_1d(recipient),
+                         amount, currency, date)
+
+    def balances(self, top_k=None, mode='greedy', time_budget=1.0):
+        """Generate the balance transfers and return a list of (sender, receiver, amount) tuples.
+
+        Keyword arguments:
+        top_k -- number of largest balance transfers to return (default None for all)
+        mode -- 'greedy' or 'minimal' for the fewest number of transfers (default 'greedy')
+        time_budget -- maximum solver time in seconds for the minimal mode (default 1.0)
+        """
+        if mode == 'greedy':
+            return settle(self.member_balances(), top_k=top_k, digits=DIGITS)
+        elif mode == 'minimal':
+            return settle_minimal(self.member_balances(), top_k=top_k,
+                                  time_budget=time_budget, digits=DIGITS)
+        else:
+            raise(ValueError('Unknown balance mode {:} (greedy, minimal)!'.format(mode)))
+
+    def close(self):
+        """Close the database connection."""
+        self._connection.close()
+
+    @property
+    def currency(self):
+        return Currency[self._get('currency')]
+
+    @currency.setter
+    def currency(self, x):
+        self._set('currency', x.name)
+
+    @property
+    def description(self):
+        return self._get('description')
+
+    @description.setter
+    def description(self, x):
+        self._set('description', x)
+
+    def exchange(self, amount, from_c, date=None):
+        """Convert an amount in currency from_c to the group currency.
+
+        Keyword arguments:
+        amount -- amount
+        from_c -- from currency object
+        date -- TimeStamp, datetime string or microseconds of the rate (default None)
+        """
+        if from_c == self.currency:
+            return amount
+
+        return amount / self.get_exchange_rate(from_c, date)
+
+    @property
+    def exchange_rate_series(self):
+        """Return a dictionary of currency -> list of (date ticks, rate) tuples."""
+        series = {}
+        for k, date, rate in self._connection.execute(
+                'SELECT currency, date, rate FROM exchange_rate_series ORDER BY currency, date'):
+            series.setdefault(Currency[k], []).append((date, rate))
+
+        return series
+
+    @property
+    def exchange_rates(self):
+        """Return a dictionary of currency -> exchange rate."""
+        return {Currency[k]: v for k, v in self._connection.execute(
+            'SELECT currency, rate FROM exchange_rates')}
+
+    def get_exchange_rate(self, currency, date=None):
+        """Return the exchange rate of a currency valid at a date. Dates before
+        the first rate of a series and date None use the static exchange rate.
+
+        Keyword arguments:
+        currency -- currency enum object
+        date -- TimeStamp, datetime string or microseconds (default None)
+        """
+        if date is not None:
+            tmp = self._connection.execute(
+                'SELECT rate FROM exchange_rate_series WHERE currency = ? AND date <= ? '
+                'ORDER BY date DESC LIMIT 1', (currency.name, TimeStamp.to_ticks(date))).fetchone()
+            if tmp is not None:
+                return tmp[0]
+
+        tmp = self._connection.execute(
+            'SELECT rate FROM exchange_rates WHERE currency = ?', (currency.name,)).fetchone()
+        if tmp is None:
+            raise(MissingExchangeRateError(currency))
+
+        return tmp[0]
+
+    def load_json(self, path):
+        """Import a group JSON file written by Group.save and its journal into the database.
+        The group fields are replaced, members and records are appended in one transaction.
+
+        Keyword arguments:
+        path -- JSON file path
+        """
+        with self._connection:
+            cursor = self._connection.cursor()
+            ids = {x: i for i, x in cursor.execute('SELECT id, name FROM members')}
+
+            def member_id(name):
+                if name not in ids:
+                    raise(InvalidMemberError(name, list(ids)))
+                return ids[name]
+
+            for key, x in _iter_journaled(path):
+                if key in ('name', 'description', 'currency'):
+                    cursor.execute('UPDATE info SET value = ? WHERE key = ?', (x, key))
+                elif key == 'stamp':
+                    cursor.execute('UPDATE info SET value = ? WHERE key = ?',
+                                   (str(TimeStamp.parse(x)), key))
+                elif key == 'exchange_rates':
+                    cursor.executemany(
+                        'INSERT OR REPLACE INTO exchange_rates (currency, rate) VALUES (?, ?)',
+                        x.items())
+                elif key == 'exchange_rate_series':
+                    cursor.executemany(
+                        'INSERT OR REPLACE INTO exchange_rate_series (currency, date, rate) '
+                        'VALUES (?, ?, ?)',
+                        [(Currency[k].name, TimeStamp.to_ticks(date), float(rate))
+                         for k, rates in x.items() for date, rate in rates])
+                elif key == 'exchange_rate':
+                    currency = Currency[x['currency']].name
+                    if x.get('date') is None and x['rate'] is None:
+                        cursor.execute('DELETE FROM exchange_rates WHERE currency = ?', (currency,))
+                    elif x.get('date') is None:
+                        cursor.execute(
+                            'INSERT OR REPLACE INTO exchange_rates (currency, rate) VALUES (?, ?)',
+                            (currency, x['rate']))
+                    elif x['rate'] is None:
+                        cursor.execute(
+                            'DELETE FROM exchange_rate_series WHERE currency = ? AND date = ?',
+                            (currency, TimeStamp.to_ticks(x['date'])))
+                    else:
+                        cursor.execute(
+                            'INSERT OR REPLACE INTO exchange_rate_series (currency, date, rate) '
+                            'VALUES (?, ?, ?)', (currency, TimeStamp.to_ticks(x['date']), x['rate']))
+                elif key == 'members':
+                    if x['name'] in ids:
+                        raise(DuplicateMemberError(x['name'], list(ids)))
+                    ids[x['name']] = cursor.execute(
+                        'INSERT INTO members (name, stamp) VALUES (?, ?)',
+                        (x['name'], TimeStamp.parse(x['stamp']))).lastrowid
+                elif key in ('purchases', 'transfers'):
+                    recipients = [member_id(xx) for xx in dict.fromkeys(x['recipients'])]
+                    row = cursor.execute(
+                        'INSERT INTO purchases (kind, title, purchaser, amount, currency, '
+                        'date, stamp, n_recipients) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                        (PURCHASE if key == 'purchases' else TRANSFER, x['title'],
+                         member_id(x['purchaser']), to_major(to_minor(x['amount'])),
+                         Currency[x['currency']].name,
+                         TimeStamp.parse(x['date']), TimeStamp.parse(x['stamp']),
+                         len(recipients))).lastrowid
+                    cursor.executemany(
+                        'INSERT INTO recipients (purchase, position, member) VALUES (?, ?, ?)',
+                        [(row, i, xx) for i, xx in enumerate(recipients)])
+
+    def member_balance(self, name):
+        """Return the balance of a member in groups currency.
+
+        Keyword arguments:
+        name -- member name
+        """
+        member = self._member_id(name)
+        credits = self._connection.execute(
+            'SELECT p.currency, {:} AS period, SUM({:}) FROM purchases p '
+            'WHERE p.purchaser = ? GROUP BY p.currency, period'.format(PERIOD, UNITS),
+            (member,)).fetchall()
+        debits = self._connection.execute(
+            'SELECT p.currency, {:} AS period, SUM({:}) FROM recipients r '
+            'JOIN purchases p ON p.id = r.purchase '
+            'WHERE r.member = ? GROUP BY p.currency, period'.format(PERIOD, SHARE),
+            (member,)).fetchall()
+
+        convert = self._converter()
+        return to_major(round(sum(convert(x, c, start) for c, start, x in credits) -
+                              sum(convert(x, c, start) for c, start, x in debits)))
+
+    def member_balances(self):
+        """Return a dictionary of member name -> balance in groups currency."""
+        convert = self._converter()
+        balances = {x: 0.0 for x in self.members}
+        for name, c, start, x in self._connection.execute(
+                'SELECT m.name, p.currency, {:} AS period, SUM({:}) FROM purchases p '
+                'JOIN members m ON m.id = p.purchaser '
+                'GROUP BY p.purchaser, p.currency, period'.format(PERIOD, UNITS)):
+            balances[name] += convert(x, c, start)
+
+        for name, c, start, x in self._connection.execute(
+                'SELECT m.name, p.currency, {:} AS period, SUM({:}) FROM recipients r '
+                'JOIN purchases p ON p.id = r.purchase JOIN members m ON m.id = r.member '
+                'GROUP BY r.member, p.currency, period'.format(PERIOD, SHARE)):
+            balances[name] -= convert(x, c, start)
+
+        return {name: to_major(round(x)) for name, x in balances.items()}
+
+    @property
+    def members(self):
+        """Return the list of member names."""
+        return [x for x, in self._connection.execute('SELECT name FROM members ORDER BY id')]
+
+    @property
+    def name(self):
+        return self._get('name')
+
+    @name.setter
+    def name(self, x):
+        self._set('name', x)
+
+    @property
+    def number_of_members(self):
+        """Return the number of members."""
+        return self._connection.execute('SELECT COUNT(*) FROM members').fetchone()[0]
+
+    def save(self, path, indent=4):
+        """Export the group to a JSON file in the format of Group.save.
+
+        Keyword arguments:
+        path -- JSON file path
+        indent -- JSON indentation (default 4)
+        """
+        with open(path, 'w') as fp:
+            json.dump(self.to_dict(), fp, indent=indent)
+
+    def set_exchange_rate(self, currency, rate, date=None):
+        """Set or remove (rate None) the static exchange rate or a rate of the
+        date-dependent series of a currency. A rate of the series is valid from
+        its date until the date of the next rate.
+
+        Keyword arguments:
+        currency -- currency enum object
+        rate -- exchange rate or None
+        date -- TimeStamp, datetime string or microseconds the rate is valid from (default None)
+        """
+        with self._connection:
+            if date is not None:
+                if rate is None:
+                    self._connection.execute(
+                        'DELETE FROM exchange_rate_series WHERE currency = ? AND date = ?',
+                        (currency.name, TimeStamp.to_ticks(date)))
+                else:
+                    self._connection.execute(
+                        'INSERT OR REPLACE INTO exchange_rate_series (currency, date, rate) '
+                        'VALUES (?, ?, ?)', (currency.name, TimeStamp.to_ticks(date), float(rate)))
+            elif rate is None:
+                self._connection.execute(
+                    'DELETE FROM exchange_rates WHERE currency = ?', (currency.name,))
+            else:
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO exchange_rates (currency, rate) VALUES (?, ?)',
+                    (currency.name, float(rate)))
+
+    def to_dict(self):
+        """Convert the group to the JSON conform dictionary of Group.to_dict."""
+        tmp = {
+            'name': self.name,
+            'description': self.description,
+            'currency': self.currency.name
+        }
+
+        series = self.exchange_rate_series
+        if series:
+            tmp['exchange_rate_series'] = {
+                k.name: [[str(TimeStamp.from_ticks(date)), rate] for date, rate in x]
+                for k, x in sorted(series.items(), key=lambda x: list(Currency).index(x[0]))}
+
+        tmp.update({
+            'members': [{'name': name, 'stamp': str(TimeStamp.from_ticks(stamp))}
+                        for name, stamp in self._connection.execute(
+                            'SELECT name, stamp FROM members ORDER BY id')],
+            'purchases': self._records(PURCHASE),
+            'transfers': self._records(TRANSFER),
+            'exchange_rates': {k.name: v for k, v in self.exchange_rates.items()},
+            'stamp': str(TimeStamp.from_ticks(int(self._get('stamp'))))
+        })
+        return tmp
+
+    @property
+    def turnover(self):
+        convert = self._converter()
+        return to_major(round(sum(convert(x, c, start) for c, start, x in self._connection.execute(
+            'SELECT p.currency, {:} AS period, SUM({:}) FROM purchases p WHERE p.kind = ? '
+            'GROUP BY p.currency, period'.format(PERIOD, UNITS), (PURCHASE,)))))
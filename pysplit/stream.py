@@ -0,0 +1,178 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import json
+import time
+from .group import Group, load_member, load_purchase, load_record_ids, load_transfer
+from .utils import Currency
+
+
+class _Reader():
+    """Incremental reader of a JSON text file.
+    Only the current chunk is kept in memory, values are decoded one at a time.
+
+    Keyword arguments:
+    fp -- a text file object
+    chunk_size -- number of characters read at once
+    """
+
+    whitespace = ' \t\n\r'
+
+    def __init__(self, fp, chunk_size):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def _error(self, msg):
+        return json.JSONDecodeError(msg, self._buffer, self._pos)
+
+    def _fill(self, size=None):
+        """Read the next chunk and drop the consumed part of the buffer."""
+        data = self.fp.read(size or self.chunk_size)
+        self._buffer = self._buffer[self._pos:] + data
+        self._pos = 0
+        self._eof = not data
+
+    def expect(self, chars):
+        """Consume and return the next token character, which must be one of chars."""
+        c = self.peek()
+        if not c or c not in chars:
+            raise(self._error('Expecting one of {:}'.format(', '.join(chars))))
+
+        self._pos += 1
+        return c
+
+    def peek(self):
+        """Skip whitespace and return the next character or '' at the end of the file."""
+        while True:
+            while self._pos < len(self._buffer) and \
+                    self._buffer[self._pos] in _Reader.whitespace:
+                self._pos += 1
+
+            if self._pos < len(self._buffer) or self._eof:
+                return self._buffer[self._pos:self._pos + 1]
+
+            self._fill()
+
+    def value(self):
+        """Decode and return the next JSON value.
+        Values cut by the end of the buffer are retried with a grown buffer."""
+        self.peek()
+        while True:
+            try:
+                x, end = self.decoder.raw_decode(self._buffer, self._pos)
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return x
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+
+            self._fill(max(self.chunk_size, len(self._buffer)))
+
+
+def iter_group(path, chunk_size=65536):
+    """Iterate a group JSON file and yield (key, value) tuples without building a group.
+    The elements of the members, purchases and transfers arrays are yielded one
+    by one as (key, record) tuples, all other top-level fields as (key, value).
+
+    Keyword arguments:
+    path -- JSON file path
+    chunk_size -- number of characters read at once (default 65536)
+    """
+    with open(path, 'r') as fp:
+        reader = _Reader(fp, chunk_size)
+
+        reader.expect('{')
+        if reader.peek() == '}':
+            reader.expect('}')
+        else:
+            while True:
+                key = reader.value()
+                if not isinstance(key, str):
+                    raise(reader._error('Expecting property name'))
+                reader.expect(':')
+
+                if key in ('members', 'purchases', 'transfers') and reader.peek() == '[':
+                    reader.expect('[')
+                    if reader.peek() == ']':
+                        reader.expect(']')
+                    else:
+                        while True:
+                            yield key, reader.value()
+                            if reader.expect(',]') == ']':
+                                break
+                else:
+                    yield key, reader.value()
+
+                if reader.expect(',}') == '}':
+                    break
+
+        if reader.peek():
+            raise(reader._error('Extra data'))
+
+
+def stream_group(path, chunk_size=65536):
+    """Load a group object from a JSON file while reading it and return the group object.
+    Members, purchases and transfers are added record by record, so the file is
+    never held in memory as a whole. The journal of the file is replayed afterwards.
+
+    Keyword arguments:
+    path -- JSON file path
+    chunk_size -- number of characters read at once (default 65536)
+    """
+    # the load is recorded in the loaded group while all groups are profiled
+    start = time.perf_counter() if Group._profiled else None
+
+    group = Group('')
+    for key, x in iter_group(path, chunk_size=chunk_size):
+        if key == 'name':
+            group.name = x
+        elif key == 'description':
+            group.description = x
+        elif key == 'currency':
+            group.currency = Currency[x]
+        elif key == 'stamp':
+            group.set_time(x)
+        elif key == 'exchange_rates':
+            for k, v in x.items():
+                group.exchange_rates[Currency[k]] = v
+        elif key == 'exchange_rate_series':
+            for k, rates in x.items():
+                for date, v in rates:
+                    group.set_exchange_rate(Currency[k], v, date)
+        elif key == 'members':
+            load_member(group, x)
+        elif key == 'purchases':
+            load_purchase(group, x)
+        elif key == 'transfers':
+            load_transfer(group, x)
+        elif key == 'record_ids':
+            load_record_ids(group, x)
+
+    group._open_journal(path)
+    if start is not None:
+        group._record('stream_group', time.perf_counter() - start)
+    return group
@@ -0,0 +1,160 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from bisect import bisect_left, bisect_right
+from .utils import TimeStamp, split
+from .exchange import ledger_key
+
+
+class TimeIndex():
+    """Date-sorted index of the purchase and transfer rows of a group.
+    The rows are split into date segments, every segment stores the cumulative
+    ledger of all rows before its first date. A point-in-time ledger is the
+    checkpoint of the segment found by bisection plus a scan of the rows of the
+    segment up to the date. Segments that grow beyond twice the segment size
+    are split on insert.
+
+    Keyword arguments:
+    group -- group object
+    segment -- number of rows per segment (default 256)
+    """
+
+    def __init__(self, group, segment=256):
+        self.group = group
+        self.segment = segment
+        self._tables = (group._purchases, group._transfers)
+        self._series = group._rate_series
+
+        # sorted row dates and row keys (row * 2 + table index)
+        entries = sorted((table._dates[row], 2 * row + i)
+                         for i, table in enumerate(self._tables)
+                         for row in table.rows())
+        self._dates = [x[0] for x in entries]
+        self._keys = [x[1] for x in entries]
+
+        # segment start dates and cumulative ledgers {(member, ledger key): amount}
+        self._bounds = [None]
+        self._sums = [{}]
+        ledger, start = {}, 0
+        for i, key in enumerate(self._keys):
+            if i - start >= segment and self._dates[i] != self._dates[i - 1]:
+                self._bounds.append(self._dates[i])
+                self._sums.append(dict(ledger))
+                start = i
+            self._apply(ledger, key, 1)
+
+    def _apply(self, ledger, key, sign):
+        """Book a row in a ledger dictionary.
+
+        Keyword arguments:
+        ledger -- dictionary of (member, ledger key) -> amount in minor units
+        key -- row key
+        sign -- 1 to book or -1 to cancel a booking
+        """
+        table, row = self._tables[key & 1], key >> 1
+        currency = ledger_key(self._series, table._currencies[row], table._dates[row])
+        amount = sign * table._amounts[row]
+
+        x = (table._purchasers[row], currency)
+        ledger[x] = ledger.get(x, 0) + amount
+
+        recipients = table.get_recipients(row)
+        if recipients:
+            for member, share in zip(recipients, split(amount, len(recipients))):
+                x = (member, currency)
+                ledger[x] = ledger.get(x, 0) - share
+
+    def _segment(self, date):
+        """Return the index of the segment of a date."""
+        return bisect_right(self._bounds, date, lo=1) - 1
+
+    def _start(self, j):
+        """Return the position of the first row of a segment."""
+        return 0 if j == 0 else bisect_left(self._dates, self._bounds[j])
+
+    def _split(self, j):
+        """Split a segment in two if it exceeds twice the segment size."""
+        start = self._start(j)
+        stop = len(self._dates) if j + 1 == len(self._bounds) else self._start(j + 1)
+        if stop - start <= 2 * self.segment:
+            return
+
+        # the new segment starts at the first date change after the middle
+        pos = bisect_right(self._dates, self._dates[start + self.segment - 1], lo=start)
+        if pos >= stop:
+            return
+
+        ledger = dict(self._sums[j])
+        for key in self._keys[start:pos]:
+            self._apply(ledger, key, 1)
+
+        self._bounds.insert(j + 1, self._dates[pos])
+        self._sums.insert(j + 1, ledger)
+
+    def insert(self, table, row):
+        """Add a booked table row to the index.
+
+        Keyword arguments:
+        table -- a PurchaseTable object of the group
+        row -- row index
+        """
+        date = table._dates[row]
+        key = 2 * row + self._tables.index(table)
+        pos = bisect_right(self._dates, date)
+        self._dates.insert(pos, date)
+        self._keys.insert(pos, key)
+
+        j = self._segment(date)
+        for ledger in self._sums[j + 1:]:
+            self._apply(ledger, key, 1)
+        self._split(j)
+
+    def ledger(self, as_of):
+        """Return the cumulative ledger {(member, ledger key): amount} of all rows
+        with a date up to and including as_of.
+
+        Keyword arguments:
+        as_of -- a TimeStamp object or a datetime string
+        """
+        date = TimeStamp.to_ticks(as_of)
+        j = self._segment(date)
+        ledger = dict(self._sums[j])
+        for key in self._keys[self._start(j):bisect_right(self._dates, date)]:
+            self._apply(ledger, key, 1)
+
+        return ledger
+
+    def remove(self, table, row):
+        """Remove a table row from the index before its booking is cancelled.
+
+        Keyword arguments:
+        table -- a PurchaseTable object of the group
+        row -- row index
+        """
+        date = table._dates[row]
+        key = 2 * row + self._tables.index(table)
+        lo, hi = bisect_left(self._dates, date), bisect_right(self._dates, date)
+        pos = lo + self._keys[lo:hi].index(key)
+        del self._dates[pos]
+        del self._keys[pos]
+
+        for ledger in self._sums[self._segment(date) + 1:]:
+            self._apply(ledger, key, -1)
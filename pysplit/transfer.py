@@ -25,7 +25,8 @@ from .purchase import Purchase
 
 class Transfer(Purchase):
     """Transfer class derived from purchase class.
-    This derived class links in member transfers."""
+    This derived class is a view of a row in a transfer table."""
+    __slots__ = ()
 
     def __init__(self, group, title, purchaser, recipient, amount, currency, date):
         """Purchase class initialization.
@@ -22,6 +22,7 @@
 from .utils import at_least_1d
 from .time_stamp import TimeStamp
 from .base import Base
-from .error import DuplicateMemberError, InvalidMemberError
-from .error import InvalidMemberNameError, MissingExchangeRateError
+from .error import DuplicateMemberError, InconsistentLedgerError, InvalidMemberError
+from .error import InvalidMemberNameError, InvalidRecordError, MissingExchangeRateError
 from .currency import Currency
+from .money import DIGITS, SCALE, split, to_major, to_minor
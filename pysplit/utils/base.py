@@ -19,6 +19,8 @@
 # LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
+import datetime as dt
+import time
 from .time_stamp import TimeStamp
 
 
@@ -28,17 +30,20 @@ class Base():
     Keyword arguments:
     stamp -- a datetime object, a serialized datetime object or a datetime string (default now())
     """
+    __slots__ = ('_stamp',)
 
     def __init__(self):
         """Base class initialization.
+        The creation time is materialized as TimeStamp object on the first read.
         """
-        self.stamp = TimeStamp()
+        self._stamp = time.time()
 
     def __repr__(self):
         return '<{:} ({:}) - {:}>'.format(self.__class__.__name__, self.stamp, self)
 
     def __str__(self):
-        return str(self.__dict__)
+        slots = (x for cls in type(self).__mro__ for x in getattr(cls, '__slots__', ()))
+        return str({x: getattr(self, x) for x in slots if hasattr(self, x)})
 
     def _serialize(self):
         """Convert the object to a JSON conform dictionary and return it.
@@ -55,4 +60,15 @@ class Base():
         return tmp
 
     def set_time(self, datetime_or_string):
-        self.stamp.time = datetime_or_string
+        self._stamp = TimeStamp(datetime_or_string)
+
+    @property
+    def stamp(self):
+        if not isinstance(self._stamp, TimeStamp):
+            self._stamp = TimeStamp(dt.datetime.fromtimestamp(self._stamp))
+
+        return self._stamp
+
+    @stamp.setter
+    def stamp(self, x):
+        self._stamp = x
@@ -24,6 +24,16 @@ class DuplicateMemberError(Exception):
     pass
 
 
+class InconsistentLedgerError(Exception):
+    """Exception class for a ledger that deviates from the recomputed balances."""
+    pass
+
+
+class InvalidRecordError(Exception):
+    """Exception class for invalid purchase and transfer records."""
+    pass
+
+
 class InvalidMemberError(Exception):
     """Exception class for a invalid member error."""
     pass
@@ -0,0 +1,60 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+# number of decimal digits and minor units per major unit of all currencies
+DIGITS = 2
+SCALE = 10 ** DIGITS
+
+
+def to_minor(x):
+    """Return an amount in integer minor units (cents), rounded half to even.
+
+    Keyword arguments:
+    x -- amount in major units (float, int or numeric string)
+    """
+    return round(float(x) * SCALE)
+
+
+def to_major(x):
+    """Return an amount of minor units in major units.
+
+    Keyword arguments:
+    x -- amount in minor units
+    """
+    return x / SCALE
+
+
+def split(amount, n):
+    """Split an amount of minor units into n integer shares and return them as a list.
+    The remainder is distributed one unit each to the first shares. The split of
+    -amount is the negated split of amount, so a cancelled booking is exact.
+
+    Keyword arguments:
+    amount -- amount in minor units
+    n -- number of shares
+    """
+    share, remainder = divmod(abs(amount), n)
+    if amount < 0:
+        share, one = -share, -1
+    else:
+        one = 1
+
+    return [share + one] * remainder + [share] * (n - remainder)
@@ -23,35 +23,156 @@ import datetime as dt
 
 class TimeStamp():
     """TimeStamp class for storing date and time information.
+    A stamp keeps either a datetime object or the integer microseconds since the
+    epoch and materializes the other representation only when it is read.
 
     Keyword arguments:
     time -- a datetime object or a datetime string (default now())
     """
+    __slots__ = ('_time', '_ticks')
+
     fmt_date = r'%d.%m.%Y'
     fmt_time = r'%H:%M:%S'
     fmt_date_time = '{:} {:}'.format(fmt_date, fmt_time)
+    epoch = dt.datetime(1970, 1, 1)
+    tick = dt.timedelta(microseconds=1)
+
+    # interning cache of parsed strings -> ticks
+    cache = {}
+    cache_size = 65536
 
     def __init__(self, time=None):
         self.time = dt.datetime.now() if time is None else time
 
     def __str__(self):
-        if self._time.time() == dt.time(0, 0):
-            return self._time.strftime(TimeStamp.fmt_date)
+        x = self.time
+        if x.year < 1000:
+            if x.time() == dt.time(0, 0):
+                return x.strftime(TimeStamp.fmt_date)
+
+            return x.strftime(TimeStamp.fmt_date_time)
+
+        if not (x.hour or x.minute or x.second or x.microsecond):
+            return '{:02d}.{:02d}.{:04d}'.format(x.day, x.month, x.year)
+
+        return '{:02d}.{:02d}.{:04d} {:02d}:{:02d}:{:02d}'.format(
+            x.day, x.month, x.year, x.hour, x.minute, x.second)
+
+    @classmethod
+    def from_ticks(cls, x):
+        """Create a TimeStamp object from microseconds since the epoch.
+
+        Keyword arguments:
+        x -- integer microseconds since 01.01.1970
+        """
+        tmp = cls.__new__(cls)
+        tmp._time = None
+        tmp._ticks = x
+        return tmp
+
+    @staticmethod
+    def _is_fixed(x):
+        """Return True if a string has the fixed zero-padded date layout."""
+        n = len(x)
+        return (n == 10 or (n == 19 and x[10] == ' ' and x[13] == ':' and x[16] == ':')) \
+            and x[2] == '.' and x[5] == '.' and x[:2].isdigit() \
+            and x[3:5].isdigit() and x[6:10].isdigit()
+
+    @staticmethod
+    def normalize(x):
+        """Return the string representation of a TimeStamp object or a datetime string.
+        Valid strings in the fixed layout are returned unchanged.
+
+        Keyword arguments:
+        x -- a TimeStamp object or a datetime string
+        """
+        ticks = TimeStamp.to_ticks(x)
+        if isinstance(x, str) and TimeStamp._is_fixed(x) and x[6] != '0' and \
+                (len(x) == 10 or ticks % 86400000000):
+            return x
+
+        return str(TimeStamp.from_ticks(ticks))
+
+    @staticmethod
+    def parse(x):
+        """Parse a '%d.%m.%Y[ %H:%M:%S]' string and return the microseconds since the epoch.
+        Strings in the fixed zero-padded layout are parsed by slicing and interned,
+        all other strings are passed to datetime.strptime.
+
+        Keyword arguments:
+        x -- a datetime string
+        """
+        try:
+            return TimeStamp.cache[x]
+        except KeyError:
+            pass
+
+        n = len(x)
+        if TimeStamp._is_fixed(x):
+            seconds = 0
+            if n == 19:
+                if not (x[11:13].isdigit() and x[14:16].isdigit() and x[17:19].isdigit()):
+                    raise(ValueError('time data {:} does not match format'.format(x)))
+
+                hour, minute, second = int(x[11:13]), int(x[14:16]), int(x[17:19])
+                if hour > 23 or minute > 59 or second > 59:
+                    raise(ValueError('time data {:} does not match format'.format(x)))
+                seconds = 3600 * hour + 60 * minute + second
 
-        return self._time.strftime(TimeStamp.fmt_date_time)
+            days = dt.date(int(x[6:10]), int(x[3:5]), int(x[:2])).toordinal() - \
+                TimeStamp.epoch.toordinal()
+            ticks = (86400 * days + seconds) * 1000000
+        else:
+            try:
+                tmp = dt.datetime.strptime(x, TimeStamp.fmt_date_time)
+            except ValueError:
+                tmp = dt.datetime.strptime(x, TimeStamp.fmt_date)
+            ticks = (tmp - TimeStamp.epoch) // TimeStamp.tick
+
+        if len(TimeStamp.cache) >= TimeStamp.cache_size:
+            TimeStamp.cache.clear()
+        TimeStamp.cache[x] = ticks
+
+        return ticks
+
+    @property
+    def ticks(self):
+        """Return the integer microseconds since the epoch."""
+        if self._ticks is None:
+            self._ticks = (self._time - TimeStamp.epoch) // TimeStamp.tick
+
+        return self._ticks
 
     @property
     def time(self):
+        if self._time is None:
+            self._time = TimeStamp.epoch + self._ticks * TimeStamp.tick
+
         return self._time
 
     @time.setter
     def time(self, x):
         if isinstance(x, dt.datetime):
             self._time = x
+            self._ticks = None
         elif isinstance(x, str):
-            try:
-                self._time = dt.datetime.strptime(x, TimeStamp.fmt_date_time)
-            except ValueError:
-                self._time = dt.datetime.strptime(x, TimeStamp.fmt_date)
+            self._time = None
+            self._ticks = TimeStamp.parse(x)
         else:
             raise TypeError("Got unsupported type {:} ({:})!", type(x), [dt.datetime, str])
+
+    @staticmethod
+    def to_ticks(x):
+        """Return the microseconds since the epoch of a TimeStamp, datetime, string or integer object.
+
+        Keyword arguments:
+        x -- a TimeStamp object, a datetime object, a datetime string or microseconds since the epoch
+        """
+        if isinstance(x, TimeStamp):
+            return x.ticks
+        elif isinstance(x, str):
+            return TimeStamp.parse(x)
+        elif isinstance(x, int):
+            return x
+
+        return TimeStamp(x).ticks
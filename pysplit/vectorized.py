@@ -0,0 +1,114 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+from .purchase_table import PurchaseTable
+from .utils import to_major
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class NumpyEngine():
+    """NumPy balance engine for a group.
+    The typed columns of the purchase and transfer tables (payer indices,
+    amounts in minor units, currency codes and the recipient slices) are
+    wrapped without copy and all member balances are computed in one
+    vectorized pass. The amounts are split into integer shares with the
+    remainder on the first recipients, like in the group ledger.
+
+    Keyword arguments:
+    group -- group object
+    """
+
+    def __init__(self, group):
+        if np is None:
+            raise(ImportError('The numpy engine requires the numpy package!'))
+
+        self.group = group
+
+    def member_balances(self):
+        """Return a dictionary of member name -> balance in groups currency."""
+        group = self.group
+        n_members = len(group._member_names)
+        tables = [x for x in (group._purchases, group._transfers) if len(x)]
+
+        # conversion factors of the used currencies only, currencies with a
+        # rate series are converted per row
+        series = {code: x for code, x in group._rate_series.items()
+                  if PurchaseTable.currencies[code] != group.currency}
+        factors = np.zeros(len(PurchaseTable.currencies))
+        for table in tables:
+            for code in np.unique(np.frombuffer(table._currencies, dtype=np.int8)):
+                if code not in series:
+                    factors[code] = group.exchange(1.0, PurchaseTable.currencies[code])
+
+        balances = np.zeros(n_members)
+        for table in tables:
+            payers = np.frombuffer(table._purchasers, dtype=np.int64)
+            amounts = np.frombuffer(table._amounts, dtype=np.int64)
+            currencies = np.frombuffer(table._currencies, dtype=np.int8)
+            starts = np.frombuffer(table._starts, dtype=np.int64)
+            counts = np.frombuffer(table._counts, dtype=np.int64)
+
+            # gather the recipient slices of all rows
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            positions = offsets + np.repeat(starts, counts)
+            recipients = np.frombuffer(table._recipients, dtype=np.int64)[positions]
+
+            rates = factors[currencies]
+            for code, x in series.items():
+                mask = currencies == code
+                if mask.any():
+                    rates[mask] = self._series_factors(
+                        code, x, mask, np.frombuffer(table._dates, dtype=np.int64))
+
+            # integer shares, the remainder goes to the first recipients
+            units, remainders = np.divmod(np.abs(amounts), np.maximum(counts, 1))
+            shares = np.repeat(units, counts) + (offsets < np.repeat(remainders, counts))
+            shares *= np.repeat(np.sign(amounts), counts)
+
+            # credits per payer and debits per recipient
+            balances += np.bincount(payers, weights=amounts * rates, minlength=n_members)
+            balances -= np.bincount(recipients, weights=shares * np.repeat(rates, counts),
+                                    minlength=n_members)
+
+        return {name: to_major(float(x)) for name, x in zip(group._member_names, np.round(balances))}
+
+    def _series_factors(self, code, series, mask, dates):
+        """Return the conversion factors of the masked rows of a currency with a rate series.
+
+        Keyword arguments:
+        code -- currency index
+        series -- RateSeries object
+        mask -- boolean mask of the rows in this currency
+        dates -- date column
+        """
+        periods = np.searchsorted(np.asarray(series.dates, dtype=np.int64),
+                                  dates[mask], side='right')
+
+        # period 0 holds the rows before the first rate of the series
+        factors = np.concatenate(([0.0], 1.0 / np.asarray(series.rates)))
+        if not periods.all():
+            factors[0] = self.group.exchange(1.0, PurchaseTable.currencies[code])
+
+        return factors[periods]
@@ -0,0 +1,181 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .group import load_group
+from .journal import file_signature
+from .utils import to_major, to_minor
+
+INDEX = '.pysplit-index.json'
+INDEX_VERSION = 1
+
+
+def summary(group, mode='greedy'):
+    """Return the JSON conform summary of a group.
+
+    Keyword arguments:
+    group -- group object
+    mode -- 'greedy' or 'minimal' balance mode (default 'greedy')
+    """
+    return {
+        'name': group.name,
+        'currency': group.currency.name,
+        'members': group.number_of_members,
+        'purchases': len(group._purchases),
+        'transfers': len(group._transfers),
+        'turnover': group.turnover,
+        'balances': group.member_balances(),
+        'settlements': [[x.purchaser.name, next(iter(x.recipients)), x.amount]
+                        for x in group.balances(mode=mode)]
+    }
+
+
+def summarize(path, mode='greedy'):
+    """Load a group file and return the JSON conform summary of the group.
+    Errors are returned as a summary with the key 'error', so one broken
+    file does not stop a batch.
+
+    Keyword arguments:
+    path -- group file path
+    mode -- 'greedy' or 'minimal' balance mode (default 'greedy')
+    """
+    try:
+        return summary(load_group(path, lazy=True), mode=mode)
+    except Exception as e:
+        return {'error': '{:}: {:}'.format(type(e).__name__, e)}
+
+
+def _summarize_all(paths, mode):
+    """Summarize a chunk of group files in one worker call."""
+    return [summarize(x, mode=mode) for x in paths]
+
+
+class Workspace():
+    """Directory of group files that are evaluated in a batch.
+    The summaries of all groups are kept in an index file together with the
+    modification time and size of every group file and its journal, so only
+    new and changed groups are loaded on the next evaluation. The groups are
+    loaded and evaluated in worker processes.
+
+    Keyword arguments:
+    path -- workspace directory
+    pattern -- glob pattern of the group files relative to path (default '**/*.json')
+    index -- index file path (default <path>/.pysplit-index.json)
+    """
+
+    def __init__(self, path, pattern='**/*.json', index=None):
+        self.path = path
+        self.pattern = pattern
+        self.index = os.path.join(path, INDEX) if index is None else index
+
+    def _load_index(self):
+        """Return the index entries {relative path: {'signature', 'summary'}}."""
+        try:
+            with open(self.index, 'r') as fp:
+                data = json.load(fp)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+        return data['groups'] if data.get('version') == INDEX_VERSION else {}
+
+    def _save_index(self, entries):
+        """Write the index entries atomically."""
+        tmp_path = '{:}.tmp'.format(self.index)
+        with open(tmp_path, 'w') as fp:
+            json.dump({'version': INDEX_VERSION, 'groups': entries}, fp)
+        os.replace(tmp_path, self.index)
+
+    def evaluate(self, max_workers=None, force=False, mode='greedy'):
+        """Summarize all group files and return the merged report.
+        Unchanged groups are taken from the index unless force is set.
+
+        Keyword arguments:
+        max_workers -- number of worker processes (default None for the number
+            of CPUs, 1 evaluates in this process)
+        force -- evaluate all groups (default False)
+        mode -- 'greedy' or 'minimal' balance mode (default 'greedy')
+        """
+        index = {} if force else self._load_index()
+        entries = {}
+        changed = []
+        for path in self.files():
+            name = os.path.relpath(path, self.path)
+            signature = file_signature(path)
+            entry = index.get(name)
+            if entry is not None and entry['signature'] == signature and entry['mode'] == mode:
+                entries[name] = entry
+            else:
+                entries[name] = {'signature': signature, 'mode': mode}
+                changed.append(name)
+
+        paths = [os.path.join(self.path, x) for x in changed]
+        if max_workers == 1 or len(paths) < 2:
+            summaries = _summarize_all(paths, mode)
+        else:
+            # a few chunks per worker amortize the process overhead of small groups
+            workers = max_workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                size = max(1, len(paths) // (4 * workers))
+                chunks = [paths[i:i + size] for i in range(0, len(paths), size)]
+                summaries = [x for tmp in pool.map(_summarize_all, chunks, [mode] * len(chunks))
+                             for x in tmp]
+
+        for name, summary in zip(changed, summaries):
+            entries[name]['summary'] = summary
+
+        self._save_index(entries)
+        return self.report(entries, changed)
+
+    def files(self):
+        """Return the sorted paths of the group files."""
+        index = os.path.abspath(self.index)
+        return sorted(x for x in glob.glob(os.path.join(self.path, self.pattern), recursive=True)
+                      if os.path.isfile(x) and os.path.abspath(x) != index)
+
+    @staticmethod
+    def report(entries, changed=()):
+        """Merge the group summaries of index entries into one report.
+
+        Keyword arguments:
+        entries -- dictionary of relative path -> index entry
+        changed -- relative paths evaluated in this run (default ())
+        """
+        groups, errors, turnover = {}, {}, {}
+        for name, entry in sorted(entries.items()):
+            summary = entry['summary']
+            if 'error' in summary:
+                errors[name] = summary['error']
+                continue
+
+            groups[name] = summary
+            currency = summary['currency']
+            turnover[currency] = turnover.get(currency, 0) + to_minor(summary['turnover'])
+
+        return {
+            'groups': groups,
+            'errors': errors,
+            'turnover': {k: to_major(v) for k, v in sorted(turnover.items())},
+            'evaluated': len(changed),
+            'skipped': len(entries) - len(changed)
+        }
@@ -6,7 +6,10 @@ setup(
     description='A simple python package for money pool split development.',
     author='Florian',
     author_email='polynomialchaos@gmail.com',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmark', 'benchmark.*']),
+    extras_require={
+        'numpy': ['numpy'],
+    },
     entry_points={
         "console_scripts": [
             'pySplit=pysplit.bin.pySplit:main',
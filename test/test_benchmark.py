@@ -0,0 +1,62 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+from benchmark.generator import generate_group, generate_records
+from benchmark.suite import compare, run
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_generator(self):
+
+        # Test: deterministic records
+        records = list(generate_records(100, n_members=5, fan_out=(2, 3), seed=1))
+        self.assertEqual(records, list(generate_records(100, n_members=5, fan_out=(2, 3), seed=1)))
+        self.assertNotEqual(records, list(generate_records(100, n_members=5, fan_out=(2, 3), seed=2)))
+        self.assertTrue(all(2 <= len(x['recipients']) <= 3 for x in records))
+
+        # Test: deterministic group
+        group = generate_group(100, n_members=5, seed=1)
+        self.assertEqual(group.number_of_members, 5)
+        self.assertDictEqual(group.to_dict(), generate_group(100, n_members=5, seed=1).to_dict())
+
+    def test_compare(self):
+        results = run([10], n_members=3, repeat=1, memory=False)
+        self.assertEqual(len({x['operation'] for x in results}), len(results))
+
+        # Test: regression threshold
+        baseline = [dict(x, seconds=x['seconds'] / 2.0) for x in results]
+        self.assertEqual(compare(results, results, 10.0), [])
+        self.assertEqual(len(compare(results, baseline, 10.0)), len(results))
+        self.assertEqual(compare(results, baseline, 150.0), [])
+
+        # Test: peak memory threshold, only if both runs measured it
+        results = [dict(x, peak_bytes=2000) for x in results]
+        baseline = [dict(x, peak_bytes=1000) for x in results]
+        self.assertEqual(len(compare(results, baseline, 10.0)), len(results))
+        self.assertEqual(compare(results, baseline, 10.0, memory_threshold=150.0), [])
+        self.assertEqual(compare(results, [dict(x, peak_bytes=None) for x in baseline], 10.0), [])
+
+
+if __name__ == '__main__':
+
+    unittest.main()
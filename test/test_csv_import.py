@@ -0,0 +1,93 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import csv
+import os
+import unittest
+from pysplit import Group, load_group
+from pysplit.csv_import import import_csv
+from pysplit.utils import Currency
+
+
+class TestCSVImport(unittest.TestCase):
+    path = ".pytest_cache/test_csv_import.csv"
+
+    def test_import_csv(self):
+        os.makedirs(os.path.dirname(TestCSVImport.path), exist_ok=True)
+        with open(TestCSVImport.path, 'w') as fp:
+            fp.write('Date;Text;Amount;Currency;Split\n'
+                     '01.03.2022;Bakery;1.234,50;Euro;"member_1;member_2"\n'
+                     '02.03.2022;Fuel;10,00;$;\n'
+                     '03.03.2022;Hotel;abc;Euro;\n'
+                     '2022-03-04;Taxi;5,00;Euro;\n'
+                     '05.03.2022;Bar;5,00;Euro;member_3\n'
+                     '06.03.2022;Cinema;20,00;Euro;member_2\n'
+                     '07.03.2022;Pizza;8,00;Euro;member_1;member_2\n'
+                     '08.03.2022;Kiosk;3,00\n')
+
+        group = Group("pySplit", currency=Currency.Euro)
+        group.exchange_rates[Currency.USD] = 2.0
+        group.add_member("member_1")
+        group.add_member("member_2")
+
+        # Test: mapped columns, defaults and chunks
+        n_imported, n_rejected = import_csv(
+            group, TestCSVImport.path,
+            {'date': 'Date', 'title': 'Text', 'amount': 'Amount',
+             'currency': 'Currency', 'recipients': 'Split'},
+            defaults={'purchaser': 'member_1'}, chunk_size=2, delimiter=';', decimal=',')
+        self.assertEqual((n_imported, n_rejected), (3, 5))
+        self.assertEqual([x.title for x in group._purchases], ['Bakery', 'Fuel', 'Cinema'])
+        self.assertEqual(group._purchases[0].amount, 1234.5)
+        self.assertEqual(list(group._purchases[0].recipients), ['member_1', 'member_2'])
+        self.assertEqual(group._purchases[1].currency, Currency.USD)
+        self.assertEqual(list(group._purchases[1].recipients), ['member_1', 'member_2'])
+        group.check_ledger()
+
+        # Test: rejected rows in the sidecar file
+        with open(TestCSVImport.path + '.rejected.csv', newline='') as fp:
+            rows = list(csv.DictReader(fp, delimiter=';'))
+        self.assertEqual([x['line'] for x in rows], ['4', '5', '6', '8', '9'])
+        self.assertEqual(rows[2]['Text'], 'Bar')
+        self.assertIn('member_3', rows[2]['error'])
+        self.assertIn('more fields', rows[3]['error'])
+        self.assertIn('Currency, Split', rows[4]['error'])
+
+        # Test: import into a lazy group keeps the raw records
+        eager = load_group("test/res/pysplit.json")
+        lazy = load_group("test/res/pysplit.json", lazy=True)
+        for x in (eager, lazy):
+            self.assertEqual(import_csv(
+                x, TestCSVImport.path,
+                {'date': 'Date', 'title': 'Text', 'amount': 'Amount',
+                 'currency': 'Currency', 'recipients': 'Split'},
+                defaults={'purchaser': 'member_1'}, delimiter=';', decimal=','), (3, 5))
+        self.assertIsNotNone(lazy._purchases._raw)
+        self.assertEqual(lazy.member_balances(), eager.member_balances())
+        self.assertEqual([x['title'] for x in lazy.to_dict()['purchases']],
+                         [x['title'] for x in eager.to_dict()['purchases']])
+        self.assertEqual(lazy._purchases[5].title, 'Cinema')
+        lazy.check_ledger()
+
+
+if __name__ == '__main__':
+
+    unittest.main()
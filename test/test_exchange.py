@@ -0,0 +1,106 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+import os
+from pysplit import Group, MappedGroup, load_group, stream_group
+from pysplit.utils import Currency, MissingExchangeRateError
+
+
+class TestExchange(unittest.TestCase):
+    path_1 = ".pytest_cache/test_exchange.json"
+    path_2 = ".pytest_cache/test_exchange.bin"
+
+    def test_rate_series(self):
+        group = Group("pySplit", currency=Currency.Euro)
+        group.set_exchange_rate(Currency.USD, 2.0)
+        group.add_member("member_1")
+        group.add_member("member_2")
+
+        for day in (1, 10, 20):
+            group.add_purchase("purchase_{:}".format(day), "member_1", ["member_2"],
+                               40.0, Currency.USD, "{:02d}.03.2022".format(day))
+
+        # Test: rates are valid from their date, earlier rows use the static rate
+        group.set_exchange_rate(Currency.USD, 4.0, "10.03.2022")
+        self.assertAlmostEqual(group.member_balance("member_1"), 40.0)
+        self.assertAlmostEqual(group._purchases[1].amount, 10.0)
+        self.assertAlmostEqual(group.get_exchange_rate(Currency.USD, "09.03.2022"), 2.0)
+        group.check_ledger()
+
+        group.set_exchange_rate(Currency.USD, 8.0, "15.03.2022")
+        self.assertAlmostEqual(group.member_balance("member_1"), 35.0)
+        self.assertAlmostEqual(group.member_balance("member_1", as_of="12.03.2022"), 30.0)
+        self.assertAlmostEqual(group.turnover, 35.0)
+
+        # Test: changing a rate of the series rebooks nothing
+        group.set_exchange_rate(Currency.USD, 2.0, "15.03.2022")
+        self.assertAlmostEqual(group.member_balance("member_1"), 50.0)
+        group.add_purchase("purchase_5", "member_2", ["member_1"],
+                           20.0, Currency.USD, "05.03.2022")
+        group.check_ledger()
+
+        # Test: save, load and the binary snapshot
+        dir_name = os.path.dirname(TestExchange.path_1)
+        if not os.path.exists(dir_name):
+            os.mkdir(dir_name)
+
+        group.save(TestExchange.path_1)
+        group.save_binary(TestExchange.path_2)
+        for x in (load_group(TestExchange.path_1), load_group(TestExchange.path_1, lazy=True),
+                  stream_group(TestExchange.path_1), MappedGroup(TestExchange.path_2)):
+            self.assertAlmostEqual(x.turnover, group.turnover)
+            self.assertDictEqual(x.member_balances(), group.member_balances())
+        x.close()
+
+        # Test: journal of rate changes
+        group.remove_exchange_rate(Currency.USD, "10.03.2022")
+        group.save(TestExchange.path_1, journal=True)
+        loaded = load_group(TestExchange.path_1)
+        self.assertAlmostEqual(loaded.member_balance("member_1"), 50.0)
+        loaded.check_ledger()
+        self.assertDictEqual(loaded.to_dict(), group.to_dict())
+
+        with self.assertRaises(MissingExchangeRateError):
+            group.remove_exchange_rate(Currency.USD, "10.03.2022")
+
+    def test_numpy_engine(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest('numpy is not installed')
+
+        group = Group("pySplit", currency=Currency.Euro, engine='numpy')
+        group.add_member("member_1")
+        group.add_member("member_2")
+        group.set_exchange_rate(Currency.USD, 2.0, "01.03.2022")
+        group.set_exchange_rate(Currency.USD, 4.0, "10.03.2022")
+        for day in (1, 10, 20):
+            group.add_purchase("purchase_{:}".format(day), "member_1", ["member_2"],
+                               40.0, Currency.USD, "{:02d}.03.2022".format(day))
+
+        self.assertAlmostEqual(group.member_balances()["member_1"], 40.0)
+        self.assertDictEqual(group.member_balances(), group.compute_member_balances())
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -22,8 +22,9 @@
 import unittest
 import json
 import os
-from pysplit import Group
-from pysplit.utils import Currency, TimeStamp
+from pysplit import Group, load_group, stream_group
+from pysplit.group import load_entry, load_purchase
+from pysplit.utils import Currency, InvalidMemberError, InvalidRecordError, TimeStamp
 
 
 class TestGroup(unittest.TestCase):
@@ -91,6 +92,213 @@ class TestGroup(unittest.TestCase):
 
                 self.assertDictEqual(json_1, json_2)
 
+    def test_ledger(self):
+        group = Group("pySplit", currency=Currency.Euro)
+        group.exchange_rates[Currency.USD] = 2.0
+        group.add_member("member_1")
+        group.add_member("member_2")
+
+        # Test: booking of purchases and transfers
+        purchase = group.add_purchase("purchase_1", "member_1",
+                                      ["member_1", "member_2"],
+                                      100.0, Currency.Euro, TimeStamp())
+        group.add_purchase("purchase_2", "member_2", ["member_1"],
+                           40.0, Currency.USD, TimeStamp())
+        group.add_transfer("transfer_1", "member_2", "member_1",
+                           10.0, Currency.Euro, TimeStamp())
+        group.check_ledger()
+        self.assertAlmostEqual(group.get_member_by_name("member_1").balance, 20.0)
+        self.assertAlmostEqual(group.get_member_by_name("member_2").balance, -20.0)
+
+        # Test: exchange rate change
+        group.exchange_rates[Currency.USD] = 4.0
+        group.check_ledger()
+        self.assertAlmostEqual(group.get_member_by_name("member_1").balance, 30.0)
+
+        # Test: rebooking on modification
+        purchase.amount = 50.0
+        purchase.recipients = ["member_2"]
+        purchase.currency = Currency.USD
+        group.check_ledger()
+        self.assertAlmostEqual(group.get_member_by_name("member_1").balance, -7.5)
+
+    def test_minor_units(self):
+        group = Group("pySplit", currency=Currency.Euro)
+        for name in ("member_1", "member_2", "member_3"):
+            group.add_member(name)
+
+        # Test: remainders of the split go to the first recipients
+        purchase = group.add_purchase("purchase_1", "member_1",
+                                      ["member_1", "member_2", "member_3"],
+                                      100.0, Currency.Euro, "01.03.2022")
+        self.assertDictEqual(purchase.get_amount_per_member(),
+                             {"member_1": 33.34, "member_2": 33.33, "member_3": 33.33})
+        self.assertDictEqual(group.member_balances(),
+                             {"member_1": 66.66, "member_2": -33.33, "member_3": -33.33})
+
+        # Test: exact balances without phantom settlements
+        for i in range(10):
+            group.add_purchase("purchase_2", "member_2", ["member_3"],
+                               0.1, Currency.Euro, "02.03.2022")
+        group.add_purchase("purchase_3", "member_3", ["member_2"],
+                           1.0, Currency.Euro, "02.03.2022")
+        group.add_transfer("transfer_1", "member_2", "member_1",
+                           33.33, Currency.Euro, "03.03.2022")
+        group.add_transfer("transfer_2", "member_3", "member_1",
+                           33.33, Currency.Euro, "03.03.2022")
+        self.assertEqual(sum(group.member_balances().values()), 0.0)
+        self.assertEqual([(x.purchaser.name, x.amount) for x in group.balances()], [])
+        group.check_ledger()
+        self.assertEqual(group.to_dict()["purchases"][1]["amount"], 0.1)
+
+        # Test: purchases without recipients are rejected
+        with self.assertRaises(InvalidRecordError):
+            group.add_purchase("purchase_4", "member_1", [],
+                               5.0, Currency.Euro, "04.03.2022")
+        with self.assertRaises(InvalidRecordError):
+            group.update_purchase(0, recipients=[])
+        with self.assertRaises(InvalidRecordError):
+            group.add_purchases_bulk([{"title": "purchase_4", "purchaser": "member_1",
+                                       "recipients": [], "amount": 5.0,
+                                       "currency": Currency.Euro, "date": "04.03.2022"}])
+        self.assertEqual(len(group._purchases), 12)
+        self.assertEqual(len(purchase.recipients), 3)
+        group.check_ledger()
+        self.assertAlmostEqual(group.member_balance("member_1"), 0.0)
+
+    def test_remove(self):
+        group = Group("pySplit", currency=Currency.Euro)
+        group.add_member("member_1")
+        group.add_member("member_2")
+        group.add_member("member_3")
+
+        purchase_1 = group.add_purchase("purchase_1", "member_1", ["member_2"],
+                                        30.0, Currency.Euro, "01.03.2022")
+        purchase_2 = group.add_purchase("purchase_2", "member_2", ["member_1"],
+                                        10.0, Currency.Euro, "02.03.2022")
+        transfer = group.add_transfer("transfer_1", "member_2", "member_1",
+                                      5.0, Currency.Euro, "03.03.2022")
+        self.assertEqual(list(group.query(recipient="member_2")), [purchase_1])
+
+        # Test: update by record id
+        group.update_purchase(purchase_1.record_id, recipients=["member_2", "member_3"])
+        group.update_transfer(transfer.record_id, recipient="member_3")
+        self.assertEqual(list(group.query(recipient="member_3")), [purchase_1])
+        group.check_ledger()
+        self.assertAlmostEqual(group.member_balance("member_3"), -20.0)
+
+        # Test: remove by record id keeps the other ids stable
+        group.remove_purchase(purchase_1.record_id)
+        group.remove_transfer(transfer.record_id)
+        group.check_ledger()
+        self.assertAlmostEqual(group.member_balance("member_1"), -10.0)
+        self.assertAlmostEqual(group.turnover, 10.0)
+        self.assertEqual(list(group._purchases), [purchase_2])
+        self.assertEqual(group._purchases[purchase_2.record_id].title, "purchase_2")
+        self.assertEqual(list(group.query(recipient="member_3", kind=None)), [])
+        self.assertEqual(len(group.to_dict()["purchases"]), 1)
+        with self.assertRaises(IndexError):
+            group.remove_purchase(purchase_1.record_id)
+
+        # Test: the record ids are kept across save and load
+        purchase_3 = group.add_purchase("purchase_3", "member_3", ["member_1"],
+                                        7.0, Currency.Euro, "04.03.2022")
+        purchase_4 = group.add_purchase("purchase_4", "member_1", ["member_3"],
+                                        3.0, Currency.Euro, "05.03.2022")
+        group.remove_purchase(purchase_4.record_id)
+        group.save(TestGroup.path_2)
+        for loaded in (load_group(TestGroup.path_2), load_group(TestGroup.path_2, lazy=True),
+                       stream_group(TestGroup.path_2)):
+            self.assertEqual(loaded._purchases[purchase_3.record_id].title, "purchase_3")
+            self.assertEqual(loaded.to_dict(), group.to_dict())
+            with self.assertRaises(IndexError):
+                loaded.remove_purchase(purchase_1.record_id)
+            loaded.remove_purchase(purchase_2.record_id)
+            self.assertEqual(list(loaded._purchases)[0].title, "purchase_3")
+            purchase_5 = loaded.add_purchase("purchase_5", "member_1", ["member_2"],
+                                             1.0, Currency.Euro, "06.03.2022")
+            self.assertEqual(purchase_5.record_id, purchase_4.record_id + 1)
+            loaded.check_ledger()
+
+        # Test: the journal keeps the ids of removed records
+        loaded = load_group(TestGroup.path_2)
+        purchase_5 = loaded.add_purchase("purchase_5", "member_1", ["member_2"],
+                                         1.0, Currency.Euro, "06.03.2022")
+        purchase_6 = loaded.add_purchase("purchase_6", "member_2", ["member_1"],
+                                         2.0, Currency.Euro, "07.03.2022")
+        loaded.remove_purchase(purchase_5.record_id)
+        loaded.save(TestGroup.path_2, journal=True)
+        self.assertTrue(os.path.exists(TestGroup.path_2 + ".journal"))
+        reloaded = load_group(TestGroup.path_2)
+        self.assertEqual(reloaded._purchases[purchase_6.record_id].title, "purchase_6")
+        self.assertEqual(reloaded.to_dict(), loaded.to_dict())
+
+    def test_bulk(self):
+        group = Group("pySplit", currency=Currency.Euro)
+        group.exchange_rates[Currency.USD] = 2.0
+        group.add_member("member_1")
+        group.add_member("member_2")
+
+        # Test: batch insert matches the single inserts
+        records = [{"title": "purchase_{:}".format(i), "purchaser": "member_1",
+                    "recipients": ["member_1", "member_2"], "amount": 10.0 * i,
+                    "currency": "USD" if i % 2 else Currency.Euro,
+                    "date": "0{:}.03.2022".format(i + 1)} for i in range(5)]
+        ids = group.add_purchases_bulk(iter(records))
+        self.assertEqual(list(ids), [0, 1, 2, 3, 4])
+        group.add_transfers_bulk([{"title": "transfer_1", "purchaser": "member_2",
+                                   "recipient": "member_1", "amount": 5.0,
+                                   "currency": "Euro", "date": "01.04.2022"}])
+        group.check_ledger()
+        self.assertAlmostEqual(group.member_balance("member_1"), 35.0)
+        self.assertEqual(group._purchases[4].currency, Currency.Euro)
+
+        # Test: all invalid records in one error
+        records = [dict(records[0], purchaser="member_3"), records[1],
+                   dict(records[2], recipients=["member_4"]), dict(records[3], date="x"),
+                   dict(records[4], recipients=[]), ["purchase_5"], 5]
+        with self.assertRaises(InvalidRecordError) as context:
+            group.add_purchases_bulk(records)
+        self.assertEqual([x[0] for x in context.exception.args[1]], [0, 2, 3, 4, 5, 6])
+        self.assertEqual(len(group._purchases), 5)
+
+        # Test: loaded records that are not dictionaries
+        for x in (["purchase_5"], 5):
+            with self.assertRaises(InvalidRecordError):
+                load_purchase(group, x)
+            with self.assertRaises(InvalidRecordError):
+                load_entry(group, x)
+            with self.assertRaises(InvalidRecordError):
+                group._purchases.extend([x], lazy=True)
+        self.assertEqual(len(group._purchases), 5)
+
+    def test_lazy(self):
+        eager = load_group(TestGroup.path_1)
+        group = load_group(TestGroup.path_1, lazy=True)
+
+        # Test: aggregates from the raw records
+        self.assertIsNotNone(group._purchases._raw)
+        self.assertAlmostEqual(group.turnover, eager.turnover)
+        self.assertEqual(group.member_balances(), eager.member_balances())
+        self.assertDictEqual(group.to_dict(), eager.to_dict())
+        self.assertIsNotNone(group._purchases._raw)
+
+        # Test: appending keeps the table lazy
+        group.add_purchase("purchase_4", "member_2", ["member_1"],
+                           10.0, Currency.Euro, "24.06.2021")
+        self.assertEqual(len(group._purchases), 4)
+        self.assertIsNotNone(group._purchases._raw)
+        with self.assertRaises(InvalidMemberError):
+            group.add_purchase("purchase_5", "member_3", ["member_1"],
+                               10.0, Currency.Euro, "24.06.2021")
+
+        # Test: row access creates the columns
+        self.assertEqual(group._purchases[3].title, "purchase_4")
+        self.assertIsNone(group._purchases._raw)
+        self.assertEqual([p.title for p in group._purchases][:3],
+                         [p.title for p in eager._purchases])
+        group.check_ledger()
+
 
 if __name__ == '__main__':
 
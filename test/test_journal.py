@@ -0,0 +1,119 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+import os
+from pysplit import Group, load_group, stream_group
+from pysplit.utils import Currency, TimeStamp
+
+
+class TestJournal(unittest.TestCase):
+    path = ".pytest_cache/test_journal.json"
+
+    def setUp(self):
+        dir_name = os.path.dirname(TestJournal.path)
+        if not os.path.exists(dir_name):
+            os.mkdir(dir_name)
+
+        for path in [TestJournal.path, TestJournal.path + '.journal']:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def read(self, path):
+        with open(path, 'r') as fp:
+            return fp.read()
+
+    def test_journal(self):
+        path = TestJournal.path
+        journal_path = path + '.journal'
+
+        # Test: the first save writes a snapshot
+        group = Group("pySplit", currency=Currency.Euro)
+        group.add_member("member_1")
+        group.add_member("member_2")
+        group.save(path, journal=True)
+        self.assertFalse(os.path.exists(journal_path))
+        snapshot = self.read(path)
+
+        # Test: mutations are appended to the journal
+        group = load_group(path)
+        group.exchange_rates[Currency.USD] = 1.19
+        group.add_member("member_3")
+        group.add_purchase("purchase_1", "member_1", ["member_2", "member_3"],
+                           30.0, Currency.USD, TimeStamp("01.03.2022"))
+        group.add_transfer("transfer_1", "member_2", "member_1",
+                           10.0, Currency.Euro, TimeStamp("02.03.2022"))
+        group.save(path, journal=True)
+        group.description = "A Python package for money pool split development."
+        group.save(path, journal=True)
+        self.assertEqual(snapshot, self.read(path))
+        self.assertEqual(len(self.read(journal_path).splitlines()), 6)
+
+        # Test: loading replays the journal
+        for loaded in [load_group(path), stream_group(path)]:
+            self.assertDictEqual(group.to_dict(), loaded.to_dict())
+            self.assertDictEqual(group.member_balances(), loaded.member_balances())
+
+        # Test: changes of saved rows require a new snapshot
+        group = load_group(path)
+        group._purchases[0].amount = 60.0
+        group.save(path, journal=True)
+        self.assertFalse(os.path.exists(journal_path))
+        self.assertDictEqual(group.to_dict(), load_group(path).to_dict())
+
+        # Test: compact
+        del group.exchange_rates[Currency.USD]
+        group.add_purchase("purchase_2", "member_1", ["member_2"],
+                           30.0, Currency.Euro, TimeStamp("03.03.2022"))
+        group.save(path, journal=True)
+        self.assertTrue(os.path.exists(journal_path))
+        self.assertDictEqual(group.to_dict(), load_group(path).to_dict())
+        group.compact()
+        self.assertFalse(os.path.exists(journal_path))
+        self.assertDictEqual(group.to_dict(), load_group(path).to_dict())
+
+        # Test: a torn last line is ignored by readers and removed before the next append
+        with open(journal_path, 'a') as fp:
+            fp.write('{"op": "purchase", "purch')
+        journal = self.read(journal_path)
+        group = load_group(path)
+        self.assertEqual(len(group._purchases), 2)
+        self.assertEqual(len(stream_group(path)._purchases), 2)
+        self.assertEqual(self.read(journal_path), journal)
+        group.add_purchase("purchase_3", "member_2", ["member_1"],
+                           10.0, Currency.Euro, TimeStamp("04.03.2022"))
+        group.save(path, journal=True)
+        loaded = load_group(path)
+        self.assertEqual([x.title for x in loaded._purchases],
+                         ["purchase_1", "purchase_2", "purchase_3"])
+        self.assertDictEqual(group.to_dict(), loaded.to_dict())
+
+        # Test: a journal of an older snapshot is ignored
+        group.add_member("member_4")
+        group.save(path, journal=True)
+        with open(path, 'a') as fp:
+            fp.write('\n')
+        self.assertEqual(load_group(path).number_of_members, 3)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,73 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+import os
+from pysplit import load_group, MappedGroup
+from pysplit.utils import Currency
+
+
+class TestMapped(unittest.TestCase):
+    path_1 = "test/res/pysplit.json"
+    path_2 = ".pytest_cache/test_mapped.bin"
+
+    def test_mapped_group(self):
+        dir_name = os.path.dirname(TestMapped.path_2)
+        if not os.path.exists(dir_name):
+            os.mkdir(dir_name)
+
+        group = load_group(TestMapped.path_1)
+        group.add_member("member_3")
+        group.add_purchase("purchase_4", "member_3", ["member_1", "member_3"],
+                           30.0, Currency.Euro, group._purchases[0].date)
+        group.save_binary(TestMapped.path_2)
+
+        # Test: read-only queries of the mapped snapshot
+        with MappedGroup(TestMapped.path_2) as mapped:
+            self.assertEqual(mapped.name, group.name)
+            self.assertEqual(mapped.description, group.description)
+            self.assertEqual(mapped.currency, group.currency)
+            self.assertDictEqual(mapped.exchange_rates, group.exchange_rates)
+            self.assertListEqual(mapped.members, list(group._members))
+            self.assertEqual(mapped.number_of_members, 3)
+            self.assertAlmostEqual(mapped.turnover, group.turnover)
+
+            expected = group.member_balances()
+            for name, x in mapped.member_balances().items():
+                self.assertAlmostEqual(x, expected[name])
+            self.assertAlmostEqual(mapped.member_balance("member_3"), 15.0)
+
+            expected = group.balances(mode='minimal')
+            actual = mapped.balances(mode='minimal')
+            self.assertEqual(len(expected), len(actual))
+            for x, (sender, receiver, amount) in zip(expected, actual):
+                self.assertEqual(x.purchaser.name, sender)
+                self.assertAlmostEqual(x.amount, amount)
+
+        # Test: invalid files
+        with open(TestMapped.path_2, 'wb') as fp:
+            fp.write(bytes(256))
+        self.assertRaises(ValueError, MappedGroup, TestMapped.path_2)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,102 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import os
+import unittest
+import pysplit
+from pysplit import Group, disable_profiling, enable_profiling, profiling_enabled
+from pysplit import load_group, stream_group
+from pysplit.member import Member
+from pysplit.utils import Currency, TimeStamp
+
+
+class TestProfiling(unittest.TestCase):
+    path = ".pytest_cache/test_profiling.json"
+
+    def test_profiling(self):
+        exchange = Group.__dict__['exchange']
+        balance = Member.__dict__['balance']
+
+        group = Group("pySplit", currency=Currency.Euro)
+        group.exchange_rates[Currency.USD] = 2.0
+        group.add_member("member_1")
+        group.add_member("member_2")
+        self.assertFalse(profiling_enabled())
+
+        try:
+            enable_profiling()
+            self.assertTrue(profiling_enabled())
+            purchase = group.add_purchase("purchase_1", "member_1", ["member_1", "member_2"],
+                                          100.0, Currency.USD, TimeStamp())
+            purchase.amount
+            group.get_member_by_name("member_1").balance
+            group.balances()
+
+            os.makedirs(os.path.dirname(TestProfiling.path), exist_ok=True)
+            group.save(TestProfiling.path)
+            loaded = load_group(TestProfiling.path)
+            streamed = stream_group(TestProfiling.path)
+            self.assertIs(pysplit.load_group, load_group)
+        finally:
+            disable_profiling()
+
+        # Test: recorded operations
+        stats = group.stats()
+        self.assertEqual(stats['add_purchase']['calls'], 1)
+        self.assertEqual(stats['Purchase.amount']['calls'], 1)
+        self.assertEqual(stats['Member.balance']['calls'], 1)
+        self.assertEqual(stats['save']['calls'], 1)
+        self.assertGreater(stats['exchange']['calls'], 0)
+        self.assertGreaterEqual(stats['balances']['seconds'], 0.0)
+        self.assertEqual(loaded.stats()['load_group']['calls'], 1)
+        self.assertEqual(streamed.stats()['stream_group']['calls'], 1)
+
+        # Test: the disabled state restores the original operations
+        self.assertIs(Group.__dict__['exchange'], exchange)
+        self.assertIs(Member.__dict__['balance'], balance)
+        group.balances()
+        self.assertEqual(group.stats(), stats)
+
+    def test_group_profiling(self):
+        exchange = Group.__dict__['exchange']
+        group_1 = Group("pySplit", currency=Currency.Euro)
+        group_2 = Group("pySplit", currency=Currency.Euro)
+
+        # Test: only the operations of the profiled group are recorded
+        try:
+            enable_profiling(group_1)
+            self.assertTrue(profiling_enabled(group_1))
+            self.assertFalse(profiling_enabled(group_2))
+            self.assertFalse(profiling_enabled())
+            for group in (group_1, group_2):
+                group.add_member("member_1")
+                group.member_balances()
+        finally:
+            disable_profiling(group_1)
+
+        self.assertEqual(group_1.stats()['add_member']['calls'], 1)
+        self.assertEqual(group_2.stats(), {})
+        self.assertIs(Group.__dict__['exchange'], exchange)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
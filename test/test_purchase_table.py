@@ -0,0 +1,79 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+from pysplit import Group
+from pysplit.balance import Balance
+from pysplit.purchase import Purchase
+from pysplit.utils import Currency, InvalidMemberError, TimeStamp
+
+
+class TestPurchaseTable(unittest.TestCase):
+
+    def test_table(self):
+        group = Group("pySplit", currency=Currency.Euro)
+        for name in ["member_1", "member_2", "member_3"]:
+            group.add_member(name)
+
+        # Test: append and views
+        purchase_1 = group.add_purchase("purchase_1", "member_1",
+                                        ["member_1", "member_2"],
+                                        90.0, Currency.Euro, TimeStamp("01.03.2022"))
+        purchase_2 = group.add_purchase("purchase_2", "member_2", ["member_3"],
+                                        30.0, Currency.Euro, TimeStamp("02.03.2022"))
+        self.assertEqual(len(group._purchases), 2)
+        self.assertEqual(purchase_1, group._purchases[0])
+        self.assertNotEqual(purchase_1, purchase_2)
+        self.assertListEqual(list(group._purchases), [purchase_1, purchase_2])
+        self.assertRaises(IndexError, group._purchases.__getitem__, 2)
+        self.assertEqual(purchase_1.number_of_recipients, 2)
+        self.assertEqual(str(purchase_2.date), "02.03.2022")
+
+        # Test: updates of the first row shift the following recipients
+        purchase_1.recipients = ["member_1", "member_2", "member_3"]
+        purchase_1.set_time("02.03.2022 12:00:00")
+        self.assertListEqual(list(purchase_1.recipients), ["member_1", "member_2", "member_3"])
+        self.assertListEqual(list(purchase_2.recipients), ["member_3"])
+        self.assertEqual(str(purchase_1.stamp), "02.03.2022 12:00:00")
+        group.check_ledger()
+        self.assertAlmostEqual(group.get_member_by_name("member_3").balance, -60.0)
+
+        # Test: invalid updates keep the row booked
+        self.assertRaises(InvalidMemberError, setattr, purchase_2, "purchaser", "member_4")
+        self.assertRaises(InvalidMemberError, group.add_purchase, "purchase_3", "member_1",
+                          ["member_4"], 10.0, Currency.Euro, TimeStamp())
+        self.assertEqual(len(group._purchases), 2)
+        group.check_ledger()
+
+        # Test: detached purchases and balances are not booked
+        Purchase(group, "purchase_3", "member_1", ["member_2"], 10.0, Currency.Euro, TimeStamp())
+        balance = Balance(group, "member_3", "member_1", 60.0, Currency.Euro, TimeStamp())
+        self.assertEqual(balance.purchaser.name, "member_3")
+        self.assertAlmostEqual(group.get_member_by_name("member_3").balance, -60.0)
+
+        balance.to_transfer()
+        self.assertAlmostEqual(group.get_member_by_name("member_3").balance, 0.0)
+        self.assertAlmostEqual(group.turnover, 120.0)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
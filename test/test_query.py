@@ -0,0 +1,73 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+from pysplit import Group
+from pysplit.utils import Currency, InvalidMemberError
+
+
+class TestQuery(unittest.TestCase):
+
+    def test_query(self):
+        group = Group("pySplit", currency=Currency.Euro)
+        group.exchange_rates[Currency.USD] = 2.0
+        for name in ("member_1", "member_2", "member_3"):
+            group.add_member(name)
+
+        group.add_purchase("purchase_1", "member_1", ["member_2"],
+                           10.0, Currency.USD, "01.03.2022")
+        group.add_purchase("purchase_2", "member_1", ["member_1", "member_3"],
+                           10.0, Currency.Euro, "15.03.2022")
+        group.add_purchase("purchase_3", "member_2", ["member_1"],
+                           10.0, Currency.USD, "01.04.2022")
+        group.add_transfer("transfer_1", "member_1", "member_2",
+                           10.0, Currency.USD, "02.03.2022")
+
+        def titles(**kwargs):
+            return sorted(x.title for x in group.query(**kwargs))
+
+        # Test: filters
+        self.assertEqual(titles(), ["purchase_1", "purchase_2", "purchase_3"])
+        self.assertEqual(titles(purchaser="member_1"), ["purchase_1", "purchase_2"])
+        self.assertEqual(titles(recipient="member_1"), ["purchase_2", "purchase_3"])
+        self.assertEqual(titles(purchaser="member_1", currency=Currency.USD,
+                                date_from="01.03.2022", date_to="31.03.2022"), ["purchase_1"])
+        self.assertEqual(titles(date_to="15.03.2022"), ["purchase_1", "purchase_2"])
+        self.assertEqual(titles(currency=Currency.USD, kind=None),
+                         ["purchase_1", "purchase_3", "transfer_1"])
+        self.assertEqual(titles(recipient="member_2", kind="transfer"), ["transfer_1"])
+        with self.assertRaises(InvalidMemberError):
+            titles(purchaser="member_4")
+
+        # Test: indexes follow inserts and updates
+        group.add_purchase("purchase_4", "member_3", ["member_1"],
+                           10.0, Currency.USD, "10.03.2022")
+        group._purchases[0].purchaser = "member_3"
+        group._purchases[1].recipients = ["member_2"]
+        self.assertEqual(titles(purchaser="member_3"), ["purchase_1", "purchase_4"])
+        self.assertEqual(titles(recipient="member_1"), ["purchase_3", "purchase_4"])
+        self.assertEqual(titles(date_from="05.03.2022", date_to="31.03.2022"),
+                         ["purchase_2", "purchase_4"])
+
+
+if __name__ == '__main__':
+
+    unittest.main()
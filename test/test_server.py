@@ -0,0 +1,101 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+import asyncio
+import json
+import os
+import shutil
+from pysplit import load_group
+from pysplit.server import GroupServer
+
+
+async def request(port, method, target, data=None):
+    """Send one HTTP request and return the status and the JSON payload."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = b'' if data is None else json.dumps(data).encode('utf-8')
+    writer.write('{:} {:} HTTP/1.1\r\nContent-Length: {:}\r\nConnection: close\r\n\r\n'.format(
+        method, target, len(body)).encode('latin-1') + body)
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+class TestServer(unittest.TestCase):
+    path_1 = "test/res/pysplit.json"
+    path_2 = ".pytest_cache/test_server"
+
+    def setUp(self):
+        shutil.rmtree(TestServer.path_2, ignore_errors=True)
+        os.makedirs(TestServer.path_2)
+        for name in ("trip", "team"):
+            load_group(TestServer.path_1).save(os.path.join(TestServer.path_2, name + ".json"))
+
+    def test_server(self):
+        path = os.path.join(TestServer.path_2, "trip.json")
+
+        async def run():
+            server = GroupServer(TestServer.path_2, save_delay=0.2)
+            port = await server.start(port=0)
+
+            # Test: summary and errors
+            status, data = await request(port, "GET", "/groups/trip")
+            self.assertEqual((status, data["purchases"]), (200, 3))
+            self.assertEqual((await request(port, "GET", "/groups/unknown"))[0], 404)
+            self.assertEqual((await request(port, "GET", "/groups/..%2Fx"))[0], 404)
+            self.assertEqual((await request(port, "POST", "/groups/trip/members", {}))[0], 400)
+
+            # Test: concurrent mutations are coalesced into one save
+            status, _ = await request(port, "POST", "/groups/trip/members", {"name": "member_3"})
+            self.assertEqual(status, 201)
+            results = await asyncio.gather(*(request(port, "POST", "/groups/trip/purchases", {
+                "title": "purchase", "purchaser": "member_3", "recipients": ["member_1"],
+                "amount": 1.0, "currency": "Euro", "date": "24.06.2021"}) for _ in range(20)))
+            self.assertEqual(sorted(x[1]["record_id"] for x in results), list(range(3, 23)))
+            self.assertEqual(len(load_group(path)._purchases), 3)
+
+            await asyncio.sleep(0.5)
+            self.assertEqual(len(load_group(path)._purchases), 23)
+            with open(path + ".journal", 'r') as fp:
+                self.assertEqual(len(fp.readlines()), 22)
+
+            status, data = await request(port, "GET", "/groups/trip/balances?mode=minimal")
+            self.assertEqual(status, 200)
+            self.assertAlmostEqual(data["balances"]["member_3"], 20.0)
+
+            # Test: idle groups are saved and evicted above the memory limit
+            server.memory_limit = 0
+            await request(port, "POST", "/groups/trip/members", {"name": "member_4"})
+            await request(port, "GET", "/groups/team")
+            self.assertEqual(list(server._groups), ["team"])
+            self.assertIn("member_4", load_group(path)._members)
+
+            await server.close()
+
+        asyncio.run(run())
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,112 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+import random
+from pysplit import Group
+from pysplit.settlement import settle, settle_minimal
+from pysplit.utils import Currency, TimeStamp
+
+
+class TestSettlement(unittest.TestCase):
+
+    def test_settle(self):
+        # Test: random zero-sum balances
+        rng = random.Random(0)
+        balances = {'member_{:}'.format(i): rng.uniform(-100.0, 100.0)
+                    for i in range(50)}
+        balances['member_0'] -= sum(balances.values())
+
+        transfers = settle(balances)
+        self.assertTrue(len(transfers) <= len(balances) - 1)
+
+        remaining = dict(balances)
+        for sender, receiver, amount in transfers:
+            self.assertTrue(amount > 0.0)
+            remaining[sender] += amount
+            remaining[receiver] -= amount
+
+        for x in remaining.values():
+            self.assertAlmostEqual(x, 0.0)
+
+        # Test: top_k
+        top = settle(balances, top_k=3)
+        self.assertEqual(len(top), 3)
+        self.assertListEqual(
+            [x[2] for x in top], sorted((x[2] for x in transfers), reverse=True)[:3])
+
+        # Test: settled balances
+        self.assertListEqual(settle({'member_0': 0.0, 'member_1': 1e-12}), [])
+
+    def test_settle_minimal(self):
+        # Test: two independent zero-sum subsets
+        balances = {'member_1': 10.0, 'member_2': -15.0, 'member_3': 2.0,
+                    'member_4': -16.0, 'member_5': 6.0, 'member_6': -11.0,
+                    'member_7': 24.0}
+        self.assertEqual(len(settle(balances)), 6)
+        transfers = settle_minimal(balances)
+        self.assertEqual(len(transfers), 5)
+
+        remaining = dict(balances)
+        for sender, receiver, amount in transfers:
+            remaining[sender] += amount
+            remaining[receiver] -= amount
+
+        for x in remaining.values():
+            self.assertAlmostEqual(x, 0.0)
+
+        # Test: opposite balances and rounding residuals
+        balances = {'member_{:}'.format(i): x for i, x in
+                    enumerate([1.0 / 3.0, -1.0 / 3.0, 12.5, -12.5, 0.0])}
+        self.assertEqual(len(settle_minimal(balances)), 2)
+
+        # Test: heuristic fallback
+        rng = random.Random(0)
+        balances = {'member_{:}'.format(i): round(rng.uniform(-100.0, 100.0), 2)
+                    for i in range(30)}
+        balances['member_0'] -= sum(balances.values())
+        self.assertTrue(len(settle_minimal(balances, time_budget=0.0)) < 30)
+        self.assertTrue(len(settle_minimal(balances, max_exact=40, time_budget=0.0)) < 30)
+
+    def test_group_balances(self):
+        group = Group("pySplit", currency=Currency.Euro)
+        for name in ["member_1", "member_2", "member_3"]:
+            group.add_member(name)
+
+        group.add_purchase("purchase_1", "member_1",
+                           ["member_1", "member_2", "member_3"],
+                           90.0, Currency.Euro, TimeStamp())
+
+        balances = group.balances()
+        self.assertEqual(len(balances), 2)
+        for balance in balances:
+            self.assertNotEqual(balance.purchaser.name, "member_1")
+            self.assertEqual(list(balance.recipients.keys()), ["member_1"])
+            self.assertAlmostEqual(balance.amount, 30.0)
+
+        self.assertEqual(len(group.balances(top_k=1)), 1)
+        self.assertEqual(len(group.balances(mode='minimal')), 2)
+        self.assertRaises(ValueError, group.balances, mode='optimal')
+
+
+if __name__ == '__main__':
+
+    unittest.main()
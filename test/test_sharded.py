@@ -0,0 +1,90 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+import os
+import shutil
+from pysplit import Group, ShardedGroup, load_group
+from pysplit.utils import Currency
+
+
+class TestSharded(unittest.TestCase):
+    path = ".pytest_cache/test_sharded"
+
+    def test_sharded(self):
+        shutil.rmtree(TestSharded.path, ignore_errors=True)
+
+        group = Group("pySplit", currency=Currency.Euro)
+        group.set_exchange_rate(Currency.USD, 2.0)
+        group.set_exchange_rate(Currency.USD, 4.0, "01.01.2021")
+        for name in ("member_1", "member_2", "member_3"):
+            group.add_member(name)
+        for i in range(12):
+            group.add_purchase("purchase_{:}".format(i), "member_{:}".format(i % 3 + 1),
+                               ["member_1", "member_2", "member_3"], 10.0 * (i + 1),
+                               Currency.USD if i % 2 else Currency.Euro,
+                               "01.06.{:}".format(2019 + i % 4))
+        group.add_transfer("transfer_1", "member_2", "member_1",
+                           5.0, Currency.Euro, "01.01.2020")
+
+        # Test: reduce over the partials of the yearly shards
+        sharded = ShardedGroup.from_group(group, TestSharded.path, max_workers=2)
+        self.assertEqual(sharded.shards(), ["2019", "2020", "2021", "2022"])
+        self.assertDictEqual(sharded.member_balances(), group.member_balances())
+        self.assertAlmostEqual(sharded.turnover, group.turnover)
+
+        # Test: the partials of the saved shards are read from the index
+        sharded = ShardedGroup(TestSharded.path, max_workers=2)
+        self.assertEqual(sharded.refresh(), [])
+        self.assertEqual([(x.purchaser.name, x.amount) for x in sharded.balances()],
+                         [(x.purchaser.name, x.amount) for x in group.balances()])
+
+        # Test: an append only changes the shard of its date
+        for x in (group, sharded):
+            x.add_purchase("purchase_12", "member_3", ["member_1"],
+                           7.0, Currency.USD, "02.06.2021")
+        self.assertDictEqual(sharded.member_balances(), group.member_balances())
+        sharded.save()
+        self.assertEqual(sharded.refresh(), [])
+
+        shard = load_group(os.path.join(TestSharded.path, "2020.json"))
+        shard.add_purchase("purchase_13", "member_1", ["member_2"],
+                           3.0, Currency.Euro, "02.06.2020")
+        shard.save(os.path.join(TestSharded.path, "2020.json"), journal=True)
+        group.add_purchase("purchase_13", "member_1", ["member_2"],
+                           3.0, Currency.Euro, "02.06.2020")
+        sharded = ShardedGroup(TestSharded.path, max_workers=1)
+        self.assertEqual(sharded.refresh(), ["2020"])
+        self.assertDictEqual(sharded.member_balances(), group.member_balances())
+
+        # Test: a new rate period is applied to all shards
+        sharded.max_workers = 2
+        for x in (group, sharded):
+            x.set_exchange_rate(Currency.USD, 5.0, "01.01.2022")
+            x.add_member("member_4")
+        self.assertEqual(sharded.refresh(), ["2019", "2020", "2021", "2022"])
+        self.assertDictEqual(sharded.member_balances(), group.member_balances())
+        self.assertAlmostEqual(sharded.turnover, group.turnover)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
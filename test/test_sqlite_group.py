@@ -0,0 +1,140 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+import json
+import os
+from pysplit import Group, load_group, SQLiteGroup
+from pysplit.utils import Currency, DuplicateMemberError, InvalidMemberError, TimeStamp
+
+
+class TestSQLiteGroup(unittest.TestCase):
+    path_1 = "test/res/pysplit.json"
+    path_2 = ".pytest_cache/test_sqlite_group.db"
+    path_3 = ".pytest_cache/test_sqlite_group.json"
+
+    def setUp(self):
+        dir_name = os.path.dirname(TestSQLiteGroup.path_2)
+        if not os.path.exists(dir_name):
+            os.mkdir(dir_name)
+
+        if os.path.exists(TestSQLiteGroup.path_2):
+            os.remove(TestSQLiteGroup.path_2)
+
+    def test_sqlite_group(self):
+        # Test: lossless import and export
+        with SQLiteGroup(TestSQLiteGroup.path_2) as db:
+            db.load_json(TestSQLiteGroup.path_1)
+            db.save(TestSQLiteGroup.path_3)
+
+        with open(TestSQLiteGroup.path_1, 'r') as fp_1:
+            with open(TestSQLiteGroup.path_3, 'r') as fp_2:
+                self.assertDictEqual(json.load(fp_1), json.load(fp_2))
+
+        # Test: aggregates match the in-memory group
+        group = load_group(TestSQLiteGroup.path_1)
+        with SQLiteGroup(TestSQLiteGroup.path_2) as db:
+            self.assertEqual(str(db), str(group))
+            self.assertEqual(db.number_of_members, 2)
+            self.assertAlmostEqual(db.turnover, group.turnover)
+            self.assertAlmostEqual(db.member_balance("member_2"),
+                                   group.get_member_by_name("member_2").balance)
+
+            # Test: modifications
+            db.add_member("member_3")
+            group.add_member("member_3")
+            for x in [db, group]:
+                x.add_purchase("purchase_4", "member_3", ["member_1", "member_3"],
+                               30.0, Currency.USD, TimeStamp("01.03.2022"))
+                x.add_transfer("transfer_2", "member_2", "member_3",
+                               5.0, Currency.Euro, TimeStamp("01.03.2022"))
+            db.set_exchange_rate(Currency.USD, 1.5)
+            group.exchange_rates[Currency.USD] = 1.5
+
+            self.assertRaises(DuplicateMemberError, db.add_member, "member_3")
+            self.assertRaises(InvalidMemberError, db.add_purchase, "purchase_5",
+                              "member_4", ["member_1"], 1.0, Currency.Euro, TimeStamp())
+
+        with SQLiteGroup(TestSQLiteGroup.path_2) as db:
+            expected = group.member_balances()
+            for name, x in db.member_balances().items():
+                self.assertAlmostEqual(x, expected[name])
+
+            self.assertEqual(len(db.balances()), len(group.balances()))
+            self.assertEqual(len(db.to_dict()['purchases']), 4)
+
+    def test_journal(self):
+        group = load_group(TestSQLiteGroup.path_1)
+        group.save(TestSQLiteGroup.path_3)
+
+        # Test: the changes in the journal are imported
+        group = load_group(TestSQLiteGroup.path_3)
+        group.description = "journaled"
+        group.set_exchange_rate(Currency.USD, 2.0)
+        group.set_exchange_rate(Currency.USD, 4.0, "01.03.2022")
+        group.add_member("member_3")
+        group.add_purchase("purchase_4", "member_3", ["member_1", "member_2"],
+                           30.0, Currency.USD, "02.03.2022")
+        group.add_transfer("transfer_2", "member_1", "member_3",
+                           5.0, Currency.Euro, "03.03.2022")
+        group.save(TestSQLiteGroup.path_3, journal=True)
+        self.assertTrue(os.path.exists(TestSQLiteGroup.path_3 + '.journal'))
+
+        loaded = load_group(TestSQLiteGroup.path_3)
+        with SQLiteGroup(TestSQLiteGroup.path_2) as db:
+            db.load_json(TestSQLiteGroup.path_3)
+            self.assertDictEqual(db.member_balances(), loaded.member_balances())
+            self.assertAlmostEqual(db.turnover, loaded.turnover)
+            self.assertDictEqual(db.to_dict(), loaded.to_dict())
+
+    def test_rate_series(self):
+        group = Group("pySplit", currency=Currency.Euro)
+        group.set_exchange_rate(Currency.USD, 1.0)
+        group.set_exchange_rate(Currency.USD, 2.0, "01.01.2022")
+        group.add_member("member_1")
+        group.add_member("member_2")
+        group.add_purchase("purchase_1", "member_1", ["member_2"],
+                           100.0, Currency.USD, "01.06.2022")
+        group.add_purchase("purchase_2", "member_1", ["member_1", "member_2"],
+                           10.0, Currency.USD, "01.06.2021")
+        group.save(TestSQLiteGroup.path_3)
+
+        # Test: import and export of the rate series
+        with SQLiteGroup(TestSQLiteGroup.path_2) as db:
+            db.load_json(TestSQLiteGroup.path_3)
+            self.assertDictEqual(db.to_dict(), group.to_dict())
+
+            # Test: rows are converted with the rate of their date
+            self.assertDictEqual(db.member_balances(), group.member_balances())
+            self.assertAlmostEqual(db.member_balance("member_2"), -55.0)
+            self.assertAlmostEqual(db.turnover, group.turnover)
+            self.assertAlmostEqual(db.exchange(10.0, Currency.USD, "01.02.2022"), 5.0)
+
+            for x in [db, group]:
+                x.set_exchange_rate(Currency.USD, 4.0, "01.03.2022")
+            self.assertDictEqual(db.member_balances(), group.member_balances())
+            db.set_exchange_rate(Currency.USD, None, "01.03.2022")
+            self.assertAlmostEqual(db.member_balance("member_1"), 55.0)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
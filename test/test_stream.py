@@ -0,0 +1,66 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+import json
+import os
+from pysplit import iter_group, load_group, stream_group
+
+
+class TestStream(unittest.TestCase):
+    path_1 = "test/res/pysplit.json"
+    path_2 = ".pytest_cache/test_stream.json"
+
+    def test_iter_group(self):
+        # Test: records with chunks cutting through the tokens
+        with open(TestStream.path_1, 'r') as fp:
+            data = json.load(fp)
+
+        for chunk_size in [1, 7, 65536]:
+            records = list(iter_group(TestStream.path_1, chunk_size=chunk_size))
+            self.assertListEqual([x for k, x in records if k == 'purchases'],
+                                 data['purchases'])
+            self.assertListEqual([x for k, x in records if k == 'members'],
+                                 data['members'])
+            self.assertDictEqual(dict(records)['exchange_rates'],
+                                 data['exchange_rates'])
+
+        # Test: malformed files
+        dir_name = os.path.dirname(TestStream.path_2)
+        if not os.path.exists(dir_name):
+            os.mkdir(dir_name)
+
+        for text in ['{"name": "pySplit",}', '{"members": [{"name": 1}', '{} {}', '[]']:
+            with open(TestStream.path_2, 'w') as fp:
+                fp.write(text)
+
+            self.assertRaises(ValueError, list, iter_group(TestStream.path_2, chunk_size=4))
+
+    def test_stream_group(self):
+        group_1 = load_group(TestStream.path_1)
+        group_2 = stream_group(TestStream.path_1, chunk_size=16)
+        self.assertDictEqual(group_1.to_dict(), group_2.to_dict())
+        self.assertDictEqual(group_1.member_balances(), group_2.member_balances())
+
+
+if __name__ == '__main__':
+
+    unittest.main()
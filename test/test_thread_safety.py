@@ -0,0 +1,210 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+import random
+import sys
+import threading
+from pysplit import Group
+from pysplit.utils import Currency, DuplicateMemberError, to_minor
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestThreadSafety(unittest.TestCase):
+    n_members = 8
+    n_writers = 4
+    n_purchases = 300
+
+    def run_threads(self, group, read):
+        names = ["member_{:}".format(i) for i in range(TestThreadSafety.n_members)]
+        for name in names:
+            group.add_member(name)
+
+        errors = []
+        done = threading.Event()
+
+        def write(seed):
+            rng = random.Random(seed)
+            try:
+                for i in range(TestThreadSafety.n_purchases):
+                    recipients = rng.sample(names, rng.randint(1, 3))
+                    group.add_purchase("purchase_{:}".format(i), rng.choice(names), recipients,
+                                       rng.randint(1, 10000) / 100, Currency.Euro, "01.03.2022")
+            except Exception as e:
+                errors.append(e)
+
+        def loop():
+            try:
+                state = {}
+                while not done.is_set():
+                    read(state, errors)
+            except Exception as e:
+                errors.append(e)
+
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            readers = [threading.Thread(target=loop) for _ in range(2)]
+            writers = [threading.Thread(target=write, args=(i,))
+                       for i in range(TestThreadSafety.n_writers)]
+            for x in readers + writers:
+                x.start()
+            for x in writers:
+                x.join()
+            done.set()
+            for x in readers:
+                x.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(group._purchases),
+                         TestThreadSafety.n_writers * TestThreadSafety.n_purchases)
+        group.check_ledger()
+
+    def test_concurrent(self):
+        group = Group("pySplit", currency=Currency.Euro, thread_safe=True)
+
+        def read(state, errors):
+            balances = group.member_balances()
+            if sum(to_minor(x) for x in balances.values()) != 0:
+                errors.append(balances)
+            x = group.turnover
+            if x < state.get('turnover', 0.0):
+                errors.append((state['turnover'], x))
+            state['turnover'] = x
+
+        # Test: snapshot reads during concurrent appends
+        self.run_threads(group, read)
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_numpy_engine(self):
+        group = Group("pySplit", currency=Currency.Euro, engine='numpy', thread_safe=True)
+
+        def read(state, errors):
+            balances = group.member_balances()
+            if sum(to_minor(x) for x in balances.values()) != 0:
+                errors.append(balances)
+
+        # Test: engine reads during concurrent appends
+        self.run_threads(group, read)
+
+    def test_query(self):
+        group = Group("pySplit", currency=Currency.Euro, thread_safe=True)
+
+        def read(state, errors):
+            # the row indexes are dropped, so every query creates them again
+            group._row_index = group._time_index = None
+            list(group.query(purchaser="member_0", date_from="01.01.2022"))
+
+        # Test: row indexes created during concurrent appends
+        self.run_threads(group, read)
+        self.assertEqual(
+            len(list(group.query(date_from="01.01.2022"))),
+            TestThreadSafety.n_writers * TestThreadSafety.n_purchases)
+        self.assertEqual(len(list(group.query(purchaser="member_0"))),
+                         sum(x.purchaser.name == "member_0" for x in group._purchases))
+
+    def test_exchange_rates(self):
+        group = Group("pySplit", currency=Currency.Euro, thread_safe=True)
+        group.exchange_rates[Currency.USD] = 2.0
+        names = ["member_{:}".format(i) for i in range(TestThreadSafety.n_members)]
+        for name in names:
+            group.add_member(name)
+
+        rng = random.Random(0)
+        for i in range(TestThreadSafety.n_purchases):
+            group.add_purchase("purchase_{:}".format(i), rng.choice(names), rng.sample(names, 2),
+                               rng.randint(1, 10000) / 100, Currency.USD,
+                               "{:02d}.03.2022".format(i % 28 + 1))
+
+        # the two states a reader may see
+        expected = [group.member_balances()]
+        group.set_exchange_rate(Currency.USD, 4.0, "10.03.2022")
+        expected.append(group.member_balances())
+        group.remove_exchange_rate(Currency.USD, "10.03.2022")
+
+        errors = []
+        done = threading.Event()
+
+        def write():
+            try:
+                for _ in range(TestThreadSafety.n_purchases):
+                    group.set_exchange_rate(Currency.USD, 4.0, "10.03.2022")
+                    group.remove_exchange_rate(Currency.USD, "10.03.2022")
+            except Exception as e:
+                errors.append(e)
+
+        def read():
+            try:
+                while not done.is_set():
+                    balances = group.member_balances()
+                    if balances not in expected:
+                        errors.append(balances)
+            except Exception as e:
+                errors.append(e)
+
+        # Test: reads while the rates of a series are set and removed
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            readers = [threading.Thread(target=read) for _ in range(2)]
+            writer = threading.Thread(target=write)
+            for x in readers + [writer]:
+                x.start()
+            writer.join()
+            done.set()
+            for x in readers:
+                x.join()
+        finally:
+            sys.setswitchinterval(interval)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(group.member_balances(), expected[0])
+        group.check_ledger()
+
+    def test_add_member(self):
+        group = Group("pySplit", currency=Currency.Euro, thread_safe=True)
+        errors = []
+
+        def add():
+            try:
+                group.add_member("member_1")
+            except DuplicateMemberError as e:
+                errors.append(e)
+
+        # Test: a name is added by one thread only
+        threads = [threading.Thread(target=add) for _ in range(8)]
+        for x in threads:
+            x.start()
+        for x in threads:
+            x.join()
+        self.assertEqual(len(errors), 7)
+        self.assertEqual(group._member_names, ["member_1"])
+
+
+if __name__ == '__main__':
+
+    unittest.main()
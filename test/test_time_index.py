@@ -0,0 +1,70 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+from pysplit import Group
+from pysplit.time_index import TimeIndex
+from pysplit.utils import Currency
+
+
+class TestTimeIndex(unittest.TestCase):
+
+    def test_time_index(self):
+        group = Group("pySplit", currency=Currency.Euro)
+        group.exchange_rates[Currency.USD] = 2.0
+        for name in ("member_1", "member_2", "member_3"):
+            group.add_member(name)
+
+        for day in range(1, 21):
+            group.add_purchase("purchase_{:}".format(day), "member_1", ["member_2"],
+                               10.0, Currency.Euro, "{:02d}.03.2022".format(day))
+        group._time_index = TimeIndex(group, segment=4)
+        self.assertGreater(len(group._time_index._bounds), 1)
+
+        # Test: point-in-time balances
+        member = group.get_member_by_name("member_1")
+        self.assertAlmostEqual(member.balance_at("10.03.2022"), 100.0)
+        self.assertAlmostEqual(member.balance_at("10.03.2022 23:59:59"), 100.0)
+        self.assertAlmostEqual(member.balance_at("28.02.2022"), 0.0)
+        self.assertAlmostEqual(member.balance_at("01.01.2023"), member.balance)
+
+        # Test: out of order inserts and updates
+        group.add_transfer("transfer_1", "member_2", "member_1",
+                           40.0, Currency.USD, "01.03.2022")
+        group.add_purchase("purchase_21", "member_3", ["member_1", "member_3"],
+                           30.0, Currency.Euro, "05.03.2022")
+        self.assertAlmostEqual(member.balance_at("10.03.2022"), 65.0)
+        self.assertAlmostEqual(member.balance_at("04.03.2022"), 20.0)
+
+        purchase = group._purchases[0]
+        purchase.date = "15.03.2022"
+        purchase.amount = 20.0
+        self.assertAlmostEqual(member.balance_at("10.03.2022"), 55.0)
+        self.assertAlmostEqual(member.balance_at("15.03.2022"), 125.0)
+
+        balances = group.balances(as_of="04.03.2022")
+        self.assertEqual([(x.purchaser.name, x.amount) for x in balances],
+                         [("member_2", 10.0)])
+
+
+if __name__ == '__main__':
+
+    unittest.main()
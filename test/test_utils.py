@@ -21,7 +21,7 @@
 # SOFTWARE.
 import unittest
 from datetime import datetime
-from pysplit.utils import at_least_1d, Base, TimeStamp
+from pysplit.utils import at_least_1d, Base, TimeStamp, split, to_major, to_minor
 
 
 class TestUtils(unittest.TestCase):
@@ -68,6 +68,38 @@ class TestUtils(unittest.TestCase):
         self.assertRaises(ValueError, stamp_2.__setattr__, "time", "01.02.22")
         self.assertRaises(TypeError, stamp_2.__setattr__, "time", 1)
 
+        # Test: fast parser and formatter against strptime and strftime
+        for string in ["23.02.2022", "23.02.2022 00:30:00", "29.02.2024 23:59:59",
+                       "01.01.1970", "31.12.1969 12:00:00", "1.2.2022", "01.02.0999"]:
+            try:
+                expected = datetime.strptime(string, TimeStamp.fmt_date_time)
+            except ValueError:
+                expected = datetime.strptime(string, TimeStamp.fmt_date)
+
+            stamp = TimeStamp(string)
+            self.assertEqual(stamp.time, expected)
+            self.assertEqual(stamp.ticks, TimeStamp(expected).ticks)
+            self.assertEqual(str(stamp), str(TimeStamp.from_ticks(stamp.ticks)))
+            self.assertEqual(str(stamp), expected.strftime(
+                TimeStamp.fmt_date if expected.time() == expected.min.time()
+                else TimeStamp.fmt_date_time))
+
+        for string in ["29.02.2022", "23.02.2022 24:00:00", "23.02.2022 00:60:00",
+                       "23-02-2022", "23.02.2022 0:30:00x"]:
+            self.assertRaises(ValueError, TimeStamp, string)
+
+    def test_money(self):
+        # Test: minor units
+        self.assertEqual(to_minor(0.1) + to_minor(0.2), to_minor(0.3))
+        self.assertEqual(to_minor("12.34"), 1234)
+        self.assertEqual(to_major(1234), 12.34)
+
+        # Test: deterministic and symmetric split of the remainder
+        self.assertListEqual(split(100, 3), [34, 33, 33])
+        self.assertListEqual(split(-100, 3), [-34, -33, -33])
+        self.assertListEqual(split(2, 4), [1, 1, 0, 0])
+        self.assertEqual(sum(split(12345, 7)), 12345)
+
     def test_utils(self):
         # Test: at_least_1d
         value = 2.0
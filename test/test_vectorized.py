@@ -0,0 +1,77 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+import random
+from pysplit import Group
+from pysplit.utils import Currency, TimeStamp
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestVectorized(unittest.TestCase):
+
+    def test_numpy_engine(self):
+        rng = random.Random(0)
+        group = Group("pySplit", currency=Currency.Euro)
+        group.exchange_rates[Currency.USD] = 1.19
+
+        members = ['member_{:}'.format(i) for i in range(20)]
+        for name in members:
+            group.add_member(name)
+
+        for i in range(200):
+            group.add_purchase('purchase_{:}'.format(i), rng.choice(members),
+                               rng.sample(members, rng.randint(1, 5)),
+                               rng.uniform(1.0, 100.0), rng.choice(list(Currency)),
+                               TimeStamp())
+
+        # Test: engine selection after construction
+        expected = group.member_balances()
+        group.engine = 'numpy'
+        actual = group.member_balances()
+        for name in members:
+            self.assertAlmostEqual(expected[name], actual[name])
+
+        # Test: bookings and cancellations after selection
+        transfer = group.add_transfer('transfer_1', members[0], members[1],
+                                      50.0, Currency.USD, TimeStamp())
+        transfer.amount = 25.0
+        group.exchange_rates[Currency.USD] = 1.5
+        actual = group.balances()
+        group.engine = 'python'
+        expected = group.balances()
+
+        self.assertEqual(len(expected), len(actual))
+        for x, y in zip(expected, actual):
+            self.assertEqual(x.purchaser, y.purchaser)
+            self.assertAlmostEqual(x.amount, y.amount)
+
+        self.assertRaises(ValueError, setattr, group, 'engine', 'fortran')
+
+
+if __name__ == '__main__':
+
+    unittest.main()
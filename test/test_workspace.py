@@ -0,0 +1,70 @@
+# MIT License
+#
+# Copyright (c) 2022 Florian Eigentler
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+import unittest
+import os
+import shutil
+from pysplit import Workspace, load_group
+from pysplit.utils import Currency
+
+
+class TestWorkspace(unittest.TestCase):
+    path_1 = "test/res/pysplit.json"
+    path_2 = ".pytest_cache/test_workspace"
+
+    def test_workspace(self):
+        shutil.rmtree(TestWorkspace.path_2, ignore_errors=True)
+        os.makedirs(os.path.join(TestWorkspace.path_2, "trips"))
+
+        group = load_group(TestWorkspace.path_1)
+        for i in range(4):
+            group.save(os.path.join(TestWorkspace.path_2, "trips", "trip_{:}.json".format(i)))
+        group.save(os.path.join(TestWorkspace.path_2, "team.json"))
+        with open(os.path.join(TestWorkspace.path_2, "broken.json"), 'w') as fp:
+            fp.write("{")
+
+        # Test: parallel evaluation of all groups
+        workspace = Workspace(TestWorkspace.path_2)
+        report = workspace.evaluate(max_workers=2)
+        self.assertEqual(report['evaluated'], 6)
+        self.assertEqual(len(report['groups']), 5)
+        self.assertEqual(list(report['errors']), ["broken.json"])
+        summary = report['groups'][os.path.join("trips", "trip_0.json")]
+        self.assertAlmostEqual(summary['turnover'], group.turnover)
+        self.assertDictEqual(summary['balances'], group.member_balances())
+        self.assertAlmostEqual(report['turnover']['Euro'], 5 * group.turnover)
+
+        # Test: unchanged groups are skipped
+        group.add_purchase("purchase_4", "member_2", ["member_1"],
+                           10.0, Currency.Euro, "24.06.2021")
+        group.save(os.path.join(TestWorkspace.path_2, "team.json"), journal=True)
+        report = workspace.evaluate(max_workers=1)
+        self.assertEqual((report['evaluated'], report['skipped']), (1, 5))
+        self.assertEqual(report['groups']["team.json"]['purchases'], 4)
+        self.assertEqual(report['groups']["team.json"]['balances'], group.member_balances())
+
+        report = workspace.evaluate(max_workers=1, force=True)
+        self.assertEqual(report['evaluated'], 6)
+
+
+if __name__ == '__main__':
+
+    unittest.main()